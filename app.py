@@ -6,57 +6,36 @@ This module serves as the main entry point for the Foodify web application.
 It initializes the Flask application, sets up authentication,
 registers blueprints, and configures error handlers.
 """
+import os
 from typing import Optional, Any, Tuple
+from dotenv import load_dotenv
 from flask import Flask, render_template
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
 from models import storage
-from models.client import Client
-
-# Import route blueprints
-from routes.delivery import delivery_routes
-from routes.payment import payment_routes
-from routes.order import order_routes
-from routes.welcome import welcome_routes
-from routes.signup import signup_routes
-from routes.user_setting import setting_routes
-from routes.contact import contact_routes
-from routes.login import login_routes, logout_routes
-from routes.restaurant import restaurant_routes
-from routes.config import config_routes
-from flask import Flask, render_template
-from flask_bcrypt import Bcrypt
-from flask_login import LoginManager
-from models import storage
-from dotenv import load_dotenv
-import os
+from services.identity import ClientPrincipal, identity_cache
 
 load_dotenv()
 
-# Create Flask app instance first
-foodify_app = Flask(__name__, template_folder="templates")
-foodify_app.config["SECRET_KEY"] = os.getenv("FLASK_SECRET_KEY")
-
-# Authentication setup
-login_manager: LoginManager = LoginManager(foodify_app)
+# Extensions are bound to an application in create_app()
+login_manager: LoginManager = LoginManager()
 login_manager.login_view = "login_routes.login"
 login_manager.login_message_category = "info"
-bcrypt: Bcrypt = Bcrypt(foodify_app)
+bcrypt: Bcrypt = Bcrypt()
 
 
 @login_manager.user_loader
-def load_user(user_id: str) -> Optional[Client]:
+def load_user(user_id: str) -> Optional[ClientPrincipal]:
     """
-    Load a user from the database by their ID.
+    Load a user by their ID through the identity cache.
 
     Args:
         user_id: The unique identifier of the user
 
     Returns:
-        Client object if found, None otherwise
+        ClientPrincipal if found, None otherwise
     """
-    clients = storage.all(Client).values()
-    return next((client for client in clients if client.id == user_id), None)
+    return identity_cache.load(user_id)
 
 
 def close_db(error: Optional[Exception] = None) -> None:
@@ -70,7 +49,6 @@ def close_db(error: Optional[Exception] = None) -> None:
 
 
 # Error handlers
-@foodify_app.errorhandler(403)
 def forbidden_error(error: Any) -> Tuple[str, int]:
     """
     Handle 403 Forbidden errors.
@@ -84,7 +62,6 @@ def forbidden_error(error: Any) -> Tuple[str, int]:
     return render_template('403.html'), 403
 
 
-@foodify_app.errorhandler(404)
 def not_found_error(error: Any) -> Tuple[str, int]:
     """
     Handle 404 Not Found errors.
@@ -98,7 +75,6 @@ def not_found_error(error: Any) -> Tuple[str, int]:
     return render_template('404.html'), 404
 
 
-@foodify_app.errorhandler(500)
 def internal_error(error: Any) -> Tuple[str, int]:
     """
     Handle 500 Internal Server errors.
@@ -113,21 +89,74 @@ def internal_error(error: Any) -> Tuple[str, int]:
     return render_template('500.html'), 500
 
 
-# Register blueprints
-foodify_app.register_blueprint(login_routes)
-foodify_app.register_blueprint(logout_routes)
-foodify_app.register_blueprint(setting_routes)
-foodify_app.register_blueprint(signup_routes)
-foodify_app.register_blueprint(welcome_routes)
-foodify_app.register_blueprint(order_routes)
-foodify_app.register_blueprint(payment_routes)
-foodify_app.register_blueprint(delivery_routes)  # Changed from location_routes
-foodify_app.register_blueprint(contact_routes)
-foodify_app.register_blueprint(restaurant_routes)  # Add this line
-foodify_app.register_blueprint(config_routes)
-
-# Register cleanup function
-foodify_app.teardown_appcontext(close_db)
+def create_app() -> Flask:
+    """
+    Create and configure a Foodify application instance.
+
+    Returns:
+        Flask application with extensions, blueprints and handlers
+    """
+    # blueprints and in-memory search services are imported here, when an
+    # application is built, rather than by importing this module
+    from models.engine import instrumentation
+    from models.engine.db_storage import FAST_START
+    from routes.config import config_routes
+    from routes.contact import contact_routes
+    from routes.delivery import delivery_routes
+    from routes.login import login_routes, logout_routes
+    from routes.order import order_routes
+    from routes.payment import payment_routes
+    from routes.restaurant import restaurant_routes
+    from routes.signup import signup_routes
+    from routes.user_setting import setting_routes
+    from routes.welcome import welcome_routes
+    from services import fuzzy, invalidation, suggest
+
+    app = Flask(__name__, template_folder="templates")
+    app.config["SECRET_KEY"] = os.getenv("FLASK_SECRET_KEY")
+
+    # Authentication setup
+    login_manager.init_app(app)
+    bcrypt.init_app(app)
+
+    # Error handlers
+    app.register_error_handler(403, forbidden_error)
+    app.register_error_handler(404, not_found_error)
+    app.register_error_handler(500, internal_error)
+
+    # Register blueprints
+    app.register_blueprint(login_routes)
+    app.register_blueprint(logout_routes)
+    app.register_blueprint(setting_routes)
+    app.register_blueprint(signup_routes)
+    app.register_blueprint(welcome_routes)
+    app.register_blueprint(order_routes)
+    app.register_blueprint(payment_routes)
+    app.register_blueprint(delivery_routes)
+    app.register_blueprint(contact_routes)
+    app.register_blueprint(restaurant_routes)
+    app.register_blueprint(config_routes)
+
+    # Register cleanup function
+    app.teardown_appcontext(close_db)
+
+    # Per-request SQL statistics (Server-Timing header in debug mode)
+    instrumentation.init_app(app)
+
+    # Invalidate in-process caches after writes made by other processes
+    invalidation.init_app(app)
+
+    # In-memory search indexes; fast starts load them on first use. The
+    # first poll records the cache versions the indexes start from.
+    if not FAST_START:
+        invalidation.bus.poll(force=True)
+        fuzzy.warm()
+        suggest.warm()
+
+    return app
+
+
+foodify_app = create_app()
 
 if __name__ == "__main__":
     foodify_app.run(debug=True)
@@ -0,0 +1,6 @@
+"""
+Micro-benchmarks for Foodify's storage and caching paths.
+
+Run a benchmark from the repository root, e.g.:
+    python -m benchmarks.bench_identity_loader 10 1000 100000
+"""
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk writes against the per-object storage.new + storage.save path.
+
+Inserts N menu items three ways and reports rows per second:
+    per-object   one ORM unit of work and commit per row (BaseModel.save)
+    bulk_new     executemany batches, one commit
+    bulk_upsert  INSERT ... ON DUPLICATE KEY / ON CONFLICT batches
+
+Usage: python -m benchmarks.bench_bulk_write [N] [batch_size]
+Run it against a scratch database, e.g. FOODIFY_STORAGE=:memory:.
+"""
+import sys
+import time
+from models import storage
+from models.menu_item import MenuItem
+from models.restaurant import Restaurant
+
+
+def make_items(restaurant_id: str, count: int, tag: str):
+    """Build count unsaved menu items."""
+    return [
+        MenuItem(restaurant_id=restaurant_id, name=f"{tag}_{i}", price=9.99)
+        for i in range(count)
+    ]
+
+
+def main(count: int, batch_size: int) -> None:
+    """Run each write path and print its throughput."""
+    restaurant = Restaurant(name="Bench Kitchen", city="Rabat")
+    storage.new(restaurant)
+    storage.save()
+
+    items = make_items(restaurant.id, count, "single")
+    start = time.perf_counter()
+    for item in items:
+        storage.new(item)
+        storage.save()
+    single = time.perf_counter() - start
+
+    items = make_items(restaurant.id, count, "bulk")
+    start = time.perf_counter()
+    storage.bulk_new(items, batch_size=batch_size)
+    bulk = time.perf_counter() - start
+
+    rows = [{"id": item.id, "restaurant_id": restaurant.id,
+             "name": item.name, "price": 10.49} for item in items]
+    start = time.perf_counter()
+    storage.bulk_upsert(MenuItem, rows, batch_size=batch_size)
+    upsert = time.perf_counter() - start
+
+    print(f"{'path':<12} {'seconds':>9} {'rows/s':>10}")
+    for name, elapsed in (("per-object", single), ("bulk_new", bulk),
+                          ("bulk_upsert", upsert)):
+        print(f"{name:<12} {elapsed:>9.3f} {count / elapsed:>10.0f}")
+    storage.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark menu search with ILIKE scans against the full-text index.
+
+Seeds N menu items (default 1,000,000) spread over 1,000 restaurants,
+then times search.search for a few queries in both modes: "like" scans
+menu_items.name with ILIKE '%term%', "fulltext" goes through MySQL
+FULLTEXT or the SQLite FTS5 table. Caches are bypassed, so every call
+runs the page and count queries. Run it against a scratch database that
+has been migrated (echo migrate | python console.py); seeded rows are
+kept, so later runs skip seeding.
+
+Usage: python -m benchmarks.bench_fulltext [N] [REPEATS]
+"""
+import random
+import statistics
+import sys
+import time
+from typing import Iterator, List
+from unittest.mock import patch
+from models import storage
+from models.menu_item import MenuItem
+from models.restaurant import Restaurant
+from services import search
+
+RESTAURANTS = 1000
+QUERIES = ["margherita", "spicy chicken", "napoli", "zzz"]
+WORDS = ["pizza", "burger", "salad", "wrap", "chicken", "beef", "spicy",
+         "vegan", "cheese", "grilled", "classic", "double", "tacos",
+         "ramen", "sushi", "curry", "pasta", "soup", "margherita", "bbq"]
+CITIES = ["napoli", "rabat", "tokyo", "lyon", "austin"]
+
+
+def seed(count: int) -> None:
+    """Insert menu items until the bench restaurants hold count of them."""
+    bench = storage.find(Restaurant, city="bench", limit=RESTAURANTS)
+    if not bench:
+        bench = [
+            Restaurant(name=f"{random.choice(CITIES).title()} Kitchen {i}",
+                       city="bench")
+            for i in range(RESTAURANTS)
+        ]
+        storage.bulk_new(bench)
+    existing = storage.count(MenuItem)
+    if existing >= count:
+        return
+
+    rng = random.Random(42)
+    ids = [r.id for r in bench]
+
+    def items() -> Iterator[MenuItem]:
+        for i in range(existing, count):
+            name = " ".join(rng.sample(WORDS, 3)).title()
+            yield MenuItem(restaurant_id=rng.choice(ids),
+                           name=f"{name} {i}", price=9.5)
+
+    start = time.perf_counter()
+    storage.bulk_new(items(), batch_size=5000)
+    print(f"seeded {count - existing} items in "
+          f"{time.perf_counter() - start:.1f}s")
+
+
+def timed(query: str, fulltext: bool, repeats: int) -> float:
+    """Return the median milliseconds of an uncached first page."""
+    samples: List[float] = []
+    with patch.object(search, "FULLTEXT_SEARCH", fulltext):
+        for _ in range(repeats):
+            search.count_cache.clear()
+            start = time.perf_counter()
+            search.search(query=query)
+            samples.append((time.perf_counter() - start) * 1000)
+            storage.close()
+    return statistics.median(samples)
+
+
+def main(count: int, repeats: int) -> None:
+    """Seed the catalog and compare both modes per query."""
+    seed(count)
+    print(f"{'query':>16} {'like ms':>10} {'fulltext ms':>12}")
+    for query in QUERIES:
+        like = timed(query, False, repeats)
+        ranked = timed(query, True, repeats)
+        print(f"{query:>16} {like:>10.1f} {ranked:>12.1f}")
+
+
+if __name__ == "__main__":
+    args = [int(n) for n in sys.argv[1:]]
+    main(args[0] if args else 1_000_000, args[1] if len(args) > 1 else 5)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark typo-tolerant lookups on the in-memory fuzzy index.
+
+Loads N synthetic menu items (default 100,000) across 1,000 restaurants
+straight into a FuzzyIndex, without a database, then reports the load
+time and the median and 99th percentile latency of misspelt queries.
+
+Usage: python -m benchmarks.bench_fuzzy [N] [REPEATS]
+"""
+import random
+import statistics
+import sys
+import time
+from typing import Dict, Iterator, List
+from services.fuzzy import FuzzyIndex
+
+DISHES = ["pizza", "burger", "salad", "wrap", "chicken", "beef", "tacos",
+          "ramen", "sushi", "curry", "pasta", "soup", "margherita",
+          "lasagna", "falafel", "shawarma", "tagine", "couscous", "kebab",
+          "noodles", "dumplings", "burrito", "quesadilla", "risotto"]
+STYLES = ["spicy", "classic", "double", "vegan", "grilled", "crispy",
+          "smoked", "creamy", "garlic", "lemon", "honey", "bbq", "truffle"]
+QUERIES = ["piza", "buger", "chiken curry", "margarita", "sushy",
+           "tagin", "lasgna", "crsipy falafel", "shwarma wrap", "xyzzy"]
+
+
+def restaurants(count: int) -> List[tuple]:
+    """Build (id, name) pairs."""
+    rng = random.Random(7)
+    return [(f"r{i}", f"{rng.choice(STYLES).title()} "
+             f"{rng.choice(DISHES).title()} House {i}") for i in range(count)]
+
+
+def items(count: int, restaurant_ids: List[str]) -> Iterator[Dict]:
+    """Build menu_items column values with a mix of dish names."""
+    rng = random.Random(42)
+    for i in range(count):
+        name = (f"{rng.choice(STYLES)} {rng.choice(DISHES)} "
+                f"{rng.choice(DISHES)} no{i % 5000}").title()
+        yield {"id": f"m{i}", "restaurant_id": rng.choice(restaurant_ids),
+               "name": name, "price": 9.5, "is_available": True,
+               "image_url": None}
+
+
+def main(count: int, repeats: int) -> None:
+    """Load the index and time each query."""
+    index = FuzzyIndex()
+    places = restaurants(1000)
+    start = time.perf_counter()
+    index.load(places, items(count, [r[0] for r in places]))
+    print(f"loaded {count} items in {time.perf_counter() - start:.1f}s")
+
+    print(f"{'query':>16} {'matches':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for query in QUERIES:
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            found, total = index.search(query)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(f"{query:>16} {total:>8} "
+              f"{statistics.median(samples):>8.3f} {p99:>8.3f}")
+
+
+if __name__ == "__main__":
+    args = [int(n) for n in sys.argv[1:]]
+    main(args[0] if args else 100_000, args[1] if len(args) > 1 else 50)
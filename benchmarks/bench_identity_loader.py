@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Flask-Login identity loader against the clients table size.
+
+Seeds the configured database with N clients for each requested size and
+reports per-request latency for the cold path (primary-key lookup) and the
+warm path (identity cache hit). Latency should stay flat as N grows.
+Run it against a scratch database: seeded rows are left in place.
+
+Usage: python -m benchmarks.bench_identity_loader [N ...]
+"""
+import random
+import sys
+import time
+from typing import List
+from models import storage
+from models.client import Client
+from services.identity import IdentityCache
+
+SAMPLES = 2000
+SEED_BATCH = 1000
+
+
+def seed_clients(target: int, ids: List[str]) -> None:
+    """Insert clients until ids holds target entries."""
+    clients = []
+    while len(ids) < target:
+        client = Client(
+            username=f"bench_{len(ids)}",
+            address="1 Bench St",
+            email=f"bench_{len(ids)}_{random.random()}@example.com",
+            password="x",
+        )
+        clients.append(client)
+        ids.append(client.id)
+    storage.bulk_new(clients, batch_size=SEED_BATCH)
+
+
+def time_loads(cache: IdentityCache, ids: List[str], warm: bool) -> float:
+    """Return mean microseconds per load over SAMPLES random ids."""
+    sample = [random.choice(ids) for _ in range(SAMPLES)]
+    if warm:
+        for user_id in sample:
+            cache.load(user_id)
+    else:
+        cache.clear()
+    start = time.perf_counter()
+    for user_id in sample:
+        if not warm:
+            cache.invalidate(user_id)
+        cache.load(user_id)
+    return (time.perf_counter() - start) / SAMPLES * 1e6
+
+
+def main(sizes: List[int]) -> None:
+    """Run the benchmark for each table size."""
+    cache = IdentityCache(maxsize=SAMPLES * 2, ttl=300)
+    ids: List[str] = []
+    print(f"{'clients':>10} {'cold us/req':>12} {'warm us/req':>12}")
+    for size in sorted(sizes):
+        seed_clients(size, ids)
+        cold = time_loads(cache, ids, warm=False)
+        warm = time_loads(cache, ids, warm=True)
+        print(f"{size:>10} {cold:>12.1f} {warm:>12.1f}")
+    storage.close()
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10, 1000, 100000, 1000000])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request session overhead under concurrent threads.
+
+Each simulated request opens storage.session_scope(), loads one client by
+primary key and releases its session, like a Flask request does. The
+legacy mode rebuilds a sessionmaker and scoped_session registry for every
+transaction, as session_scope did before it reused one factory.
+Run it against a scratch database: seeded rows are left in place.
+
+Usage: python -m benchmarks.bench_sessions [THREADS ...]
+"""
+import sys
+import threading
+import time
+from typing import List
+from sqlalchemy.orm import scoped_session, sessionmaker
+from models import storage
+from models.client import Client
+
+REQUESTS_PER_THREAD = 500
+
+
+def current_scope(client_id: str) -> None:
+    """Serve one request through the long-lived session registry."""
+    with storage.session_scope() as session:
+        session.query(Client).get(client_id)
+    storage.close()
+
+
+def legacy_scope(client_id: str) -> None:
+    """Serve one request with a freshly built factory and registry."""
+    session = scoped_session(
+        sessionmaker(bind=storage.engine, expire_on_commit=False)
+    )
+    try:
+        session.query(Client).get(client_id)
+        session.commit()
+    finally:
+        session.remove()
+
+
+def run(threads: int, request, client_id: str) -> float:
+    """Return mean microseconds per request across threads."""
+    def worker() -> None:
+        for _ in range(REQUESTS_PER_THREAD):
+            request(client_id)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return elapsed / (threads * REQUESTS_PER_THREAD) * 1e6
+
+
+def main(thread_counts: List[int]) -> None:
+    """Run both modes for each thread count."""
+    client = Client(username="bench_session", address="1 Bench St",
+                    email=f"bench_session_{time.time()}@example.com",
+                    password="x")
+    storage.bulk_new([client])
+    print(f"{'threads':>8} {'legacy us/req':>14} {'current us/req':>15}")
+    for threads in thread_counts:
+        legacy = run(threads, legacy_scope, client.id)
+        current = run(threads, current_scope, client.id)
+        print(f"{threads:>8} {legacy:>14.1f} {current:>15.1f}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1, 4, 16])
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Stress identical concurrent searches on a cold cache.
+
+Every round clears the search caches, then releases all threads at once
+on the same /api/v1/search parameters, like a promotion going live. The
+direct mode calls search.search in every thread; the coalesced mode goes
+through search.cached_search, where one thread queries and the others
+wait for its result. Reports database statements per round and latency.
+Run it against a scratch database: seeded rows are left in place.
+
+Usage: python -m benchmarks.bench_singleflight [THREADS ...]
+"""
+import statistics
+import sys
+import threading
+import time
+from typing import Callable, List, Tuple
+from models import storage
+from models.engine import instrumentation
+from models.menu_item import MenuItem
+from models.restaurant import Restaurant
+from services import search
+
+ROUNDS = 20
+RESTAURANT = "Burger Blast"
+MENU_SIZE = 2000
+
+
+def seed() -> None:
+    """Create the restaurant and its menu unless already present."""
+    if storage.find(Restaurant, name=RESTAURANT, limit=1):
+        return
+    restaurant = Restaurant(name=RESTAURANT, city="Rabat")
+    storage.bulk_new([restaurant])
+    storage.bulk_new(
+        MenuItem(restaurant_id=restaurant.id, name=f"Burger {i}", price=8)
+        for i in range(MENU_SIZE)
+    )
+
+
+def direct() -> None:
+    """Serve one request without caching or coalescing."""
+    search.search(restaurant=RESTAURANT)
+
+
+def coalesced() -> None:
+    """Serve one request through the cache and single-flight layer."""
+    search.cached_search(restaurant=RESTAURANT)
+
+
+def run(threads: int, request: Callable[[], None]) -> Tuple[float, float]:
+    """Return mean statements per round and median latency in ms."""
+    statements: List[int] = []
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    for _ in range(ROUNDS):
+        search.page_cache.clear()
+        search.count_cache.clear()
+        barrier = threading.Barrier(threads)
+        counts: List[int] = []
+
+        def worker() -> None:
+            barrier.wait()
+            with instrumentation.collect() as stats:
+                start = time.perf_counter()
+                request()
+                elapsed = time.perf_counter() - start
+            storage.close()
+            with lock:
+                counts.append(stats.count)
+                latencies.append(elapsed * 1000)
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        statements.append(sum(counts))
+    return statistics.mean(statements), statistics.median(latencies)
+
+
+def main(thread_counts: List[int]) -> None:
+    """Run both modes for each thread count."""
+    seed()
+    print(f"{'threads':>8} {'direct q/round':>15} {'direct ms':>10}"
+          f" {'coalesced q/round':>18} {'coalesced ms':>13}")
+    for threads in thread_counts:
+        direct_q, direct_ms = run(threads, direct)
+        coalesced_q, coalesced_ms = run(threads, coalesced)
+        print(f"{threads:>8} {direct_q:>15.1f} {direct_ms:>10.2f}"
+              f" {coalesced_q:>18.1f} {coalesced_ms:>13.2f}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1, 8, 32, 128])
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark search-bar suggestions from the in-memory prefix index.
+
+Loads N synthetic menu items (default 100,000) across 1,000 restaurants
+straight into a SuggestIndex, without a database, then reports the load
+time, the median and 99th percentile latency of prefix lookups, and how
+long recording a confirmed order takes.
+
+Usage: python -m benchmarks.bench_suggest [N] [REPEATS]
+"""
+import random
+import statistics
+import sys
+import time
+from benchmarks.bench_fuzzy import items, restaurants
+from services.suggest import SuggestIndex
+
+PREFIXES = ["p", "pi", "piz", "spicy ", "spicy ch", "marg", "no12",
+            "house 4", "t", "zz"]
+
+
+def main(count: int, repeats: int) -> None:
+    """Load the index, time each prefix and a stream of orders."""
+    index = SuggestIndex()
+    places = restaurants(1000)
+    rng = random.Random(3)
+    catalog = [dict(item, popularity=rng.randrange(100))
+               for item in items(count, [r[0] for r in places])]
+    start = time.perf_counter()
+    index.load(places, catalog)
+    print(f"loaded {count} items in {time.perf_counter() - start:.1f}s")
+
+    print(f"{'prefix':>12} {'top':>28} {'p50 ms':>8} {'p99 ms':>8}")
+    for prefix in PREFIXES:
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            found = index.suggest(prefix)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        top = found[0]["text"] if found else "-"
+        print(f"{prefix!r:>12} {top[:28]:>28} "
+              f"{statistics.median(samples):>8.3f} {p99:>8.3f}")
+
+    samples = []
+    for _ in range(repeats):
+        order = {item["id"]: rng.randint(1, 3)
+                 for item in rng.sample(catalog, 5)}
+        start = time.perf_counter()
+        index.record_orders(order)
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"record 5-item order: p50 {statistics.median(samples):.3f} ms, "
+          f"max {max(samples):.3f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(n) for n in sys.argv[1:]]
+    main(args[0] if args else 100_000, args[1] if len(args) > 1 else 1000)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Profile cold start of the Flask application with and without fast start.
+
+Imports app in fresh interpreters under -X importtime, once with the
+default startup (create_all at import) and once with FOODIFY_FAST_START=1
+(stored schema version checked on the first query), and reports the
+median wall time plus the modules with the highest self import time
+in the last run.
+Fast start needs a migrated database: run "migrate" from console.py first.
+
+Usage: python -m benchmarks.profile_startup [RUNS] [TOP]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+
+def import_app(fast_start: bool) -> Tuple[float, str]:
+    """Import app in a new interpreter; return seconds and importtime log."""
+    env = dict(os.environ, FOODIFY_FAST_START="1" if fast_start else "0")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c",
+         "import app"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return time.perf_counter() - start, result.stderr
+
+
+def slowest_imports(log: str, top: int) -> List[Tuple[str, int]]:
+    """Return the modules whose own top-level code took the longest."""
+    own: Dict[str, int] = {}
+    for line in log.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_time, _, name = line[len("import time:"):].split("|")
+        if self_time.strip().isdigit():  # skip the header line
+            own[name.strip()] = int(self_time)
+    return sorted(own.items(), key=lambda kv: kv[1], reverse=True)[:top]
+
+
+def main(runs: int, top: int) -> None:
+    """Profile both startup modes."""
+    for fast_start in (False, True):
+        samples = []
+        for _ in range(runs):
+            elapsed, log = import_app(fast_start)
+            samples.append(elapsed)
+        label = "fast start" if fast_start else "create_all"
+        print(f"{label}: median {statistics.median(samples) * 1000:.0f} ms"
+              f" over {runs} runs")
+        for name, micros in slowest_imports(log, top):
+            print(f"  {micros / 1000:>8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    args = [int(n) for n in sys.argv[1:]]
+    main(args[0] if args else 5, args[1] if len(args) > 1 else 8)
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 """ Console Module """
 import cmd
+import json
 import sys
+from datetime import datetime
+from sqlalchemy import DateTime
 from models.__init__ import storage
 from models.client import Client
 from models.menu_item import MenuItem
@@ -26,6 +29,7 @@ class FoodifyConsole(cmd.Cmd):
         "Review": Review,
     }
     dot_cmds = ["all", "count", "show", "destroy", "update"]
+    page_size = 100
     types = {
         "price": float,
         "rating": int,
@@ -226,31 +230,29 @@ class FoodifyConsole(cmd.Cmd):
 
     def do_all(self, args):
         """Shows all objects, or all objects of a class"""
-        print_list = []
+        cls = None
 
         if args:
             args = args.split(" ")[0]  # remove possible trailing args
             if args not in self.classes:
                 print("** class doesn't exist **")
                 return
+            cls = self.classes[args]
 
-            try:
-                objects = storage.all(self.classes[args])
-                for obj in objects.values():
-                    print_list.append(str(obj))
-            except Exception as e:
-                print(f"** Database error: {e} **")
-                return
-        else:
-            try:
-                objects = storage.all()
-                for obj in objects.values():
-                    print_list.append(str(obj))
-            except Exception as e:
-                print(f"** Database error: {e} **")
-                return
+        # stream rows and print them one page at a time
+        page = []
+        try:
+            for obj in storage.iter(cls, chunk_size=self.page_size):
+                page.append(str(obj))
+                if len(page) == self.page_size:
+                    print("\n".join(page))
+                    page = []
+        except Exception as e:
+            print(f"** Database error: {e} **")
+            return
 
-        print(print_list)
+        if page:
+            print("\n".join(page))
 
     def help_all(self):
         """Help information for the all command"""
@@ -277,6 +279,84 @@ class FoodifyConsole(cmd.Cmd):
         """ """
         print("Usage: count <class_name>")
 
+    def do_import(self, args):
+        """Bulk insert or update instances from a JSON file"""
+        args = args.split()
+        if not args:
+            print("** class name missing **")
+            return
+
+        if args[0] not in self.classes:
+            print("** class doesn't exist **")
+            return
+
+        if len(args) < 2:
+            print("** file name missing **")
+            return
+
+        try:
+            with open(args[1], encoding="utf-8") as f:
+                content = f.read().strip()
+            # accept a JSON array or one JSON object per line
+            if content.startswith("["):
+                rows = json.loads(content)
+            else:
+                rows = [json.loads(line) for line in content.splitlines()
+                        if line.strip()]
+        except (OSError, ValueError) as e:
+            print(f"** Error reading file: {e} **")
+            return
+
+        cls = self.classes[args[0]]
+        date_columns = [c.key for c in cls.__table__.columns
+                        if isinstance(c.type, DateTime)]
+        for number, row in enumerate(rows, 1):
+            row.pop("__class__", None)
+            for key in date_columns:
+                if isinstance(row.get(key), str):
+                    try:
+                        row[key] = datetime.fromisoformat(row[key])
+                    except ValueError:
+                        print(f"** row {number}: invalid {key} "
+                              f"{row[key]!r} **")
+                        return
+
+        try:
+            print(storage.bulk_upsert(cls, rows))
+        except Exception as e:
+            print(f"** Database error: {e} **")
+
+    def help_import(self):
+        """Help information for the import command"""
+        print("Inserts or updates instances of a class from a JSON file")
+        print("Rows with an existing id are updated, others inserted")
+        print("[Usage]: import <className> <file.json>\n")
+
+    def do_migrate(self, args):
+        """Applies pending schema migrations"""
+        try:
+            if args.strip() == "status":
+                steps = storage.pending_migrations()
+                if not steps:
+                    print("** schema is up to date **")
+                for step in steps:
+                    print(f"pending {step.version}: {step.description}")
+                return
+            steps = storage.migrate()
+        except Exception as e:
+            print(f"** Database error: {e} **")
+            return
+
+        if not steps:
+            print("** schema is up to date **")
+        for step in steps:
+            print(f"applied {step.version}: {step.description}")
+
+    def help_migrate(self):
+        """Help information for the migrate command"""
+        print("Applies pending schema migrations in order")
+        print("[Usage]: migrate [status]\n")
+
     def do_update(self, args):
         """Updates a certain object with new info"""
         c_name = c_id = att_name = att_val = kwargs = ""
@@ -300,11 +380,9 @@ class FoodifyConsole(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        # generate key from class and id
-        key = c_name + "." + c_id
-
-        # determine if key is present
-        if key not in storage.all():
+        # resolve the instance with a single primary-key lookup
+        obj = storage.get(FoodifyConsole.classes[c_name], c_id)
+        if not obj:
             print("** no instance found **")
             return
 
@@ -339,8 +417,7 @@ class FoodifyConsole(cmd.Cmd):
 
             args = [att_name, att_val]
 
-        # retrieve dictionary of current objects
-        new_dict = storage.all()[key]
+        new_dict = obj
 
         # iterate through attr names and values
         for i, att_name in enumerate(args):
@@ -357,8 +434,9 @@ class FoodifyConsole(cmd.Cmd):
                 if att_name in FoodifyConsole.types:
                     att_val = FoodifyConsole.types[att_name](att_val)
 
-                # update dictionary with name, value pair
-                new_dict.__dict__.update({att_name: att_val})
+                # set through the instrumented attribute so the change is
+                # flushed and the catalog hooks publish it
+                setattr(new_dict, att_name, att_val)
 
         new_dict.save()  # save updates to file
 
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Gunicorn settings for serving foodify_app with one worker per core.
+
+Usage: gunicorn -c gunicorn.conf.py app:foodify_app
+
+The application is imported once in the master (preload_app) and forked
+into the workers. The master closes its pooled database connections before
+forking, and each worker drops whatever it inherited, so no MySQL socket is
+ever shared between processes. Each worker opens at most
+FOODIFY_DB_POOL_SIZE + FOODIFY_DB_MAX_OVERFLOW connections.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("FOODIFY_BIND", "127.0.0.1:8000")
+workers = int(os.getenv("FOODIFY_WORKERS", multiprocessing.cpu_count()))
+# threads > 1 selects the gthread worker, so a long-polling checkout page
+# holds a thread rather than a whole worker process; routes.payment lets
+# at most half of them long-poll (FOODIFY_MAX_LONG_POLLS)
+threads = int(os.getenv("FOODIFY_THREADS", "4"))
+# read by services.cart and routes.payment; the app is loaded after
+# this file
+if workers == 1:
+    os.environ.setdefault("FOODIFY_SINGLE_PROCESS", "1")
+os.environ["FOODIFY_THREADS"] = str(threads)
+timeout = 30
+preload_app = True
+
+
+def pre_fork(server, worker):
+    """Close the master's pooled connections before forking a worker."""
+    from models import storage
+
+    storage.dispose()
+
+
+def post_fork(server, worker):
+    """Drop connections and sessions the worker inherited."""
+    from models import storage
+
+    storage.reset_after_fork()
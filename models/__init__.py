@@ -2,7 +2,8 @@
 """
 Database storage initialization module.
 Instantiates the storage engine and makes it available throughout
-the application.
+the application. reload() creates missing tables, connecting at import
+time, unless FOODIFY_FAST_START=1 defers the connection to first use.
 """
 from models.engine.db_storage import DBStorage
 
@@ -0,0 +1,12 @@
+"""Cache version table shared by every process using the database."""
+from sqlalchemy import Column, Integer, String, Table
+from models.base_model import Base
+
+# one row per invalidation channel, incremented by the transactions that
+# change what the channel's caches hold (see services.invalidation)
+cache_versions = Table(
+    "cache_versions",
+    Base.metadata,
+    Column("name", String(60), primary_key=True),
+    Column("version", Integer, nullable=False, default=0),
+)
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """Client model module defining the Client class."""
 from typing import Optional, Any
-from sqlalchemy import Column, String, Float
+from sqlalchemy import Column, String, Float, Index, Integer
 from sqlalchemy.orm import relationship
 from models.base_model import BaseModel, Base
 from flask_login import UserMixin
@@ -20,9 +20,11 @@ class Client(BaseModel, Base, UserMixin):
         longitude: Geographic longitude
         phone: Contact phone number
         delivery_instructions: Special delivery instructions
+        cart_version: Incremented by every cart write, see services.cart
     """
 
     __tablename__ = "clients"
+    __table_args__ = (Index("idx_clients_username", "username"),)
 
     username: str = Column(String(70), nullable=False)
     address: str = Column(String(70), nullable=False)
@@ -32,6 +34,9 @@ class Client(BaseModel, Base, UserMixin):
     longitude: Optional[float] = Column(Float, nullable=True)
     phone: Optional[str] = Column(String(20), nullable=True)
     delivery_instructions: Optional[str] = Column(String(500), nullable=True)
+    cart_version: int = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
 
     reviews = relationship(
         "Review", back_populates="client", cascade="all, delete-orphan")
@@ -55,3 +60,6 @@ class Client(BaseModel, Base, UserMixin):
             if key in allowed_fields:
                 setattr(self, key, value)
         self.save()
+        from services.identity import identity_cache
+
+        identity_cache.invalidate(self.id)
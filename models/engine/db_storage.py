@@ -1,7 +1,16 @@
 #!/usr/bin/python3
 """This module defines a class to manage db storage for Foodify"""
 from contextlib import contextmanager
-from typing import Dict, Any, Optional, List, Type, Union, Generator
+from datetime import datetime
+from typing import (
+    Dict, Any, Optional, List, Type, Union, Generator, Iterator, Iterable,
+    Tuple
+)
+import os
+import threading
+import uuid
+import weakref
+from flask import _app_ctx_stack
 from models.review import Review
 from models.restaurant import Restaurant
 from models.order import Order
@@ -9,9 +18,18 @@ from models.order_item import OrderItem
 from models.menu_item import MenuItem
 from models.client import Client
 from models.base_model import Base, BaseModel
+# imported so create_all creates the table
+from models.cache_version import cache_versions  # noqa: F401
+from models.engine import fulltext, instrumentation, migrations
+# registers the catalog write hooks in every process using the storage,
+# console.py included, so its writes are published to other workers
+from services import catalog  # noqa: F401
 from sqlalchemy.orm import sessionmaker, scoped_session, Session
 from sqlalchemy.engine import Engine
-from sqlalchemy import create_engine
+from sqlalchemy.engine.url import URL, make_url
+from sqlalchemy.pool import StaticPool
+from sqlalchemy import create_engine, event, Table
+from sqlalchemy.sql.expression import Insert
 from os import getenv
 from dotenv import load_dotenv
 load_dotenv()
@@ -20,6 +38,107 @@ load_dotenv()
 ModelType = Type[Union[Client, Restaurant, MenuItem, Review, Order, OrderItem]]
 CLASSES: List[ModelType] = [Client, Restaurant, MenuItem, Review, Order,
                             OrderItem]
+BULK_BATCH_SIZE = int(getenv("FOODIFY_BULK_BATCH_SIZE", "1000"))
+POOL_SIZE = int(getenv("FOODIFY_DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(getenv("FOODIFY_DB_MAX_OVERFLOW", "10"))
+FAST_START = getenv("FOODIFY_FAST_START", "0") == "1"
+# "fulltext" ranks name searches with the database's full-text index
+# (MySQL FULLTEXT, SQLite FTS5); "like" scans with ILIKE '%term%'
+FULLTEXT_SEARCH = getenv("FOODIFY_SEARCH_MODE", "like") == "fulltext"
+
+event.listen(Base.metadata, "after_create", fulltext.on_create)
+event.listen(Base.metadata, "after_drop", fulltext.on_drop)
+
+_instances: "weakref.WeakSet[DBStorage]" = weakref.WeakSet()
+
+
+def _reset_storages_after_fork() -> None:
+    """Detach every storage from connections inherited by a forked child."""
+    for storage in list(_instances):
+        storage.reset_after_fork()
+
+
+def _session_scope_key() -> Any:
+    """
+    Key of the current session scope.
+
+    Inside a Flask application context every request gets its own session,
+    released by the app's teardown; elsewhere sessions are per thread.
+    """
+    ctx = _app_ctx_stack.top
+    if ctx is not None:
+        return ("app", id(ctx))
+    return ("thread", threading.get_ident())
+
+
+def row_values(table: Table, values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a complete row for table from a partial mapping.
+
+    Every column gets a value so that all rows of an executemany batch
+    share the same keys; missing ids and timestamps are generated and
+    other missing columns fall back to their declared Python default.
+    """
+    now = datetime.now()
+    row = {}
+    for column in table.columns:
+        value = values.get(column.key)
+        if value is None:
+            if column.key == "id":
+                value = str(uuid.uuid4())
+            elif column.key in ("created_at", "updated_at"):
+                value = now
+            elif column.default is not None and column.default.is_scalar:
+                value = column.default.arg
+            elif column.default is not None and column.default.is_callable:
+                value = column.default.arg(None)
+        row[column.key] = value
+    return row
+
+
+def upsert_statement(
+    dialect: str,
+    table: Table,
+    index_elements: List[str],
+    update_columns: Iterable[str] = (),
+    increment_columns: Iterable[str] = (),
+) -> Insert:
+    """
+    Build a dialect-specific INSERT that updates the row on key conflict.
+
+    Args:
+        dialect: Database dialect name (mysql or sqlite)
+        table: Target table
+        index_elements: Columns of the unique key that may conflict
+        update_columns: Columns overwritten with the incoming value
+        increment_columns: Columns incremented by the incoming value
+
+    Returns:
+        Insert statement usable with a single row or executemany
+    """
+    # dialect modules are imported on demand; only the active one is needed
+    if dialect == "mysql":
+        from sqlalchemy.dialects import mysql
+
+        stmt = mysql.insert(table)
+        incoming = stmt.inserted
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects import sqlite
+
+        stmt = sqlite.insert(table)
+        incoming = stmt.excluded
+    else:
+        raise ValueError(f"Upsert is not supported on {dialect}")
+
+    changes = {name: incoming[name] for name in update_columns}
+    for name in increment_columns:
+        changes[name] = table.c[name] + incoming[name]
+
+    if dialect == "mysql":
+        return stmt.on_duplicate_key_update(changes)
+    return stmt.on_conflict_do_update(
+        index_elements=index_elements, set_=changes
+    )
 
 
 class DBStorage:
@@ -29,7 +148,81 @@ class DBStorage:
     __session: Optional[scoped_session] = None
 
     def __init__(self) -> None:
-        """Initialize database connection with better settings"""
+        """
+        Resolve the database URL; the engine is created on first use.
+
+        Note that reload() uses it at once unless FOODIFY_FAST_START=1,
+        so the storage built by importing models connects at import
+        time in the default mode.
+        """
+        self.__url = self.database_url()
+        self.__engine = None
+        self.__session = None
+        _instances.add(self)
+
+    @property
+    def engine(self) -> Engine:
+        """Engine of the current process, created on first access."""
+        if self.__engine is None:
+            if self.__url.get_backend_name() == "sqlite":
+                self.__engine = self._create_sqlite_engine(self.__url)
+            else:
+                self.__engine = create_engine(
+                    self.__url,
+                    pool_pre_ping=True,
+                    pool_recycle=300,
+                    pool_size=POOL_SIZE,
+                    max_overflow=MAX_OVERFLOW,
+                    pool_timeout=30,
+                    connect_args={"connect_timeout": 60,
+                                  "read_timeout": 30},
+                )
+            instrumentation.install(self.__engine)
+        return self.__engine
+
+    def dispose(self) -> None:
+        """
+        Close every pooled connection and drop thread-local sessions.
+
+        Call it in a pre-fork server's master before workers are forked
+        so that no connection is shared with the children.
+        """
+        if self.__session:
+            self.__session.remove()
+        if self.__engine is not None:
+            self.__engine.dispose()
+
+    def reset_after_fork(self) -> None:
+        """
+        Forget connections and sessions inherited from the parent process.
+
+        Runs in a forked child. Inherited sockets still belong to the
+        parent, so they are dropped without being closed, like
+        engine.dispose(close=False), and the child opens its own. The
+        session registry is replaced rather than cleared: clearing only
+        removes the calling thread's session, and closing the others
+        would roll back on the parent's sockets.
+        """
+        if self.__engine is not None:
+            self.__engine.pool = self.__engine.pool.recreate()
+        if self.__session:
+            self.__session = self._session_registry()
+
+    @staticmethod
+    def database_url() -> URL:
+        """
+        Resolve the storage engine URL from the environment.
+
+        FOODIFY_STORAGE selects the engine: a SQLAlchemy URL such as
+        sqlite:///foodify.db, the shorthand :memory: for an in-memory
+        SQLite database, or unset/"mysql" for the FOOD_MYSQL_* server.
+        """
+        storage_url = getenv("FOODIFY_STORAGE", "mysql").strip()
+        if storage_url == ":memory:":
+            return make_url("sqlite://")
+        if storage_url != "mysql":
+            return make_url(storage_url)
+
         user = getenv("FOOD_MYSQL_USER")
         pwd = getenv("FOOD_MYSQL_PWD")
         host = getenv("FOOD_MYSQL_HOST")
@@ -38,34 +231,73 @@ class DBStorage:
         if not all([user, pwd, host, db]):
             raise ValueError("Missing required database credentials")
 
-        self.__engine = create_engine(
-            f"mysql+mysqldb://{user}:{pwd}@{host}/{db}",
-            pool_pre_ping=True,
-            pool_recycle=300,
-            pool_size=5,
-            max_overflow=10,
-            pool_timeout=30,
-            connect_args={"connect_timeout": 60, "read_timeout": 30},
+        return make_url(f"mysql+mysqldb://{user}:{pwd}@{host}/{db}")
+
+    @staticmethod
+    def _create_sqlite_engine(url: URL) -> Engine:
+        """Create a SQLite engine running in WAL mode."""
+        in_memory = url.database in (None, "", ":memory:")
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            # an in-memory database lives only as long as its connection
+            poolclass=StaticPool if in_memory else None,
         )
-        self.__session = None
+
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            if not in_memory:
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.close()
+
+        return engine
+
+    @property
+    def dialect(self) -> str:
+        """Name of the database dialect in use (mysql or sqlite)."""
+        return self.engine.dialect.name
 
     def reload(self) -> None:
-        """Create tables and initialize session."""
+        """
+        Create tables and initialize the session registry.
+
+        With FOODIFY_FAST_START=1 no tables are created and nothing
+        connects here; the first query checks the stored schema version
+        instead (see migrations.require_latest).
+        """
         try:
-            Base.metadata.create_all(self.__engine)
-            session_factory = sessionmaker(
-                bind=self.__engine,
-                expire_on_commit=False,
-                autoflush=True
-            )
-            Session = scoped_session(session_factory)
-            self.__session = Session
+            if FAST_START:
+                migrations.require_latest(self.engine)
+            else:
+                Base.metadata.create_all(self.engine)
+            if self.__session is None:
+                self.__session = self._session_registry()
         except Exception as e:
             print(f"Database reload error: {str(e)}")
             if self.__session:
                 self.__session.remove()
             raise
 
+    def _session_registry(self) -> scoped_session:
+        """Return a registry handing out sessions per app context/thread."""
+        session_factory = sessionmaker(
+            bind=self.engine,
+            expire_on_commit=False,
+            autoflush=True
+        )
+        return scoped_session(session_factory, scopefunc=_session_scope_key)
+
+    def migrate(self) -> List[migrations.Migration]:
+        """Create missing tables, apply pending migrations, return them."""
+        return migrations.migrate(self.engine, Base.metadata)
+
+    def pending_migrations(self) -> List[migrations.Migration]:
+        """Return the schema migrations not yet applied."""
+        return migrations.pending(self.engine)
+
     def new(self, obj: BaseModel) -> None:
         """Add new object to current database session."""
         if obj and self.__session:
@@ -82,6 +314,127 @@ class DBStorage:
             self.__session.rollback()
             raise RuntimeError(f"Save operation failed: {str(e)}") from e
 
+    def bulk_new(
+        self, objs: Iterable[BaseModel], batch_size: int = BULK_BATCH_SIZE
+    ) -> int:
+        """
+        Insert many new objects with one executemany per batch.
+
+        Objects bypass the ORM unit of work: rows are sent straight to
+        the database and committed once at the end. Within a batch,
+        tables are written parent before child; across batches, parents
+        must be passed before their children.
+
+        Args:
+            objs: New model instances, possibly of several classes
+            batch_size: Number of rows sent per round trip
+
+        Returns:
+            Number of rows inserted
+        """
+        if not self.__session:
+            return 0
+
+        table_order = {t: i for i, t in enumerate(Base.metadata.sorted_tables)}
+        pending: Dict[Table, List[Dict[str, Any]]] = {}
+        inserted = 0
+
+        def flush_pending() -> int:
+            count = 0
+            for table in sorted(pending, key=table_order.get):
+                self.__session.execute(table.insert(), pending[table])
+                count += len(pending[table])
+            pending.clear()
+            return count
+
+        try:
+            queued = 0
+            for obj in objs:
+                table = obj.__table__
+                pending.setdefault(table, []).append(
+                    row_values(table, vars(obj))
+                )
+                queued += 1
+                if queued >= batch_size:
+                    inserted += flush_pending()
+                    queued = 0
+            inserted += flush_pending()
+            self.__session.commit()
+        except Exception as e:
+            self.__session.rollback()
+            raise RuntimeError(f"Bulk insert failed: {str(e)}") from e
+        return inserted
+
+    def bulk_upsert(
+        self,
+        cls: Any,
+        rows: Iterable[Dict[str, Any]],
+        batch_size: int = BULK_BATCH_SIZE,
+        update_fields: Optional[List[str]] = None,
+    ) -> int:
+        """
+        Insert rows of cls, updating rows whose id already exists.
+
+        Uses INSERT ... ON DUPLICATE KEY UPDATE on MySQL and
+        INSERT ... ON CONFLICT DO UPDATE on SQLite, one executemany per
+        batch, committed once at the end. Missing columns get their
+        defaults on insert only: an update overwrites the columns the
+        row carries, plus updated_at, and keeps the others.
+
+        Args:
+            cls: Model class of the rows
+            rows: Column mappings; rows without an id are inserted
+            batch_size: Number of rows sent per round trip
+            update_fields: Columns refreshed on conflict, defaults to
+                the columns present in each row except id and created_at
+
+        Returns:
+            Number of rows sent
+        """
+        if not self.__session:
+            return 0
+
+        table = cls.__table__
+
+        def update_columns(values: Dict[str, Any]) -> Tuple[str, ...]:
+            """Return the columns a conflicting row of values updates."""
+            if update_fields is not None:
+                return tuple(update_fields)
+            return tuple(
+                c.key for c in table.columns
+                if (c.key in values or c.key == "updated_at")
+                and c.key not in ("id", "created_at")
+            )
+
+        # rows updating different columns need different statements
+        batches: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+
+        def send(columns: Tuple[str, ...]) -> int:
+            """Execute and empty the batch of rows updating columns."""
+            batch = batches.pop(columns)
+            self.__session.execute(upsert_statement(
+                self.dialect, table, ["id"], update_columns=columns
+            ), batch)
+            return len(batch)
+
+        sent = 0
+        try:
+            for values in rows:
+                columns = update_columns(values)
+                batch = batches.setdefault(columns, [])
+                batch.append(row_values(table, values))
+                if len(batch) >= batch_size:
+                    sent += send(columns)
+            for columns in list(batches):
+                sent += send(columns)
+            self.__session.commit()
+            # loaded instances may now hold stale column values
+            self.__session.expire_all()
+        except Exception as e:
+            self.__session.rollback()
+            raise RuntimeError(f"Bulk upsert failed: {str(e)}") from e
+        return sent
+
     def delete(self, obj: Optional[BaseModel] = None) -> None:
         """Delete object from current database session."""
         if obj:
@@ -116,19 +469,70 @@ class DBStorage:
             self.__session.rollback()
             raise e
 
+    def iter(
+        self, cls: Optional[Any] = None, chunk_size: int = 1000
+    ) -> Iterator[BaseModel]:
+        """Stream objects chunk by chunk through a server-side cursor."""
+        if not self.__session:
+            return
+
+        try:
+            for c in [cls] if cls else CLASSES:
+                query = (
+                    self.__session.query(c)
+                    .execution_options(stream_results=True)
+                    .yield_per(chunk_size)
+                )
+                for obj in query:
+                    yield obj
+
+        except Exception as e:
+            self.__session.rollback()
+            raise e
+
+    def find(
+        self, cls: Any, limit: Optional[int] = None, **filters: Any
+    ) -> List[BaseModel]:
+        """Query objects matching equality filters with SQL WHERE/LIMIT."""
+        if not self.__session:
+            return []
+
+        try:
+            query = self.__session.query(cls).filter_by(**filters)
+            if limit:
+                query = query.limit(limit)
+            return query.all()
+
+        except Exception as e:
+            self.__session.rollback()
+            raise e
+
     def search(
         self,
         cls: ModelType,
         filters: Dict[str, Any],
         nested_filters: Optional[Dict[str, Dict[str, Any]]] = None
     ) -> List[BaseModel]:
-        """Enhanced search with nested relationship filtering."""
+        """
+        Enhanced search with nested relationship filtering.
+
+        In full-text mode (FOODIFY_SEARCH_MODE=fulltext) a MenuItem name
+        filter goes through the full-text index, which also matches the
+        restaurant name, and results are ordered by relevance.
+        """
         if not self.__session:
             return []
 
         query = self.__session.query(cls)
 
         for key, value in filters.items():
+            if FULLTEXT_SEARCH and cls is MenuItem and key == "name":
+                ranked = fulltext.ranked_matches(self.dialect, value)
+                if ranked is not None:
+                    query = query.join(
+                        ranked, ranked.c.id == MenuItem.id
+                    ).order_by(ranked.c.score.desc())
+                    continue
             if hasattr(cls, key):
                 query = query.filter(getattr(cls, key).ilike(f"%{value}%"))
 
@@ -167,30 +571,46 @@ class DBStorage:
 
     @contextmanager
     def session_scope(self) -> Generator[Session, None, None]:
-        """Provide a transactional scope around operations."""
-        session = self.refresh_session()
+        """
+        Provide a transactional scope around operations.
+
+        The outermost scope commits on success and rolls back on error.
+        A scope opened inside another runs in a SAVEPOINT, so its failure
+        only undoes its own work. The session itself lives until the
+        request (or close()) ends.
+        """
+        session = self.__session()
+        depth = session.info.get("scope_depth", 0)
+        session.info["scope_depth"] = depth + 1
         try:
-            yield session
-            session.commit()
-        except Exception as e:
-            if session:
-                session.rollback()
-            raise RuntimeError(f"Session operation failed: {str(e)}") from e
+            if depth:
+                savepoint = session.begin_nested()
+                try:
+                    yield session
+                    if savepoint.is_active:
+                        savepoint.commit()
+                except Exception:
+                    if savepoint.is_active:
+                        savepoint.rollback()
+                    raise
+            else:
+                try:
+                    yield session
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    raise RuntimeError(
+                        f"Session operation failed: {str(e)}"
+                    ) from e
         finally:
-            if session:
-                session.remove()
+            session.info["scope_depth"] = depth
 
-    def refresh_session(self):
-        """Create a fresh session."""
-        try:
-            if self.__session:
-                self.__session.close()
-            session_factory = sessionmaker(
-                bind=self.__engine, expire_on_commit=False, autoflush=True
-            )
-            Session = scoped_session(session_factory)
-            self.__session = Session
-            return self.__session
-        except Exception as e:
-            print(f"Error refreshing session: {e}")
-            raise
+    def refresh_session(self) -> scoped_session:
+        """Discard the current scope's session; the next use opens one."""
+        if self.__session:
+            self.__session.remove()
+        return self.__session
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_storages_after_fork)
@@ -0,0 +1,175 @@
+#!/usr/bin/python3
+"""
+Full-text index over menu item and restaurant names.
+
+MySQL gets FULLTEXT indexes on menu_items.name and restaurants.name and
+is queried with MATCH ... AGAINST in boolean mode. SQLite gets an FTS5
+table, menu_items_fts, holding each item's name and its restaurant's
+name, kept in sync by triggers and ranked with bm25.
+
+Either way, ranked_matches() returns a subquery of (id, score) rows,
+higher scores first being more relevant, that callers join to
+menu_items. The index is created with new tables (see on_create) and
+for existing databases by migration 4.
+"""
+import re
+from typing import Any, List, Optional
+from sqlalchemy import func, literal_column, select, table, text, union_all
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+FTS_TABLE = "menu_items_fts"
+# restaurant-name hits count for less than hits in the item's own name
+RESTAURANT_WEIGHT = 0.5
+
+_SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "item_id UNINDEXED, name, restaurant_name, "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+    f"""CREATE TRIGGER IF NOT EXISTS menu_items_fts_insert
+    AFTER INSERT ON menu_items BEGIN
+        INSERT INTO {FTS_TABLE} (item_id, name, restaurant_name)
+        SELECT new.id, new.name,
+               (SELECT name FROM restaurants WHERE id = new.restaurant_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS menu_items_fts_update
+    AFTER UPDATE OF id, name, restaurant_id ON menu_items BEGIN
+        UPDATE {FTS_TABLE}
+        SET item_id = new.id, name = new.name,
+            restaurant_name = (SELECT name FROM restaurants
+                               WHERE id = new.restaurant_id)
+        WHERE item_id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS menu_items_fts_delete
+    AFTER DELETE ON menu_items BEGIN
+        DELETE FROM {FTS_TABLE} WHERE item_id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS restaurants_fts_update
+    AFTER UPDATE OF name ON restaurants BEGIN
+        UPDATE {FTS_TABLE} SET restaurant_name = new.name
+        WHERE item_id IN (SELECT id FROM menu_items
+                          WHERE restaurant_id = new.id);
+    END""",
+]
+_SQLITE_BACKFILL = f"""
+    INSERT INTO {FTS_TABLE} (item_id, name, restaurant_name)
+    SELECT m.id, m.name, r.name
+    FROM menu_items m LEFT JOIN restaurants r ON r.id = m.restaurant_id
+"""
+_MYSQL_INDEXES = {
+    "menu_items": "ft_menu_items_name",
+    "restaurants": "ft_restaurants_name",
+}
+
+
+def terms(query: str) -> List[str]:
+    """Split user input into words, dropping full-text operators."""
+    return re.findall(r"\w+", query.lower())
+
+
+def install(conn: Connection) -> bool:
+    """
+    Create the full-text index for conn's dialect if it is missing.
+
+    Returns:
+        False if the database cannot provide one, True otherwise
+    """
+    if conn.dialect.name == "mysql":
+        from sqlalchemy import inspect
+
+        for table_name, index in _MYSQL_INDEXES.items():
+            existing = inspect(conn).get_indexes(table_name)
+            if not any(ix["name"] == index for ix in existing):
+                conn.exec_driver_sql(
+                    f"ALTER TABLE `{table_name}` "
+                    f"ADD FULLTEXT INDEX `{index}` (`name`)"
+                )
+        return True
+    if conn.dialect.name == "sqlite":
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLE,)
+        ).first()
+        try:
+            for statement in _SQLITE_DDL:
+                conn.exec_driver_sql(statement)
+        except OperationalError as e:
+            if "fts5" not in str(e):
+                raise
+            print(f"Full-text search unavailable: {e}")
+            return False
+        if not exists:
+            conn.exec_driver_sql(_SQLITE_BACKFILL)
+        return True
+    return False
+
+
+def on_create(target: Any, conn: Connection, tables: Any = (),
+              **kw: Any) -> None:
+    """MetaData after_create hook: index a newly created menu_items."""
+    if any(t.name == "menu_items" for t in tables):
+        install(conn)
+
+
+def on_drop(target: Any, conn: Connection, tables: Any = (),
+            **kw: Any) -> None:
+    """MetaData after_drop hook: drop the FTS5 table with menu_items."""
+    if conn.dialect.name == "sqlite" and \
+            any(t.name == "menu_items" for t in tables):
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def ranked_matches(dialect: str, query: str) -> Optional[Any]:
+    """
+    Return a subquery of (id, score) for menu items matching query.
+
+    Every word is matched as a prefix. On SQLite an item must match
+    all words, in its own or its restaurant's name. On MySQL the two
+    names are separate indexes, so items matching any word are
+    returned and those matching more words score higher.
+
+    Args:
+        dialect: Database dialect name
+        query: Raw user input
+
+    Returns:
+        The subquery, or None when query has no words
+    """
+    words = terms(query)
+    if not words:
+        return None
+
+    if dialect == "mysql":
+        from models.menu_item import MenuItem
+        from models.restaurant import Restaurant
+
+        against = " ".join(f"{word}*" for word in words)
+        name_match = MenuItem.name.match(against)
+        restaurant_match = Restaurant.name.match(against)
+        hits = union_all(
+            select(MenuItem.id.label("id"), name_match.label("score"))
+            .where(name_match),
+            select(MenuItem.id.label("id"),
+                   (restaurant_match * RESTAURANT_WEIGHT).label("score"))
+            .join_from(MenuItem, Restaurant,
+                       MenuItem.restaurant_id == Restaurant.id)
+            .where(restaurant_match),
+        ).subquery("hits")
+        return (
+            select(hits.c.id, func.sum(hits.c.score).label("score"))
+            .group_by(hits.c.id)
+            .subquery("ranked")
+        )
+
+    fts = table(FTS_TABLE)
+    match = " ".join(f'"{word}"*' for word in words)
+    # bm25 is lower for better matches; weights follow column order
+    rank = func.bm25(literal_column(FTS_TABLE), 0.0, 1.0,
+                     RESTAURANT_WEIGHT)
+    return (
+        select(literal_column("item_id").label("id"),
+               (-rank).label("score"))
+        .select_from(fts)
+        .where(text(f"{FTS_TABLE} MATCH :fts_query")
+               .bindparams(fts_query=match))
+        .subquery("ranked")
+    )
@@ -0,0 +1,183 @@
+#!/usr/bin/python3
+"""
+SQL instrumentation for DBStorage engines.
+
+Engine event hooks record query count, total database time and statement
+fingerprints into every active collector on the current thread. A Flask
+request opens one collector; in debug mode its totals are reported through
+the Server-Timing header and repeated statements are logged as likely
+N+1 patterns. Tests open their own collector with query_budget.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from os import getenv
+from typing import Any, Dict, Generator, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+N_PLUS_ONE_THRESHOLD = int(getenv("FOODIFY_N_PLUS_ONE_THRESHOLD", "3"))
+
+_local = threading.local()
+_IN_LIST = re.compile(r"\(\s*(\?|%s|:\w+)(\s*,\s*(\?|%s|:\w+))+\s*\)")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normalize a SQL statement so repeated shapes compare equal.
+
+    Literals become placeholders, IN lists collapse to a single
+    placeholder and whitespace is squashed.
+    """
+    statement = _STRING.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _IN_LIST.sub("(?)", statement)
+    return _SPACE.sub(" ", statement).strip()
+
+
+class QueryStats:
+    """
+    Queries recorded while a collector was active.
+
+    Attributes:
+        count: Number of statements executed
+        duration: Total database time in seconds
+        fingerprints: Execution count per statement fingerprint
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty collector."""
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        """Record one executed statement."""
+        self.count += 1
+        self.duration += elapsed
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def duplicates(
+        self, threshold: int = N_PLUS_ONE_THRESHOLD
+    ) -> Dict[str, int]:
+        """Return fingerprints executed at least threshold times."""
+        return {
+            sql: n for sql, n in self.fingerprints.items() if n >= threshold
+        }
+
+    def server_timing(self) -> str:
+        """Format the totals as a Server-Timing header value."""
+        return 'db;dur={:.2f};desc="{} queries"'.format(
+            self.duration * 1000, self.count
+        )
+
+
+def _active() -> List[QueryStats]:
+    """Return the collectors open on the current thread."""
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+@contextmanager
+def collect() -> Generator[QueryStats, None, None]:
+    """Record every query executed on this thread inside the block."""
+    stats = QueryStats()
+    stack = _active()
+    stack.append(stats)
+    try:
+        yield stats
+    finally:
+        stack.remove(stats)
+
+
+@contextmanager
+def query_budget(
+    max_queries: int, max_duplicates: Optional[int] = None
+) -> Generator[QueryStats, None, None]:
+    """
+    Fail when the block issues more queries than declared.
+
+    Args:
+        max_queries: Maximum number of statements allowed
+        max_duplicates: Maximum executions allowed per fingerprint
+
+    Raises:
+        AssertionError: If the budget is exceeded
+    """
+    with collect() as stats:
+        yield stats
+
+    if stats.count > max_queries:
+        raise AssertionError(
+            f"Query budget exceeded: {stats.count} > {max_queries}\n"
+            + "\n".join(
+                f"{n}x {sql}" for sql, n in stats.fingerprints.most_common()
+            )
+        )
+    if max_duplicates is not None:
+        repeated = stats.duplicates(threshold=max_duplicates + 1)
+        if repeated:
+            raise AssertionError(
+                "Repeated statements (possible N+1):\n"
+                + "\n".join(f"{n}x {sql}" for sql, n in repeated.items())
+            )
+
+
+def install(engine: Engine) -> None:
+    """Attach the timing hooks to engine."""
+
+    # a connection runs one statement at a time, so one start time per
+    # connection suffices; a failed statement never reaches
+    # after_cursor_execute and its start is overwritten by the next one
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters,
+                              context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters,
+                             context, executemany):
+        start = conn.info.pop("query_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        for stats in _active():
+            stats.record(statement, elapsed)
+
+
+def init_app(app: Any) -> None:
+    """
+    Open a collector for every request of a Flask app.
+
+    In debug mode the response carries a Server-Timing header and
+    statements repeated N_PLUS_ONE_THRESHOLD times are logged.
+    """
+    from flask import g, request
+
+    @app.before_request
+    def start_query_stats() -> None:
+        g.query_stats_scope = collect()
+        g.query_stats = g.query_stats_scope.__enter__()
+
+    @app.after_request
+    def report_query_stats(response: Any) -> Any:
+        stats = g.get("query_stats")
+        if stats is not None and app.debug:
+            response.headers.add("Server-Timing", stats.server_timing())
+            for sql, n in stats.duplicates().items():
+                app.logger.warning(
+                    "Possible N+1 on %s: %dx %s", request.path, n, sql
+                )
+        return response
+
+    @app.teardown_request
+    def stop_query_stats(error: Optional[BaseException] = None) -> None:
+        scope = g.pop("query_stats_scope", None)
+        if scope is not None:
+            scope.__exit__(None, None, None)
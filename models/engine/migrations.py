@@ -0,0 +1,260 @@
+#!/usr/bin/python3
+"""
+Forward-only schema migrations for Foodify databases.
+
+Base.metadata.create_all only creates missing tables, so changes to
+existing tables (indexes, constraints, columns) are shipped as numbered
+migrations. Applied versions are recorded in the schema_migrations table
+and every step checks the live schema first, so running a migration on a
+database created from the current models is a no-op.
+"""
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Generator, List, NamedTuple, Optional, Sequence
+from sqlalchemy import (
+    Column, DateTime, Index, Integer, MetaData, String, Table, event,
+    func, inspect, select
+)
+from sqlalchemy.engine import Connection, Engine
+from models.engine import fulltext
+
+metadata = MetaData()
+_local = threading.local()
+schema_migrations = Table(
+    "schema_migrations",
+    metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    """A numbered schema change."""
+
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str) -> Callable:
+    """Register the decorated function as migration number version."""
+    def register(apply: Callable[[Connection], None]) -> Callable:
+        MIGRATIONS.append(Migration(version, description, apply))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return apply
+    return register
+
+
+def create_index(
+    conn: Connection, table: str, name: str, columns: Sequence[str],
+    unique: bool = False, descending: Sequence[str] = ()
+) -> None:
+    """Create an index unless the table already has one called name."""
+    if any(ix["name"] == name for ix in inspect(conn).get_indexes(table)):
+        return
+    index_table = Table(table, MetaData(), autoload_with=conn)
+    Index(name, *(index_table.c[c].desc() if c in descending
+                  else index_table.c[c] for c in columns),
+          unique=unique).create(conn)
+
+
+def drop_index(conn: Connection, table: str, name: str) -> None:
+    """Drop an index if the table has one called name."""
+    if not any(ix["name"] == name for ix in inspect(conn).get_indexes(table)):
+        return
+    if conn.dialect.name == "mysql":
+        conn.exec_driver_sql(f"DROP INDEX `{name}` ON `{table}`")
+    else:
+        conn.exec_driver_sql(f'DROP INDEX "{name}"')
+
+
+def add_column(conn: Connection, table: str, name: str,
+               definition: str) -> None:
+    """Add a column unless the table already has one called name."""
+    if any(c["name"] == name for c in inspect(conn).get_columns(table)):
+        return
+    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+@migration(1, "Composite orders(client_id, status) and clients(username)")
+def add_lookup_indexes(conn: Connection) -> None:
+    """Index the active-order lookup and the username check."""
+    create_index(conn, "orders", "idx_orders_client_status",
+                 ["client_id", "status"])
+    # the composite index leads with client_id, so it also serves the
+    # foreign key and the single-column index is redundant
+    drop_index(conn, "orders", "idx_orders_client")
+    create_index(conn, "clients", "idx_clients_username", ["username"])
+
+
+@migration(2, "Unique order_items(order_id, menu_item_id)")
+def unique_order_items(conn: Connection) -> None:
+    """Merge duplicate cart rows, then enforce one row per menu item."""
+    order_items = Table("order_items", MetaData(), autoload_with=conn)
+    duplicates = conn.execute(
+        select(order_items.c.order_id, order_items.c.menu_item_id)
+        .group_by(order_items.c.order_id, order_items.c.menu_item_id)
+        .having(func.count() > 1)
+    ).all()
+    for order_id, menu_item_id in duplicates:
+        rows = conn.execute(
+            select(order_items.c.id, order_items.c.quantity)
+            .where(order_items.c.order_id == order_id,
+                   order_items.c.menu_item_id == menu_item_id)
+            .order_by(order_items.c.created_at)
+        ).all()
+        conn.execute(
+            order_items.update()
+            .where(order_items.c.id == rows[0].id)
+            .values(quantity=sum(row.quantity for row in rows))
+        )
+        conn.execute(order_items.delete().where(
+            order_items.c.id.in_([row.id for row in rows[1:]])
+        ))
+    create_index(conn, "order_items", "uq_order_items_order_menu_item",
+                 ["order_id", "menu_item_id"], unique=True)
+
+
+@migration(3, "Keyset pagination index menu_items(name, id)")
+def add_search_order_index(conn: Connection) -> None:
+    """Index the search sort key so cursor pages are range scans."""
+    create_index(conn, "menu_items", "idx_menu_items_name_id",
+                 ["name", "id"])
+
+
+@migration(4, "Full-text index on menu item and restaurant names")
+def add_fulltext_index(conn: Connection) -> None:
+    """Create the FULLTEXT indexes (MySQL) or FTS5 table (SQLite)."""
+    fulltext.install(conn)
+
+
+@migration(5, "Popularity counter menu_items.popularity")
+def add_menu_item_popularity(conn: Connection) -> None:
+    """Add the ordered-units counter that ranks search suggestions."""
+    add_column(conn, "menu_items", "popularity",
+               "INTEGER NOT NULL DEFAULT 0")
+
+
+@migration(6, "Search sort indexes on menu_items price and popularity")
+def add_search_sort_indexes(conn: Connection) -> None:
+    """Index the price and popularity orders used by search."""
+    create_index(conn, "menu_items", "idx_menu_items_price_id",
+                 ["price", "id"])
+    create_index(conn, "menu_items", "idx_menu_items_available_price_id",
+                 ["is_available", "price", "id"])
+    create_index(conn, "menu_items", "idx_menu_items_popularity_id",
+                 ["popularity", "id"], descending=["popularity"])
+
+
+@migration(7, "Cross-process cache invalidation table cache_versions")
+def add_cache_versions(conn: Connection) -> None:
+    """Create the version table polled by services.invalidation."""
+    from models.cache_version import cache_versions
+
+    cache_versions.create(conn, checkfirst=True)
+
+
+@migration(8, "Cart snapshot version clients.cart_version")
+def add_client_cart_version(conn: Connection) -> None:
+    """Add the counter that orders cached cart snapshots."""
+    add_column(conn, "clients", "cart_version",
+               "INTEGER NOT NULL DEFAULT 0")
+
+
+def latest_version() -> int:
+    """Return the highest registered migration version."""
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def require_latest(engine: Engine) -> None:
+    """
+    Check the stored schema version when engine first connects.
+
+    Used instead of create_all in fast-start mode: nothing is reflected
+    or created at import time, and the first query fails with a clear
+    message if the database has not been migrated to this code's version.
+    """
+    @event.listens_for(engine, "first_connect")
+    def check_schema_version(dbapi_connection, connection_record):
+        if getattr(_local, "migrating", False):
+            return  # the runner brings the schema up to date itself
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT MAX(version) FROM schema_migrations")
+            stored = cursor.fetchone()[0] or 0
+        except Exception:
+            stored = 0
+        finally:
+            cursor.close()
+        if stored < latest_version():
+            raise RuntimeError(
+                f"Database schema is at version {stored}, expected "
+                f"{latest_version()}; run 'migrate' from console.py"
+            )
+
+
+@contextmanager
+def _migrating() -> Generator[None, None, None]:
+    """Skip the fast-start version check for connections made inside."""
+    previous = getattr(_local, "migrating", False)
+    _local.migrating = True
+    try:
+        yield
+    finally:
+        _local.migrating = previous
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    """Return the migration versions recorded in the database."""
+    with _migrating():
+        metadata.create_all(engine)
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(schema_migrations.c.version)
+                .order_by(schema_migrations.c.version)
+            )
+            return [row.version for row in rows]
+
+
+def pending(engine: Engine) -> List[Migration]:
+    """Return the registered migrations not yet applied, in order."""
+    done = set(applied_versions(engine))
+    return [m for m in MIGRATIONS if m.version not in done]
+
+
+def migrate(
+    engine: Engine, models_metadata: Optional[MetaData] = None
+) -> List[Migration]:
+    """
+    Apply pending migrations in version order.
+
+    Each migration runs and is recorded in its own transaction. MySQL
+    commits DDL implicitly, which is why every step is written to be
+    safe to re-run.
+
+    Args:
+        engine: Engine of the database to migrate
+        models_metadata: Tables to create first if they are missing
+
+    Returns:
+        The migrations that were applied
+    """
+    applied = []
+    with _migrating():
+        if models_metadata is not None:
+            models_metadata.create_all(engine)
+        for step in pending(engine):
+            with engine.begin() as conn:
+                step.apply(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=step.version,
+                    description=step.description,
+                    applied_at=datetime.utcnow(),
+                ))
+            applied.append(step)
+    return applied
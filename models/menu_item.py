@@ -1,5 +1,7 @@
 from typing import Any, Optional
-from sqlalchemy import Column, String, Boolean, ForeignKey, DECIMAL
+from sqlalchemy import (
+    Column, String, Boolean, ForeignKey, DECIMAL, Index, Integer, text
+)
 from sqlalchemy.orm import relationship
 from models.base_model import BaseModel, Base
 
@@ -14,9 +16,20 @@ class MenuItem(BaseModel, Base):
         price: Price of the item
         is_available: Whether the item is currently available
         image_url: Optional URL to item's image
+        popularity: Units ordered through confirmed orders
     """
 
     __tablename__ = "menu_items"
+    __table_args__ = (
+        # search results are ordered and paginated by (name, id),
+        # (price, id) or (popularity desc, id); the availability filter
+        # leads the price order, the one shoppers narrow most
+        Index("idx_menu_items_name_id", "name", "id"),
+        Index("idx_menu_items_price_id", "price", "id"),
+        Index("idx_menu_items_available_price_id",
+              "is_available", "price", "id"),
+        Index("idx_menu_items_popularity_id", text("popularity DESC"), "id"),
+    )
 
     restaurant_id: str = Column(
         String(60),
@@ -30,6 +43,9 @@ class MenuItem(BaseModel, Base):
     is_available: bool = Column(Boolean, default=True)
     """ Path to image file """
     image_url: Optional[str] = Column(String(255), nullable=True)
+    popularity: int = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
 
     restaurant = relationship("Restaurant", back_populates="menu_items")
     order_items = relationship(
@@ -1,6 +1,8 @@
 from typing import Any
 from datetime import datetime
-from sqlalchemy import Column, DECIMAL, String, DateTime, ForeignKey
+from sqlalchemy import (
+    Column, DECIMAL, String, DateTime, ForeignKey, Index
+)
 from sqlalchemy.orm import relationship
 from models.base_model import BaseModel, Base
 
@@ -17,6 +19,10 @@ class Order(BaseModel, Base):
     """
 
     __tablename__ = "orders"
+    __table_args__ = (
+        # serves the active-cart lookup (client_id = ? AND status = ?)
+        Index("idx_orders_client_status", "client_id", "status"),
+    )
 
     client_id: str = Column(String(60), ForeignKey("clients.id",
                                                    ondelete="CASCADE"),
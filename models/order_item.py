@@ -1,5 +1,5 @@
 from typing import Any
-from sqlalchemy import Column, Integer, ForeignKey, String
+from sqlalchemy import Column, Integer, ForeignKey, Index, String
 from sqlalchemy.orm import relationship
 from models.base_model import BaseModel, Base
 
@@ -15,6 +15,11 @@ class OrderItem(BaseModel, Base):
     """
 
     __tablename__ = "order_items"
+    __table_args__ = (
+        # one row per menu item in an order; cart updates upsert on it
+        Index("uq_order_items_order_menu_item", "order_id", "menu_item_id",
+              unique=True),
+    )
 
     order_id: str = Column(
         String(60),
@@ -6,18 +6,23 @@ from flask import Blueprint, render_template, jsonify, request
 from flask_login import current_user, login_required
 from models import storage
 from models.review import Review
-from models.restaurant import Restaurant
-from typing import Dict, Any
+from services import catalog_cache
+from typing import Dict, Any, List
 
 contact_routes = Blueprint("contact_routes", __name__)
 
 
+def restaurant_choices() -> List[Dict[str, str]]:
+    """Return id and name of every restaurant from the catalog cache."""
+    return [{"id": r.id, "name": r.name}
+            for r in catalog_cache.restaurants()]
+
+
 @contact_routes.route("/contact")
 def contact() -> str:
     """Render contact page with restaurants list."""
-    restaurants = storage.all(Restaurant).values()
     return render_template(
-        "contact.html", title="Contact Us", restaurants=restaurants
+        "contact.html", title="Contact Us", restaurants=restaurant_choices()
     )
 
 
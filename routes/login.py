@@ -18,6 +18,7 @@ from wtforms import StringField, PasswordField, SubmitField, BooleanField
 from wtforms.validators import DataRequired, Email
 from flask_login import login_user, current_user, logout_user, login_required
 from models import storage
+from services import cart, catalog_cache
 from typing import Union, Dict, Any
 
 login_routes = Blueprint("login_routes", __name__)
@@ -88,67 +89,33 @@ def logout() -> "Response":
 @login_required
 def add_menu_item() -> Union[Dict[str, Any], "Response"]:
     """Add or update item in cart."""
-    from models.menu_item import MenuItem
-    from models.order import Order
-    from models.order_item import OrderItem
-
     try:
         data = request.get_json()
         menu_item_id = data.get("menu_item_id")
         quantity_change = data.get("quantity_change", 1)
 
-        menu_item = storage.get(MenuItem, menu_item_id)
+        menu_item = catalog_cache.menu_item(menu_item_id)
         if not menu_item or not menu_item.is_available:
             return jsonify({"error": "Item not available"}), 400
 
-        active_order = None
-        orders = storage.all(Order).values()
-        for order in orders:
-            if (
-                order.client_id == current_user.id
-                and order.status == "active"
-            ):
-                active_order = order
-                break
-
-        if not active_order:
-            active_order = Order(client_id=current_user.id, status="active")
-            storage.new(active_order)
-            storage.save()
-
-        order_item = None
-        if hasattr(active_order, "order_items"):
-            for item in active_order.order_items:
-                if item.menu_item_id == menu_item_id:
-                    order_item = item
-                    break
-
-        if order_item:
-            order_item.quantity += quantity_change
-            if order_item.quantity <= 0:
-                storage.delete(order_item)
-        else:
-            order_item = OrderItem(
-                order_id=active_order.id,
-                menu_item_id=menu_item_id,
-                quantity=quantity_change,
-            )
-            storage.new(order_item)
-
-        storage.save()
+        snapshot = cart.apply_batch(
+            current_user.id, [(menu_item_id, quantity_change)]
+        )
 
         return jsonify(
             {
                 "status": "success",
-                "order_id": active_order.id,
+                "order_id": snapshot.order_id,
                 "item": {
                     "id": menu_item.id,
                     "name": menu_item.name,
-                    "price": float(menu_item.price),
-                    "quantity": order_item.quantity if order_item else 0,
+                    "price": menu_item.price,
+                    "quantity": snapshot.items.get(menu_item_id, 0),
                 },
             }
         )
 
+    except cart.CartError as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
         return jsonify({"error": str(e)}), 500
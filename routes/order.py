@@ -8,9 +8,10 @@ from flask import (
 )
 from flask_login import current_user, login_required
 from models import storage
+from models.menu_item import MenuItem
 from models.order import Order
 from models.order_item import OrderItem
-from models.menu_item import MenuItem
+from services import cart, suggest
 from sqlalchemy.orm import joinedload
 from datetime import datetime
 from typing import Dict, Any
@@ -21,144 +22,94 @@ order_routes = Blueprint("order_routes", __name__)
 @order_routes.route("/api/v1/cart/update", methods=["POST"])
 @login_required
 def update_cart() -> Dict[str, Any]:
-    """Update cart items with proper error handling"""
+    """Add or remove one unit of a menu item in the active order"""
     try:
-        with storage.session_scope() as session:
-            data = request.get_json()
-            menu_item_id = data.get("menu_item_id")
-            action = data.get("action")
-
-            # Query with proper relationship loading
-            menu_item = session.query(MenuItem).get(menu_item_id)
-            if not menu_item:
-                return jsonify({"error": "Item not found"}), 404
-
-            # Use proper relationship attributes
-            active_order = (
-                session.query(Order)
-                .filter_by(client_id=current_user.id, status="active")
-                .options(
-                    joinedload(Order.order_items).joinedload(
-                        OrderItem.menu_item
-                    )
-                )
-                .first()
-            )
-
-            if not active_order:
-                if action == "decrease":
-                    return jsonify({"error": "No active order found"}), 400
-                active_order = Order(
-                    client_id=current_user.id, status="active", total_price=0
-                )
-                session.add(active_order)
-                session.commit()
-
-            # Find order item using relationship
-            order_item = None
-            for item in active_order.order_items:
-                if item.menu_item_id == menu_item_id:
-                    order_item = item
-                    break
-
-            if action == "decrease":
-                if not order_item:
-                    return jsonify({"error": "Item not in cart"}), 400
-
-                new_total = float(active_order.total_price) - float(
-                    menu_item.price
-                )
-
-                if order_item.quantity <= 1:
-                    session.delete(order_item)
-                    active_order.total_price = new_total
-
-                    if not active_order.order_items:
-                        active_order.status = "cancelled"
-                        session.delete(active_order)
-                        session.commit()
-                        return jsonify(
-                            {
-                                "success": True,
-                                "order": None,
-                                "item": {"id": menu_item_id, "quantity": 0},
-                            }
-                        )
-                else:
-                    order_item.quantity -= 1
-                    active_order.total_price = new_total
-
-            elif action == "increase":
-                if order_item:
-                    order_item.quantity += 1
-                else:
-                    order_item = OrderItem(
-                        order_id=active_order.id,
-                        menu_item_id=menu_item_id,
-                        quantity=1,
-                    )
-                    session.add(order_item)
-                active_order.total_price = float(
-                    active_order.total_price or 0
-                ) + float(menu_item.price)
-
-            session.commit()
+        data = request.get_json()
+        result = cart.update_item(
+            current_user.id, data.get("menu_item_id"), data.get("action")
+        )
+    except cart.CartError as e:
+        return jsonify({"error": str(e)}), e.status
+    except Exception as e:
+        print(f"Cart update error: {e}")
+        return jsonify({"error": str(e)}), 500
 
-            return jsonify(
-                {
-                    "success": True,
-                    "order": {
-                        "id": active_order.id,
-                        "total_price": float(active_order.total_price),
-                        "status": active_order.status,
-                    },
-                    "item": {
-                        "id": menu_item_id,
-                        "quantity": order_item.quantity if order_item else 0,
-                    },
-                }
-            )
+    order = None
+    if result.order_id:
+        order = {
+            "id": result.order_id,
+            "total_price": result.total_price,
+            "status": result.status,
+        }
+    return jsonify(
+        {
+            "success": True,
+            "order": order,
+            "item": {
+                "id": data.get("menu_item_id"),
+                "quantity": result.quantity,
+            },
+        }
+    )
+
+
+@order_routes.route("/api/v1/cart/batch", methods=["POST"])
+@login_required
+def batch_update_cart() -> Dict[str, Any]:
+    """Apply a list of quantity changes in one transaction"""
+    data = request.get_json(silent=True) or {}
+    operations = data.get("operations")
+    if not isinstance(operations, list):
+        return jsonify({"error": "operations must be a list"}), 400
+    try:
+        # types and bounds are checked by cart.apply_batch
+        pairs = [(op["menu_item_id"], op["delta"]) for op in operations]
+    except (KeyError, TypeError):
+        return jsonify(
+            {"error": "each operation needs menu_item_id and delta"}
+        ), 400
 
+    try:
+        snapshot = cart.apply_batch(current_user.id, pairs)
+    except cart.CartError as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
-        print(f"Cart update error: {e}")
+        print(f"Cart batch error: {e}")
         return jsonify({"error": str(e)}), 500
 
+    return jsonify(
+        {
+            "success": True,
+            "items": [
+                {"menu_item_id": menu_item_id, "quantity": quantity}
+                for menu_item_id, quantity in snapshot.items.items()
+            ],
+            "order": {
+                "id": snapshot.order_id,
+                "total_price": snapshot.total_price,
+                "status": snapshot.status,
+            },
+        }
+    )
+
 
 @order_routes.route("/api/v1/cart/state", methods=["GET"])
 @login_required
 def get_cart_state():
-    """Get current cart state"""
+    """Get current cart state from the cart snapshot cache"""
     try:
-        # Get active order
-        active_order = None
-        menu_items = {}
-
-        orders = storage.all(Order).values()
-        for order in orders:
-            if (
-                order.client_id == current_user.id
-                and order.status == "active"
-            ):
-                active_order = order
-                # Map quantities to menu items
-                for item in order.order_items:
-                    menu_items[item.menu_item_id] = item.quantity
-                break
-
+        snapshot = cart.get_snapshot(current_user.id)
         return jsonify(
             {
                 "items": [
                     {"menu_item_id": menu_item_id, "quantity": quantity}
-                    for menu_item_id, quantity in menu_items.items()
+                    for menu_item_id, quantity in snapshot.items.items()
                 ],
                 "order": {
-                    "id": active_order.id if active_order else None,
-                    "total_price": (
-                        float(active_order.total_price)
-                        if active_order
-                        else 0
-                    ),
+                    "id": snapshot.order_id,
+                    "total_price": snapshot.total_price,
                 },
+                "version": snapshot.version,
             }
         )
 
@@ -178,7 +129,8 @@ def confirm_order():
             active_order = (
                 db_session.query(Order)
                 .filter_by(client_id=current_user.id, status="active")
-                .options(joinedload(Order.order_items))
+                .options(joinedload(Order.order_items)
+                         .joinedload(OrderItem.menu_item))
                 .first()
             )
 
@@ -198,8 +150,15 @@ def confirm_order():
                 )
                 db_session.add(completed_order)
 
-                # Delete order items
+                # Count ordered units towards popularity, then delete
+                # order items
+                quantities = {}
                 for item in active_order.order_items:
+                    quantities[item.menu_item_id] = item.quantity
+                    if item.menu_item is not None:
+                        item.menu_item.popularity = (
+                            MenuItem.popularity + item.quantity
+                        )
                     db_session.delete(item)
 
                 # Delete active order
@@ -208,23 +167,29 @@ def confirm_order():
                 # Commit changes
                 db_session.commit()
 
-                # Use Flask's session for storing success message
-                session["order_success"] = True
-                session["order_total"] = order_total
-
-                return jsonify(
-                    {
-                        "success": True,
-                        "message": "Order confirmed successfully",
-                        "redirect": url_for("welcome_routes.welcome"),
-                    }
-                )
-
             except Exception as e:
                 db_session.rollback()
                 print(f"Order confirmation error: {e}")
                 return jsonify({"error": "Failed to process order"}), 500
 
+        # reload the cart once the scope is closed: inside it the reload
+        # would run in a savepoint and cache a version that could still
+        # roll back
+        cart.refresh(current_user.id)
+        suggest.index.record_orders(quantities)
+
+        # Use Flask's session for storing success message
+        session["order_success"] = True
+        session["order_total"] = order_total
+
+        return jsonify(
+            {
+                "success": True,
+                "message": "Order confirmed successfully",
+                "redirect": url_for("welcome_routes.welcome"),
+            }
+        )
+
     except Exception as e:
         print(f"Order confirmation error: {e}")
         return jsonify({"error": str(e)}), 500
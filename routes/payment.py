@@ -1,57 +1,39 @@
-from flask import Blueprint, render_template, jsonify, request
+import threading
+from os import getenv
+from flask import (
+    Blueprint, render_template, jsonify, request, make_response
+)
 from flask_login import current_user, login_required
 from models import storage
-from sqlalchemy.orm import joinedload
-from models.order import Order
-from models.order_item import OrderItem
-from models.menu_item import MenuItem
+from services import cart, checkout
 
 payment_routes = Blueprint("payment_routes", __name__)
 
+# keep below the server's worker timeout (30 s in gunicorn.conf.py)
+LONG_POLL_TIMEOUT = float(getenv("FOODIFY_LONG_POLL_TIMEOUT", "25"))
+# each long poll holds one of the worker's FOODIFY_THREADS threads; by
+# default at most half of them wait, the rest serve other requests
+MAX_LONG_POLLS = int(getenv(
+    "FOODIFY_MAX_LONG_POLLS",
+    str(max(1, int(getenv("FOODIFY_THREADS", "4")) // 2)),
+))
+# seconds a client answered without waiting should pause before polling
+SHORT_POLL_INTERVAL = int(getenv("FOODIFY_SHORT_POLL_INTERVAL", "5"))
+
+_long_polls = threading.BoundedSemaphore(MAX_LONG_POLLS)
+
 
 @payment_routes.route("/payment")
 @login_required
 def payment():
     """Display payment page with order details"""
     try:
-        # Get active order and its items
-        active_order = None
-        orders = storage.all(Order).values()
-        for order in orders:
-            if (
-                order.client_id == current_user.id
-                and order.status == "active"
-            ):
-                active_order = order
-                break
-
-        if not active_order:
-            return render_template(
-                "payment.html", subtotal="0.00", total="5.00", items=[]
-            )
-
-        # Get menu items details
-        order_items = []
-        for item in active_order.order_items:
-            menu_item = storage.get(MenuItem, item.menu_item_id)
-            if menu_item:
-                order_items.append(
-                    {
-                        "name": menu_item.name,
-                        "quantity": item.quantity,
-                        "price": float(menu_item.price),
-                    }
-                )
-
-        subtotal = float(active_order.total_price)
-        delivery_fee = 5.00
-        total = subtotal + delivery_fee
-
+        summary = checkout.get_checkout(current_user.id)
         return render_template(
             "payment.html",
-            subtotal="{:.2f}".format(subtotal),
-            total="{:.2f}".format(total),
-            items=order_items,
+            subtotal="{:.2f}".format(summary.subtotal),
+            total="{:.2f}".format(summary.total),
+            items=list(summary.items),
         )
 
     except Exception as e:
@@ -62,35 +44,59 @@ def payment():
 @payment_routes.route("/api/v1/payment/totals")
 @login_required
 def get_totals():
-    """Get order totals for AJAX updates"""
+    """
+    Get order totals, long-polling on the cart version.
+
+    Without a version the current totals are returned at once. With
+    the version the client already has, the request returns 304 when
+    the cart is unchanged, after waiting up to `wait` seconds (capped by
+    LONG_POLL_TIMEOUT) for it to change. Waiting only reads the cart
+    cache; the totals come from the same checkout query as the page.
+
+    The request answers at once, with a Retry-After of
+    SHORT_POLL_INTERVAL on 304, when MAX_LONG_POLLS requests of this
+    worker are already waiting, or when carts are not cached
+    (cart.CACHE_CARTS), since a waiter would then not see writes made
+    in other workers before its timeout.
+    """
     try:
-        with storage.session_scope() as session:
-            # Update query to use proper model relationships
-            active_order = (
-                session.query(Order)
-                .filter_by(client_id=current_user.id, status="active")
-                .options(
-                    joinedload(Order.order_items).joinedload(
-                        OrderItem.menu_item
-                    )
-                )
-                .first()
-            )
+        version = request.args.get("version", type=int)
+        wait = min(request.args.get("wait", 0, type=float),
+                   LONG_POLL_TIMEOUT)
 
-            subtotal = (
-                float(active_order.total_price) if active_order else 0.00
-            )
-            delivery_fee = 5.00
-            total = subtotal + delivery_fee
-
-            return jsonify(
-                {
-                    "success": True,
-                    "subtotal": "{:.2f}".format(subtotal),
-                    "delivery_fee": "{:.2f}".format(delivery_fee),
-                    "total": "{:.2f}".format(total),
-                }
-            )
+        if version is None:
+            snapshot = cart.get_snapshot(current_user.id)
+        else:
+            waiting = cart.CACHE_CARTS and wait > 0 \
+                and _long_polls.acquire(blocking=False)
+            try:
+                snapshot = cart.wait_for_change(
+                    current_user.id, version, wait if waiting else 0
+                )
+            finally:
+                if waiting:
+                    _long_polls.release()
+            if snapshot is None:
+                response = make_response("", 304)
+                response.headers["Cache-Control"] = "no-store"
+                if not waiting:
+                    response.headers["Retry-After"] = str(
+                        SHORT_POLL_INTERVAL
+                    )
+                return response
+
+        summary = checkout.get_checkout(current_user.id)
+        response = jsonify(
+            {
+                "success": True,
+                "subtotal": "{:.2f}".format(summary.subtotal),
+                "delivery_fee": "{:.2f}".format(summary.delivery_fee),
+                "total": "{:.2f}".format(summary.total),
+                "version": snapshot.version,
+            }
+        )
+        response.headers["Cache-Control"] = "no-store"
+        return response
 
     except Exception as e:
         print(f"Payment totals error: {e}")
@@ -60,8 +60,7 @@ class SignUpForm(FlaskForm):
         """Check if username is unique."""
         from models.client import Client
 
-        all_clients = storage.all(Client).values()
-        if any(client.username == username.data for client in all_clients):
+        if storage.find(Client, username=username.data, limit=1):
             raise ValidationError(
                 "Username already exists! Please choose a different one"
             )
@@ -70,8 +69,7 @@ class SignUpForm(FlaskForm):
         """Check if email is unique."""
         from models.client import Client
 
-        all_clients = storage.all(Client).values()
-        if any(client.email == email.data for client in all_clients):
+        if storage.find(Client, email=email.data, limit=1):
             raise ValidationError(
                 "Email already exists! Please choose a different one"
             )
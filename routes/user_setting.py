@@ -24,6 +24,7 @@ from wtforms.validators import (
     Optional,
 )
 from models import storage
+from services.identity import identity_cache
 from typing import Union
 
 setting_routes = Blueprint("setting_routes", __name__)
@@ -69,8 +70,7 @@ class UserSettingForm(FlaskForm):
         if email.data != current_user.email:
             from models.client import Client
 
-            clients = storage.all(Client).values()
-            if any(client.email == email.data for client in clients):
+            if storage.find(Client, email=email.data, limit=1):
                 raise ValidationError(
                     "Email already exists! Please choose a different one"
                 )
@@ -103,10 +103,7 @@ def setting() -> Union[str, "Response"]:
             from models.client import Client
             from app import bcrypt
 
-            clients = storage.all(Client).values()
-            client = next(
-                (c for c in clients if c.id == current_user.id), None
-            )
+            client = storage.get(Client, current_user.id)
 
             if client:
                 if user_setting_form.new_password.data:
@@ -122,6 +119,7 @@ def setting() -> Union[str, "Response"]:
                     ).decode("utf-8")
                     client.password = hashed_password
                     storage.save()
+                    identity_cache.invalidate(client.id)
                     flash("Password updated successfully!", "success")
 
                 if (
@@ -131,6 +129,7 @@ def setting() -> Union[str, "Response"]:
                     client.email = user_setting_form.email.data
                     client.address = user_setting_form.address.data
                     storage.save()
+                    identity_cache.invalidate(client.id)
                     flash(
                         "Profile information updated successfully!",
                         "success",
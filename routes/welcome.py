@@ -1,11 +1,9 @@
 """Signup route handler"""
 
+import math
 from flask import Blueprint, render_template, request, jsonify
-from models import storage
-from sqlalchemy.orm import joinedload
-from models.menu_item import MenuItem
-from models.restaurant import Restaurant
-from typing import Dict, Any
+from services import search, suggest
+from typing import Dict, Any, Optional
 
 welcome_routes = Blueprint("welcome_routes", __name__)
 
@@ -17,48 +15,69 @@ def welcome() -> str:
     return render_template("welcome.html", title="Welcome to Foodify")
 
 
+def _price_arg(name: str) -> Optional[float]:
+    """Return a price query parameter as a float, or None if absent"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    price = float(value)
+    if not math.isfinite(price) or price < 0:
+        raise ValueError(f"Invalid {name}")
+    return price
+
+
 @welcome_routes.route("/api/v1/search", methods=["GET"])
 def search_meals() -> Dict[str, Any]:
-    """Search meals with pagination and filtering"""
+    """Search meals by cursor or page number, optionally with facets"""
     try:
-        with storage.session_scope() as db_session:
-            query_param = request.args.get("query", "").strip().lower()
-            restaurant = request.args.get("restaurant", "All").strip()
-            page = int(request.args.get("page", 1))
-            per_page = 8
+        filters = search.Filters(
+            min_price=_price_arg("min_price"),
+            max_price=_price_arg("max_price"),
+            available_only=request.args.get("available_only")
+            in ("1", "true"),
+        )
+        result, hit = search.cached_search(
+            query=request.args.get("query", ""),
+            restaurant=request.args.get("restaurant", "All"),
+            cursor=request.args.get("cursor") or None,
+            page=int(request.args.get("page", 1)),
+            with_facets=request.args.get("facets") == "1",
+            filters=filters,
+            sort=request.args.get("sort") or None,
+        )
+        body = {
+            "meals": result.meals,
+            "total": result.total,
+            "next_cursor": result.next_cursor,
+            "fuzzy": result.fuzzy,
+        }
+        if result.facets is not None:
+            body["facets"] = result.facets._asdict()
+        response = jsonify(body)
+        response.headers["X-Cache"] = "HIT" if hit else "MISS"
+        return response
 
-            query = db_session.query(MenuItem).options(
-                joinedload(MenuItem.restaurant)
-            )
+    except (search.SearchError, ValueError) as e:
+        return jsonify({"error": str(e)}), getattr(e, "status", 400)
+    except Exception as e:
+        print(f"Search error: {e}")
+        return jsonify({"error": "Internal server error"}), 500
 
-            # Apply filters
-            if query_param:
-                query = query.filter(MenuItem.name.ilike(f"%{query_param}%"))
-            if restaurant != "All":
-                query = query.join(MenuItem.restaurant).filter(
-                    Restaurant.name == restaurant
-                )
 
-            total = query.count()
-            meals = query.limit(per_page).offset((page - 1) * per_page).all()
+@welcome_routes.route("/api/v1/search/stats", methods=["GET"])
+def search_cache_stats() -> Dict[str, Any]:
+    """Report hit and miss counters of this worker's search caches"""
+    return jsonify(search.cache_stats())
 
-            return jsonify(
-                {
-                    "meals": [
-                        {
-                            "id": str(meal.id),
-                            "name": meal.name,
-                            "price": float(meal.price),
-                            "is_available": meal.is_available,
-                            "restaurant_name": meal.restaurant.name,
-                            "image_name": meal.image_url,
-                        }
-                        for meal in meals
-                    ],
-                    "total": total,
-                }
-            )
 
-    except Exception as e:
-        print(f"Search error: {e}")
-        return jsonify({"error": "Internal server error"}), 500
+@welcome_routes.route("/api/v1/search/suggest", methods=["GET"])
+def search_suggestions() -> Dict[str, Any]:
+    """Suggest popular meal and restaurant names for a search-bar prefix"""
+    try:
+        limit = min(int(request.args.get("limit", suggest.TOP_K)),
+                    suggest.TOP_K)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    suggestions = suggest.index.suggest(request.args.get("prefix", ""),
+                                        max(limit, 0))
+    return jsonify({"suggestions": suggestions})
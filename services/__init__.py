@@ -0,0 +1,3 @@
+"""
+Service layer shared by the route blueprints.
+"""
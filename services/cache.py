@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Caches used by the Foodify service layer.
+
+LRUCache keeps entries in process memory. RedisCache stores them in any
+server speaking the Redis protocol (RESP), so several worker processes
+share one cache. cache_from_url picks the backend from a URL.
+"""
+import json
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with an optional time-to-live.
+
+    Attributes:
+        maxsize: Maximum number of entries kept before the oldest is evicted
+        ttl: Seconds an entry stays valid, or None to keep it until evicted
+    """
+
+    def __init__(self, maxsize: int = 1024,
+                 ttl: Optional[float] = None) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of entries
+            ttl: Optional entry lifetime in seconds
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value for key, or default when absent or expired.
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+
+        Returns:
+            Cached value or default
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at and expires_at < time.monotonic():
+                    del self._data[key]
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store value under key, evicting the least recently used entry.
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        with self._lock:
+            self._set(key, value)
+
+    def set_newer(self, key: Hashable, value: Dict[str, Any],
+                  field: str = "version") -> bool:
+        """
+        Store value unless the entry under key is at least as new.
+
+        Args:
+            key: Cache key
+            value: Mapping holding a version number under field
+            field: Name of the version number
+
+        Returns:
+            True if value was stored
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, current = entry
+                live = not expires_at or expires_at >= time.monotonic()
+                if live and current[field] >= value[field]:
+                    return False
+            self._set(key, value)
+            return True
+
+    def _set(self, key: Hashable, value: Any) -> None:
+        """Store value under key; the caller holds the lock."""
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove key from the cache if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cache effectiveness counters.
+
+        Returns:
+            Dictionary with hits, misses and current size
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+            }
+
+    def __len__(self) -> int:
+        """Return the number of stored entries, expired ones included."""
+        return len(self._data)
+
+
+class RedisCache:
+    """
+    Cache kept in a Redis-protocol server.
+
+    Values are stored as JSON, so only JSON-compatible values round-trip.
+    Each thread keeps its own connection. Connection errors are treated
+    as misses and lost writes rather than request failures; entries still
+    expire after ttl seconds.
+
+    Attributes:
+        ttl: Seconds an entry stays valid, or None to keep it
+        prefix: Namespace prepended to every key
+    """
+
+    def __init__(self, url: str, ttl: Optional[float] = None,
+                 prefix: str = "foodify:", timeout: float = 1.0) -> None:
+        """
+        Initialize the client; the connection is opened on first use.
+
+        Args:
+            url: redis://[:password@]host[:port][/db]
+            ttl: Optional entry lifetime in seconds
+            prefix: Namespace for keys
+            timeout: Socket timeout in seconds
+        """
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> Any:
+        """Open a connection and select the configured database."""
+        sock = socket.create_connection((self.host, self.port),
+                                        timeout=self.timeout)
+        self._local.sock = sock
+        self._local.reader = sock.makefile("rb")
+        if self.password:
+            self._execute("AUTH", self.password)
+        if self.db:
+            self._execute("SELECT", self.db)
+        return sock
+
+    def _read_reply(self) -> Any:
+        """Parse one RESP reply from the connection."""
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by cache server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RuntimeError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            size = int(payload)
+            if size < 0:
+                return None
+            return self._local.reader.read(size + 2)[:-2]
+        if kind == b"*":
+            size = int(payload)
+            if size < 0:
+                return None
+            return [self._read_reply() for _ in range(size)]
+        raise ConnectionError(f"Unexpected reply from cache server: {line}")
+
+    def _execute(self, *args: Union[str, int, bytes]) -> Any:
+        """Send one command and return its reply."""
+        parts = [a if isinstance(a, bytes) else str(a).encode()
+                 for a in args]
+        command = b"*%d\r\n" % len(parts) + b"".join(
+            b"$%d\r\n%s\r\n" % (len(part), part) for part in parts
+        )
+        self._local.sock.sendall(command)
+        return self._read_reply()
+
+    def command(self, *args: Union[str, int, bytes]) -> Any:
+        """
+        Run a command, reconnecting once if the connection dropped.
+
+        Raises:
+            OSError: If the server cannot be reached
+        """
+        for attempt in (1, 2):
+            try:
+                if getattr(self._local, "sock", None) is None:
+                    self._connect()
+                return self._execute(*args)
+            except (OSError, ConnectionError):
+                self.close()
+                if attempt == 2:
+                    raise
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _key(self, key: Hashable) -> str:
+        """Return the namespaced server key for key."""
+        return f"{self.prefix}{key}"
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default on a miss."""
+        try:
+            raw = self.command("GET", self._key(key))
+        except OSError as e:
+            print(f"Cache unavailable: {e}")
+            raw = None
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return json.loads(raw)
+
+    def _set_args(self, key: Hashable,
+                  value: Any) -> List[Union[str, int]]:
+        """Return the SET arguments storing value under key."""
+        args: List[Union[str, int]] = [self._key(key), json.dumps(value)]
+        if self.ttl:
+            args += ["PX", int(self.ttl * 1000)]
+        return args
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key with the configured ttl."""
+        try:
+            self.command("SET", *self._set_args(key, value))
+        except OSError as e:
+            print(f"Cache unavailable: {e}")
+
+    def set_newer(self, key: Hashable, value: Dict[str, Any],
+                  field: str = "version") -> bool:
+        """
+        Store value unless the entry under key is at least as new.
+
+        The check and the write run in a WATCH/MULTI/EXEC transaction,
+        retried when another client changed the key in between.
+
+        Returns:
+            True if value was stored
+        """
+        server_key = self._key(key)
+        try:
+            # reconnecting is only safe before the key is watched
+            self.command("WATCH", server_key)
+            while True:
+                raw = self._execute("GET", server_key)
+                if raw is not None and json.loads(raw)[field] >= value[field]:
+                    self._execute("UNWATCH")
+                    return False
+                self._execute("MULTI")
+                self._execute("SET", *self._set_args(key, value))
+                if self._execute("EXEC") is not None:
+                    return True
+                self._execute("WATCH", server_key)
+        except OSError as e:
+            self.close()
+            print(f"Cache unavailable: {e}")
+            return False
+
+    def delete(self, key: Hashable) -> None:
+        """Remove key from the cache if present."""
+        try:
+            self.command("DEL", self._key(key))
+        except OSError as e:
+            print(f"Cache unavailable: {e}")
+
+    def clear(self) -> None:
+        """Remove every key under this cache's prefix."""
+        cursor = "0"
+        while True:
+            cursor, keys = self.command(
+                "SCAN", cursor, "MATCH", f"{self.prefix}*", "COUNT", 500
+            )
+            cursor = cursor.decode() if isinstance(cursor, bytes) else cursor
+            if keys:
+                self.command("DEL", *keys)
+            if cursor == "0":
+                break
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cache effectiveness counters for this process.
+
+        Returns:
+            Dictionary with hits, misses and the server's key count
+        """
+        try:
+            size = self.command("DBSIZE")
+        except OSError:
+            size = 0
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": size}
+
+
+def cache_from_url(url: Optional[str], maxsize: int = 1024,
+                   ttl: Optional[float] = None,
+                   prefix: str = "foodify:") -> Union[LRUCache, RedisCache]:
+    """
+    Build a cache backend from a URL.
+
+    Args:
+        url: Empty or memory:// for an in-process LRUCache, redis://...
+            for a shared RedisCache
+        maxsize: Entry limit of the in-process backend
+        ttl: Entry lifetime in seconds
+        prefix: Key namespace of the shared backend
+
+    Returns:
+        The configured cache
+    """
+    if not url or url.startswith("memory://"):
+        return LRUCache(maxsize=maxsize, ttl=ttl)
+    if url.startswith("redis://"):
+        return RedisCache(url, ttl=ttl, prefix=prefix)
+    raise ValueError(f"Unsupported cache URL: {url}")
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Cart mutations applied as atomic SQL statements.
+
+A click on + or - runs in one transaction: the quantity changes with an
+upsert or a guarded UPDATE on (order_id, menu_item_id), and the order
+total is recomputed from its rows by the database. Concurrent clicks on
+the same cart therefore serialize on the row locks instead of
+overwriting each other's read-modify-write in Python.
+
+Menu items are looked up in services.catalog_cache. Reads go through a
+per-client snapshot cache. Every mutation increments clients.cart_version
+in its transaction and writes the cart it committed back to the cache
+under that version, so /api/v1/cart/state is served without a database
+round trip. The cache only accepts a snapshot newer than the one it
+holds: the client row lock orders the versions as the commits, so a
+writer that reaches the cache late cannot replace a later cart.
+
+A per-process cache would keep serving each worker its own copy of a
+cart that another worker changed, so carts are only cached when
+FOODIFY_CACHE_URL names a shared server, or in memory when
+FOODIFY_SINGLE_PROCESS=1 declares that one process serves the app;
+otherwise every read goes to the database.
+"""
+import threading
+import time
+from datetime import datetime
+from os import getenv
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from sqlalchemy import and_, delete, exists, func, select, update
+from sqlalchemy.orm import Session
+from models.client import Client
+from models.engine.db_storage import row_values, upsert_statement
+from models.menu_item import MenuItem
+from models.order import Order
+from models.order_item import OrderItem
+from services import catalog_cache
+from services.cache import cache_from_url
+
+ACTIONS = ("increase", "decrease")
+MAX_BATCH_SIZE = 100
+# largest quantity change a single batch operation may ask for
+MAX_QUANTITY = 99
+
+
+class CartError(Exception):
+    """A cart update that cannot be applied."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        """
+        Initialize the error.
+
+        Args:
+            message: Description returned to the client
+            status: HTTP status code for the response
+        """
+        super().__init__(message)
+        self.status = status
+
+
+class CartUpdate(NamedTuple):
+    """
+    Cart state after an update.
+
+    Attributes:
+        order_id: Active order id, None once the cart is emptied
+        total_price: Order total after the update
+        status: Order status, None once the cart is emptied
+        quantity: Quantity of the updated menu item
+    """
+
+    order_id: Optional[str]
+    total_price: float
+    status: Optional[str]
+    quantity: int
+
+
+class CartSnapshot(NamedTuple):
+    """
+    Whole cart after a batch of updates.
+
+    Attributes:
+        order_id: Active order id, None when the cart is empty
+        total_price: Order total
+        status: Order status, None when the cart is empty
+        items: Quantity per menu item id
+        version: clients.cart_version the cart was read at
+    """
+
+    order_id: Optional[str]
+    total_price: float
+    status: Optional[str]
+    items: Dict[str, int]
+    version: int = 0
+
+
+EMPTY_CART = CartSnapshot(None, 0.0, None, {})
+
+CACHE_URL = getenv("FOODIFY_CACHE_URL") or ""
+SHARED_CACHE = bool(CACHE_URL) and not CACHE_URL.startswith("memory://")
+# a server with several processes may not say so, hence the opt-in
+CACHE_CARTS = SHARED_CACHE or getenv("FOODIFY_SINGLE_PROCESS") == "1"
+
+snapshot_cache = cache_from_url(
+    CACHE_URL,
+    maxsize=int(getenv("FOODIFY_CART_CACHE_SIZE", "10000")),
+    ttl=float(getenv("FOODIFY_CART_CACHE_TTL", "300")),
+    prefix="foodify:cart:",
+)
+# woken on every local write so long polls answer without waiting out
+# their re-check interval
+_changed = threading.Condition()
+
+
+def _active_order_id(session: Session, client_id: str,
+                     create: bool) -> Optional[str]:
+    """
+    Return the client's active order id, creating the order if asked.
+
+    Creation locks the client row and re-reads with a locking read, so
+    two first clicks from the same client open a single order.
+    """
+    query = select(Order.id).where(
+        Order.client_id == client_id, Order.status == "active"
+    ).limit(1)
+    order_id = session.execute(query).scalar()
+    if order_id or not create:
+        return order_id
+
+    session.execute(
+        select(Client.id).where(Client.id == client_id).with_for_update()
+    )
+    order_id = session.execute(query.with_for_update()).scalar()
+    if order_id:
+        return order_id
+
+    row = row_values(Order.__table__, {
+        "client_id": client_id, "status": "active", "total_price": 0,
+    })
+    session.execute(Order.__table__.insert(), row)
+    return row["id"]
+
+
+def _cart_version(session: Session, client_id: str) -> int:
+    """Return the client's cart version as seen by session."""
+    return session.execute(
+        select(Client.cart_version).where(Client.id == client_id)
+    ).scalar() or 0
+
+
+def _bump_version(session: Session, client_id: str) -> int:
+    """
+    Increment the client's cart version in session's transaction.
+
+    The UPDATE locks the client row until commit, so the cart writes of
+    one client commit one at a time and in version order. Call it before
+    touching the order, in the same lock order as _active_order_id.
+    """
+    session.execute(
+        update(Client.__table__)
+        .where(Client.id == client_id)
+        .values(cart_version=Client.cart_version + 1)
+    )
+    return _cart_version(session, client_id)
+
+
+def _recompute_total(session: Session, order_id: str) -> None:
+    """Set the order total to the sum of its items, in SQL."""
+    total = (
+        select(func.coalesce(
+            func.sum(OrderItem.quantity * MenuItem.price), 0
+        ))
+        .select_from(OrderItem.__table__.join(
+            MenuItem.__table__, OrderItem.menu_item_id == MenuItem.id
+        ))
+        .where(OrderItem.order_id == order_id)
+        .scalar_subquery()
+    )
+    session.execute(
+        update(Order.__table__)
+        .where(Order.id == order_id)
+        .values(total_price=total, updated_at=datetime.now())
+    )
+
+
+def _drop_if_empty(session: Session, order_id: str) -> bool:
+    """Delete the order if it has no items left; return True if deleted."""
+    result = session.execute(delete(Order.__table__).where(
+        Order.id == order_id,
+        ~exists().where(OrderItem.order_id == order_id),
+    ))
+    return bool(result.rowcount)
+
+
+def _load(session: Session, order_id: Optional[str]) -> CartSnapshot:
+    """Read the whole cart of an order inside session."""
+    if order_id is None:
+        return EMPTY_CART
+    row = session.execute(
+        select(Order.total_price, Order.status).where(Order.id == order_id)
+    ).one_or_none()
+    if row is None:
+        return EMPTY_CART
+    items = dict(session.execute(
+        select(OrderItem.menu_item_id, OrderItem.quantity)
+        .where(OrderItem.order_id == order_id)
+    ).all())
+    return CartSnapshot(order_id, float(row[0]), row[1], items)
+
+
+def _apply(session: Session, dialect: str, client_id: str,
+           menu_item_id: str, action: str) -> CartSnapshot:
+    """Run the statements of one cart update inside session."""
+    if catalog_cache.menu_item(menu_item_id, session) is None:
+        raise CartError("Item not found", 404)
+
+    order_id = _active_order_id(
+        session, client_id, create=action == "increase"
+    )
+    if order_id is None:
+        raise CartError("No active order found")
+
+    in_order = and_(OrderItem.order_id == order_id,
+                    OrderItem.menu_item_id == menu_item_id)
+    if action == "increase":
+        row = row_values(OrderItem.__table__, {
+            "order_id": order_id,
+            "menu_item_id": menu_item_id,
+            "quantity": 1,
+        })
+        session.execute(upsert_statement(
+            dialect, OrderItem.__table__, ["order_id", "menu_item_id"],
+            update_columns=["updated_at"], increment_columns=["quantity"],
+        ), row)
+    else:
+        result = session.execute(
+            update(OrderItem.__table__)
+            .where(in_order, OrderItem.quantity > 0)
+            .values(quantity=OrderItem.quantity - 1,
+                    updated_at=datetime.now())
+        )
+        if result.rowcount == 0:
+            raise CartError("Item not in cart")
+        session.execute(delete(OrderItem.__table__).where(
+            in_order, OrderItem.quantity <= 0
+        ))
+        if _drop_if_empty(session, order_id):
+            return EMPTY_CART
+
+    _recompute_total(session, order_id)
+    return _load(session, order_id)
+
+
+def update_item(client_id: str, menu_item_id: str,
+                action: str) -> CartUpdate:
+    """
+    Add or remove one unit of a menu item in the client's active order.
+
+    Increasing opens an active order if needed; decreasing the last unit
+    removes the item, and removing the last item deletes the order. All
+    statements run in a single transaction.
+
+    Args:
+        client_id: Owner of the cart
+        menu_item_id: Menu item to add or remove
+        action: "increase" or "decrease"
+
+    Returns:
+        CartUpdate describing the cart after the change
+
+    Raises:
+        CartError: If the item, the order or the action is invalid
+    """
+    from models import storage
+
+    if action not in ACTIONS:
+        raise CartError(f"Unknown action: {action}")
+
+    try:
+        with storage.session_scope() as session:
+            version = _bump_version(session, client_id)
+            snapshot = _apply(session, storage.dialect, client_id,
+                              menu_item_id, action)._replace(version=version)
+    except RuntimeError as e:
+        # session_scope wraps errors after rolling back; surface ours
+        if isinstance(e.__cause__, CartError):
+            raise e.__cause__ from None
+        raise
+
+    snapshot = _store(client_id, snapshot)
+    return CartUpdate(snapshot.order_id, snapshot.total_price,
+                      snapshot.status, snapshot.items.get(menu_item_id, 0))
+
+
+def _apply_batch(session: Session, dialect: str, client_id: str,
+                 deltas: Dict[str, int]) -> CartSnapshot:
+    """Run the statements of one batch inside session."""
+    missing = set(deltas) - set(catalog_cache.menu_items(deltas, session))
+    if missing:
+        raise CartError(f"Item not found: {sorted(missing)[0]}", 404)
+
+    order_id = _active_order_id(
+        session, client_id, create=any(d > 0 for d in deltas.values())
+    )
+    if order_id is None:
+        return EMPTY_CART
+
+    added = [
+        row_values(OrderItem.__table__, {
+            "order_id": order_id, "menu_item_id": item_id, "quantity": delta,
+        })
+        for item_id, delta in deltas.items() if delta > 0
+    ]
+    if added:
+        session.execute(upsert_statement(
+            dialect, OrderItem.__table__, ["order_id", "menu_item_id"],
+            update_columns=["updated_at"], increment_columns=["quantity"],
+        ), added)
+    removed = [(item_id, d) for item_id, d in deltas.items() if d < 0]
+    for item_id, delta in removed:
+        session.execute(
+            update(OrderItem.__table__)
+            .where(OrderItem.order_id == order_id,
+                   OrderItem.menu_item_id == item_id)
+            .values(quantity=OrderItem.quantity + delta,
+                    updated_at=datetime.now())
+        )
+    if removed:
+        session.execute(delete(OrderItem.__table__).where(
+            OrderItem.order_id == order_id, OrderItem.quantity <= 0
+        ))
+        if _drop_if_empty(session, order_id):
+            return EMPTY_CART
+
+    _recompute_total(session, order_id)
+    return _load(session, order_id)
+
+
+def apply_batch(client_id: str,
+                operations: Iterable[Tuple[str, int]]) -> CartSnapshot:
+    """
+    Apply several quantity changes to the client's cart at once.
+
+    Deltas for the same menu item are summed first, so changes that
+    cancel out touch nothing. Positive deltas are
+    upserted in one executemany; a negative delta larger than the
+    quantity removes the item. Everything runs in a single transaction.
+
+    Args:
+        client_id: Owner of the cart
+        operations: (menu_item_id, delta) pairs
+
+    Returns:
+        CartSnapshot of the whole cart after the batch
+
+    Raises:
+        CartError: If the batch is too large, an operation is malformed
+            or a delta exceeds MAX_QUANTITY, or an item is unknown
+    """
+    from models import storage
+
+    deltas: Dict[str, int] = {}
+    count = 0
+    for count, (menu_item_id, delta) in enumerate(operations, 1):
+        if count > MAX_BATCH_SIZE:
+            raise CartError(
+                f"At most {MAX_BATCH_SIZE} operations per batch", 413
+            )
+        if not isinstance(menu_item_id, str) or not menu_item_id:
+            raise CartError(f"Operation {count}: menu_item_id must be a "
+                            "non-empty string")
+        if isinstance(delta, bool) or not isinstance(delta, int) \
+                or abs(delta) > MAX_QUANTITY:
+            raise CartError(f"Operation {count}: delta must be an integer "
+                            f"from -{MAX_QUANTITY} to {MAX_QUANTITY}")
+        deltas[menu_item_id] = deltas.get(menu_item_id, 0) + delta
+    if not count:
+        raise CartError("No operations to apply")
+
+    try:
+        with storage.session_scope() as session:
+            version = _bump_version(session, client_id)
+            snapshot = _apply_batch(session, storage.dialect, client_id,
+                                    deltas)._replace(version=version)
+    except RuntimeError as e:
+        if isinstance(e.__cause__, CartError):
+            raise e.__cause__ from None
+        raise
+    return _store(client_id, snapshot)
+
+
+def _store(client_id: str, snapshot: CartSnapshot) -> CartSnapshot:
+    """Cache a committed cart unless a newer version is cached."""
+    if CACHE_CARTS:
+        snapshot_cache.set_newer(client_id, snapshot._asdict())
+    with _changed:
+        _changed.notify_all()
+    return snapshot
+
+
+def get_snapshot(client_id: str) -> CartSnapshot:
+    """
+    Return the client's cart, from the cache when possible.
+
+    A miss reads the active order and its items once and caches them
+    under the current cart version. Without CACHE_CARTS every call
+    reads the database.
+
+    Args:
+        client_id: Owner of the cart
+
+    Returns:
+        CartSnapshot of the active order, EMPTY_CART if there is none
+    """
+    cached = snapshot_cache.get(client_id) if CACHE_CARTS else None
+    if cached is not None:
+        return CartSnapshot(**cached)
+    return _reload(client_id, bump=False)
+
+
+def refresh(client_id: str) -> CartSnapshot:
+    """
+    Reload the client's cart from the database under a new version.
+
+    Call it after changing orders or order items outside this module,
+    e.g. once the active order was confirmed. The version is incremented
+    in the transaction that reads the cart, so the reloaded cart replaces
+    every snapshot cached before the outside change.
+
+    Args:
+        client_id: Owner of the cart
+
+    Returns:
+        The reloaded CartSnapshot
+    """
+    return _reload(client_id, bump=True)
+
+
+def _reload(client_id: str, bump: bool) -> CartSnapshot:
+    """Read the client's cart in one transaction and cache it."""
+    from models import storage
+
+    with storage.session_scope() as session:
+        if bump:
+            version = _bump_version(session, client_id)
+        else:
+            version = _cart_version(session, client_id)
+        order_id = _active_order_id(session, client_id, create=False)
+        snapshot = _load(session, order_id)._replace(version=version)
+    return _store(client_id, snapshot)
+
+
+def wait_for_change(client_id: str, version: int, timeout: float,
+                    interval: float = 1.0) -> Optional[CartSnapshot]:
+    """
+    Block until the client's cart version differs from version.
+
+    Writes from this process wake the waiter at once; the cache is also
+    re-read every interval seconds to see writes made by other workers
+    through a shared backend. No database query is made while the cart
+    stays cached.
+
+    Args:
+        client_id: Owner of the cart
+        version: Version the caller already has
+        timeout: Maximum seconds to wait
+        interval: Seconds between cache re-reads
+
+    Returns:
+        The new CartSnapshot, or None if nothing changed before timeout
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        snapshot = get_snapshot(client_id)
+        if snapshot.version != version:
+            return snapshot
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        with _changed:
+            _changed.wait(min(remaining, interval))
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Catalog version for caches derived from menu data.
+
+Every committed transaction that wrote the menu_items or restaurants
+tables, through the ORM unit of work or through bulk INSERT/UPDATE/DELETE
+statements run on a session, increments the version. Caches include the
+version in their keys, so a menu write invalidates them without having
+to find and delete the affected entries.
+
+Indexes that mirror the catalog subscribe to the committed changes
+instead: rows written through the unit of work are passed with their
+column values, bulk statements only as a flag asking for a reload.
+
+Counter columns such as menu_items.popularity are not catalog content:
+rows in which nothing else changed are left out.
+
+Transactions that write the catalog also publish the "catalog" channel
+of services.invalidation. When another process does, the version is
+bumped and listeners are told to reload, as after a bulk statement.
+Publishing increments a single cache_versions row, whose lock serializes
+catalog writers from then until commit; it is therefore done just before
+commit, and counter-only writes, like order confirmations raising
+popularity, do not publish at all.
+"""
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from services.invalidation import bus
+
+CHANNEL = "catalog"
+CATALOG_TABLES = frozenset({"menu_items", "restaurants"})
+COUNTER_COLUMNS = frozenset({"popularity"})
+
+_lock = threading.Lock()
+_version = 0
+
+
+class CatalogChanges(NamedTuple):
+    """
+    Catalog rows written by one committed transaction.
+
+    Attributes:
+        rows: Column values per (table name, id); None for deleted rows
+        bulk: True when bulk statements changed rows not listed in rows
+    """
+
+    rows: Dict[Any, Optional[Dict[str, Any]]]
+    bulk: bool
+
+
+_listeners: List[Callable[[CatalogChanges], None]] = []
+
+
+def subscribe(listener: Callable[[CatalogChanges], None]) -> None:
+    """Call listener with the changes of every committed catalog write."""
+    _listeners.append(listener)
+
+
+def _pending(session: Session) -> CatalogChanges:
+    """Return the changes collected for the session's transaction."""
+    if "catalog_changes" not in session.info:
+        session.info["catalog_changes"] = CatalogChanges({}, False)
+    return session.info["catalog_changes"]
+
+
+def version() -> int:
+    """Return the current catalog version."""
+    return _version
+
+
+def bump() -> int:
+    """
+    Invalidate everything derived from the catalog.
+
+    Returns:
+        The new catalog version
+    """
+    global _version
+    with _lock:
+        _version += 1
+        return _version
+
+
+def _notify(changes: CatalogChanges) -> None:
+    """Pass changes to every listener."""
+    for listener in list(_listeners):
+        try:
+            listener(changes)
+        except Exception as e:
+            print(f"Catalog listener error: {e}")
+
+
+def _changed_elsewhere() -> None:
+    """Invalidate everything after another process wrote the catalog."""
+    bump()
+    _notify(CatalogChanges({}, True))
+
+
+bus.subscribe(CHANNEL, _changed_elsewhere)
+
+
+def _content_changed(obj: Any) -> bool:
+    """Return True if a column other than a counter was modified."""
+    state = inspect(obj)
+    return any(
+        state.attrs[attr.key].history.has_changes()
+        for attr in state.mapper.column_attrs
+        if attr.key not in COUNTER_COLUMNS
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _note_flushed_writes(session: Session, flush_context: Any) -> None:
+    """Record the catalog rows the pending transaction wrote."""
+    dirty = session.dirty
+    for deleted, objs in ((False, session.new), (False, dirty),
+                          (True, session.deleted)):
+        for obj in objs:
+            table = getattr(obj, "__tablename__", None)
+            if table not in CATALOG_TABLES:
+                continue
+            if objs is dirty and not _content_changed(obj):
+                continue
+            _pending(session).rows[(table, obj.id)] = None if deleted else {
+                column.key: getattr(obj, column.key)
+                for column in obj.__table__.columns
+            }
+
+
+def _counter_only(statement: Any) -> bool:
+    """Return True for an UPDATE that only sets counter columns."""
+    values = getattr(statement, "_values", None)
+    return bool(statement.is_update and values) and all(
+        getattr(column, "key", column) in COUNTER_COLUMNS
+        for column in values
+    )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_statement_writes(state: Any) -> None:
+    """Record bulk statements that write catalog tables."""
+    table = getattr(state.statement, "table", None)
+    if state.statement.is_dml and getattr(table, "name", None) \
+            in CATALOG_TABLES and not _counter_only(state.statement):
+        changes = _pending(state.session)
+        state.session.info["catalog_changes"] = changes._replace(bulk=True)
+
+
+@event.listens_for(Session, "before_commit")
+def _publish_before_commit(session: Session) -> None:
+    """Publish the catalog channel if the transaction wrote the catalog."""
+    # flush now: the commit's own flush comes after this hook
+    session.flush()
+    if "catalog_changes" in session.info \
+            and "catalog_published" not in session.info:
+        session.info["catalog_published"] = bus.publish(
+            session.connection(), CHANNEL
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session: Session) -> None:
+    """Bump the version and notify listeners once writes are visible."""
+    changes = session.info.pop("catalog_changes", None)
+    if changes is None:
+        return
+    bump()
+    _notify(changes)
+    bus.committed(CHANNEL, session.info.pop("catalog_published", None))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session: Session) -> None:
+    """Drop the changes of writes that never committed."""
+    session.info.pop("catalog_changes", None)
+    session.info.pop("catalog_published", None)
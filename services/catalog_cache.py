@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Read-through cache of menu items and restaurants.
+
+Cart, order, checkout and contact paths resolve names, prices and
+availability here instead of querying menu_items and restaurants on
+every request. Entries are immutable MenuItemRef and RestaurantRef
+tuples, detached from any session, so callers can keep and share them.
+
+Keys include the catalog version (services.catalog): a committed menu
+or restaurant write in this process invalidates every entry at once,
+while order writes, which only move the popularity counter, leave them
+alone. Writes made by other processes bump the version when
+services.invalidation notices them; FOODIFY_CATALOG_CACHE_TTL is the
+backstop.
+"""
+from contextlib import nullcontext
+from os import getenv
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.menu_item import MenuItem
+from models.restaurant import Restaurant
+from services import catalog
+from services.cache import LRUCache
+from services.singleflight import SingleFlight
+
+
+class MenuItemRef(NamedTuple):
+    """
+    Reference data of one menu item.
+
+    Attributes:
+        id: Menu item id
+        restaurant_id: Owning restaurant id
+        name: Menu item name
+        price: Unit price
+        is_available: False when the item cannot be ordered
+        image_url: Image file name, or None
+    """
+
+    id: str
+    restaurant_id: str
+    name: str
+    price: float
+    is_available: bool
+    image_url: Optional[str]
+
+
+class RestaurantRef(NamedTuple):
+    """
+    Reference data of one restaurant.
+
+    Attributes:
+        id: Restaurant id
+        name: Restaurant name
+        city: City the restaurant is in
+        logo_url: Logo file name, or None
+    """
+
+    id: str
+    name: str
+    city: str
+    logo_url: Optional[str]
+
+
+cache = LRUCache(
+    maxsize=int(getenv("FOODIFY_CATALOG_CACHE_SIZE", "10000")),
+    ttl=float(getenv("FOODIFY_CATALOG_CACHE_TTL", "60")),
+)
+flight = SingleFlight()
+
+
+def _scope(session: Optional[Session]) -> Any:
+    """Return a context yielding session, or a new storage scope."""
+    if session is not None:
+        return nullcontext(session)
+    from models import storage
+
+    return storage.session_scope()
+
+
+def menu_items(ids: Iterable[str],
+               session: Optional[Session] = None) -> Dict[str, MenuItemRef]:
+    """
+    Return the menu items with the given ids, loading misses at once.
+
+    Ids missing from the cache are read with a single IN query; ids
+    that do not exist are left out of the result and not cached.
+
+    Args:
+        ids: Menu item ids, duplicates allowed
+        session: Session to read misses in, e.g. the caller's
+            transaction; a new storage scope when omitted
+
+    Returns:
+        MenuItemRef per id found
+    """
+    # read before loading, so rows loaded during a write are cached
+    # under the version that write makes stale
+    version = catalog.version()
+    found: Dict[str, MenuItemRef] = {}
+    missing = []
+    for item_id in dict.fromkeys(ids):
+        ref = cache.get(("item", version, item_id))
+        if ref is None:
+            missing.append(item_id)
+        else:
+            found[item_id] = ref
+    if not missing:
+        return found
+
+    with _scope(session) as s:
+        rows = s.execute(
+            select(MenuItem.id, MenuItem.restaurant_id, MenuItem.name,
+                   MenuItem.price, MenuItem.is_available,
+                   MenuItem.image_url)
+            .where(MenuItem.id.in_(missing))
+        ).all()
+    for row in rows:
+        ref = MenuItemRef(row.id, row.restaurant_id, row.name,
+                          float(row.price), bool(row.is_available),
+                          row.image_url)
+        cache.set(("item", version, ref.id), ref)
+        found[ref.id] = ref
+    return found
+
+
+def menu_item(item_id: str,
+              session: Optional[Session] = None) -> Optional[MenuItemRef]:
+    """
+    Return one menu item.
+
+    Args:
+        item_id: Menu item id
+        session: Session to read a miss in; a new scope when omitted
+
+    Returns:
+        The MenuItemRef, or None if no such item exists
+    """
+    return menu_items([item_id], session).get(item_id)
+
+
+def restaurants() -> Tuple[RestaurantRef, ...]:
+    """
+    Return every restaurant, sharing concurrent loads.
+
+    Returns:
+        RestaurantRef tuple in database order
+    """
+    version = catalog.version()
+    cached = cache.get(("restaurants", version))
+    if cached is not None:
+        return cached
+
+    def load() -> Tuple[RestaurantRef, ...]:
+        with _scope(None) as session:
+            rows = session.execute(
+                select(Restaurant.id, Restaurant.name, Restaurant.city,
+                       Restaurant.logo_url)
+            ).all()
+        loaded = tuple(RestaurantRef(*row) for row in rows)
+        cache.set(("restaurants", version), loaded)
+        return loaded
+
+    return flight.do(("restaurants", version), load)[0]
+
+
+def stats() -> Dict[str, int]:
+    """Return the hit and miss counters of this worker's cache."""
+    return cache.stats()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Checkout summary for the payment page and totals endpoint.
+
+The active order and its item rows are loaded with one query; menu
+item names and prices come from services.catalog_cache. The result is
+memoized on flask.g, so a request that needs it in several places
+queries once.
+"""
+from typing import Dict, NamedTuple, Optional, Tuple
+from flask import g, has_app_context
+from sqlalchemy import select
+from services import catalog_cache
+
+DELIVERY_FEE = 5.00
+
+
+class CheckoutLine(NamedTuple):
+    """
+    One line of the order being paid for.
+
+    Attributes:
+        name: Menu item name
+        quantity: Units ordered
+        price: Unit price
+    """
+
+    name: str
+    quantity: int
+    price: float
+
+
+class Checkout(NamedTuple):
+    """
+    Amounts and lines shown at checkout.
+
+    Attributes:
+        order_id: Active order id, None when the cart is empty
+        subtotal: Order total before delivery
+        delivery_fee: Flat delivery fee
+        total: Amount to pay
+        items: Order lines in insertion order
+    """
+
+    order_id: Optional[str]
+    subtotal: float
+    delivery_fee: float
+    total: float
+    items: Tuple[CheckoutLine, ...]
+
+
+def _load(client_id: str) -> Checkout:
+    """Read the active order's lines; names and prices come cached."""
+    from models import storage
+    from models.order import Order
+    from models.order_item import OrderItem
+
+    with storage.session_scope() as session:
+        rows = session.execute(
+            select(Order.id, Order.total_price, OrderItem.menu_item_id,
+                   OrderItem.quantity)
+            .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+            .where(Order.client_id == client_id, Order.status == "active")
+            .order_by(Order.id, OrderItem.created_at)
+        ).all()
+        if not rows:
+            return Checkout(None, 0.0, DELIVERY_FEE, DELIVERY_FEE, ())
+        order_id, total = rows[0].id, rows[0].total_price
+        lines = [row for row in rows
+                 if row.id == order_id and row.menu_item_id is not None]
+        refs = catalog_cache.menu_items(
+            [row.menu_item_id for row in lines], session
+        )
+    items = tuple(
+        CheckoutLine(refs[row.menu_item_id].name, row.quantity,
+                     refs[row.menu_item_id].price)
+        for row in lines if row.menu_item_id in refs
+    )
+    subtotal = float(total)
+    return Checkout(order_id, subtotal, DELIVERY_FEE,
+                    subtotal + DELIVERY_FEE, items)
+
+
+def get_checkout(client_id: str) -> Checkout:
+    """
+    Return the client's checkout summary, querying once per request.
+
+    Args:
+        client_id: Owner of the active order
+
+    Returns:
+        The Checkout for the client's active order
+    """
+    if not has_app_context():
+        return _load(client_id)
+    memo: Dict[str, Checkout] = g.setdefault("checkout", {})
+    if client_id not in memo:
+        memo[client_id] = _load(client_id)
+    return memo[client_id]
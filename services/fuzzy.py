@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Typo-tolerant menu search served from memory.
+
+FuzzyIndex keeps every menu item with the words of its name and of its
+restaurant's name. Words are matched with symmetric-delete candidates:
+each indexed word is stored under every string obtained by deleting up
+to max_distance characters from it, so a misspelt query word finds its
+candidates by looking up its own deletions, and only those candidates
+get an exact (Damerau-)Levenshtein check. No database query is made
+while answering.
+
+The index is loaded from DBStorage once and then follows the catalog:
+rows committed through the unit of work are applied one by one, bulk
+statements trigger a reload on the next search.
+"""
+import heapq
+import re
+import threading
+from itertools import groupby
+from os import getenv
+from typing import Any, Dict, Iterable, List, Set, Tuple
+from services import catalog
+from services.cache import LRUCache
+
+ENABLED = getenv("FOODIFY_FUZZY_SEARCH", "1") == "1"
+# most meals a search returns
+MAX_RESULTS = 100
+# query words whose matches are kept between writes
+WORD_CACHE_SIZE = 256
+# item-name words count double a restaurant-name word
+RESTAURANT_WEIGHT = 0.5
+
+
+def words(text: str) -> List[str]:
+    """Split text into lower-cased words."""
+    return re.findall(r"\w+", text.lower())
+
+
+def max_distance(word: str) -> int:
+    """Return the edit distance tolerated for a query word."""
+    if len(word) <= 2:
+        return 0
+    return 1 if len(word) <= 5 else 2
+
+
+def deletes(word: str, distance: int) -> Set[str]:
+    """Return word and every string made by deleting up to distance chars."""
+    found = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {
+            w[:i] + w[i + 1:] for w in frontier if len(w) > 1
+            for i in range(len(w))
+        }
+        found |= frontier
+    return found
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Return the optimal string alignment distance between a and b.
+
+    Transpositions count as one edit. Returns limit + 1 as soon as the
+    distance is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] \
+                    and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    """
+    In-memory index of menu items tolerant to typos.
+
+    Meals are stored as the dictionaries /api/v1/search returns, so
+    results need no database round trip.
+    """
+
+    def __init__(self, distance: int = 2) -> None:
+        """
+        Initialize an empty, unloaded index.
+
+        Args:
+            distance: Largest edit distance indexed
+        """
+        self.distance = distance
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self) -> None:
+        """Drop every entry and mark the index unloaded."""
+        self.loaded = False
+        self._meals: Dict[str, Dict[str, Any]] = {}
+        self._item_restaurant: Dict[str, str] = {}
+        self._restaurants: Dict[str, str] = {}
+        self._restaurant_items: Dict[str, Set[str]] = {}
+        # word -> item ids (item names) / restaurant ids (restaurant names)
+        self._item_words: Dict[str, Set[str]] = {}
+        self._restaurant_words: Dict[str, Set[str]] = {}
+        # deletion -> indexed words
+        self._deletes: Dict[str, Set[str]] = {}
+        self._refs: Dict[str, int] = {}
+        # posting key -> its items sorted by name, dropped when it changes
+        self._order_cache: Dict[Tuple[str, str], List[Any]] = {}
+        # (generation, query word) -> its tiers and their union; every
+        # write starts a generation, so stale entries just age out
+        self._generation = 0
+        self._word_cache = LRUCache(WORD_CACHE_SIZE)
+
+    def _add_word(self, postings: Dict[str, Set[str]], word: str,
+                  owner: str) -> None:
+        """Index word for owner."""
+        if word not in self._refs:
+            for variant in deletes(word, self.distance):
+                self._deletes.setdefault(variant, set()).add(word)
+        self._refs[word] = self._refs.get(word, 0) + 1
+        postings.setdefault(word, set()).add(owner)
+
+    def _remove_word(self, postings: Dict[str, Set[str]], word: str,
+                     owner: str) -> None:
+        """Unindex word for owner, dropping it once nothing uses it."""
+        owners = postings.get(word)
+        if owners is None or owner not in owners:
+            return
+        owners.discard(owner)
+        if not owners:
+            del postings[word]
+        self._refs[word] -= 1
+        if not self._refs[word]:
+            del self._refs[word]
+            for variant in deletes(word, self.distance):
+                variants = self._deletes[variant]
+                variants.discard(word)
+                if not variants:
+                    del self._deletes[variant]
+
+    def put_restaurant(self, restaurant_id: str, name: str) -> None:
+        """Add or rename a restaurant."""
+        with self._lock:
+            self.remove_restaurant(restaurant_id, keep_items=True)
+            self._generation += 1
+            self._restaurants[restaurant_id] = name
+            for word in set(words(name)):
+                self._add_word(self._restaurant_words, word, restaurant_id)
+            # copies: meals already handed out must not change under readers
+            for item_id in self._restaurant_items.get(restaurant_id, ()):
+                self._meals[item_id] = dict(self._meals[item_id],
+                                            restaurant_name=name)
+
+    def remove_restaurant(self, restaurant_id: str,
+                          keep_items: bool = False) -> None:
+        """Remove a restaurant, and its items unless keep_items."""
+        with self._lock:
+            name = self._restaurants.pop(restaurant_id, None)
+            if name is not None:
+                self._generation += 1
+                for word in set(words(name)):
+                    self._remove_word(self._restaurant_words, word,
+                                      restaurant_id)
+            if not keep_items:
+                for item_id in list(
+                    self._restaurant_items.get(restaurant_id, ())
+                ):
+                    self.remove_item(item_id)
+
+    def put_item(self, item: Dict[str, Any]) -> None:
+        """
+        Add or update a menu item.
+
+        Args:
+            item: menu_items column values
+        """
+        with self._lock:
+            self.remove_item(item["id"])
+            self._generation += 1
+            restaurant_id = item["restaurant_id"]
+            self._meals[item["id"]] = {
+                "id": str(item["id"]),
+                "name": item["name"],
+                "price": float(item["price"]),
+                "is_available": item["is_available"],
+                "restaurant_name": self._restaurants.get(restaurant_id, ""),
+                "image_name": item["image_url"],
+            }
+            self._item_restaurant[item["id"]] = restaurant_id
+            self._restaurant_items.setdefault(restaurant_id, set()).add(
+                item["id"]
+            )
+            self._order_cache.pop(("r", restaurant_id), None)
+            for word in set(words(item["name"])):
+                self._add_word(self._item_words, word, item["id"])
+                self._order_cache.pop(("w", word), None)
+
+    def remove_item(self, item_id: str) -> None:
+        """Remove a menu item if indexed."""
+        with self._lock:
+            meal = self._meals.pop(item_id, None)
+            if meal is None:
+                return
+            self._generation += 1
+            restaurant_id = self._item_restaurant.pop(item_id)
+            self._restaurant_items[restaurant_id].discard(item_id)
+            self._order_cache.pop(("r", restaurant_id), None)
+            for word in set(words(meal["name"])):
+                self._remove_word(self._item_words, word, item_id)
+                self._order_cache.pop(("w", word), None)
+
+    def load(self, restaurants: Iterable[Tuple[str, str]],
+             items: Iterable[Dict[str, Any]]) -> None:
+        """
+        Replace the contents of the index.
+
+        Args:
+            restaurants: (id, name) pairs
+            items: menu_items column values
+        """
+        with self._lock:
+            self._clear()
+            for restaurant_id, name in restaurants:
+                self.put_restaurant(restaurant_id, name)
+            for item in items:
+                self.put_item(item)
+            self.loaded = True
+
+    def load_from_storage(self) -> None:
+        """Load every restaurant and menu item from DBStorage."""
+        from sqlalchemy import select
+        from models import storage
+        from models.menu_item import MenuItem
+        from models.restaurant import Restaurant
+
+        with self._lock:
+            columns = MenuItem.__table__.columns
+            with storage.session_scope() as session:
+                restaurants = session.execute(
+                    select(Restaurant.id, Restaurant.name)
+                ).all()
+                items = session.execute(select(*columns)).mappings().all()
+            self.load(restaurants, items)
+
+    def apply(self, changes: catalog.CatalogChanges) -> None:
+        """Follow committed catalog writes; subscribed to services.catalog."""
+        with self._lock:
+            if not self.loaded:
+                return
+            if changes.bulk:
+                self.loaded = False
+                return
+            # restaurants first so new items pick up their names
+            ordered = sorted(changes.rows.items(),
+                             key=lambda kv: kv[0][0] != "restaurants")
+            for (table, row_id), values in ordered:
+                if table == "restaurants":
+                    if values is None:
+                        self.remove_restaurant(row_id)
+                    else:
+                        self.put_restaurant(row_id, values["name"])
+                elif values is None:
+                    self.remove_item(row_id)
+                else:
+                    self.put_item(values)
+
+    def _candidates(self, word: str) -> Dict[str, int]:
+        """Return indexed words within the word's tolerance, by distance."""
+        limit = min(max_distance(word), self.distance)
+        found: Dict[str, int] = {}
+        for variant in deletes(word, limit):
+            for candidate in self._deletes.get(variant, ()):
+                if candidate not in found:
+                    distance = edit_distance(word, candidate, limit)
+                    if distance <= limit:
+                        found[candidate] = distance
+        return found
+
+    def _ordered(self, key: Tuple[str, str], ids: Set[str]) -> List[Any]:
+        """Return ids as (name, id) pairs sorted by name, cached per key."""
+        ordered = self._order_cache.get(key)
+        if ordered is None:
+            ordered = self._order_cache[key] = sorted(
+                (self._meals[item_id]["name"], item_id) for item_id in ids
+            )
+        return ordered
+
+    def _tiers(self, word: str) -> List[Tuple[float, Any, Set[str]]]:
+        """
+        Return (score, cache key, item ids) groups matching one word.
+
+        Groups are sorted best first: closer words score higher and
+        restaurant-name matches count RESTAURANT_WEIGHT of item ones.
+        """
+        tiers = []
+        for candidate, distance in self._candidates(word).items():
+            score = 1.0 / (1 + distance)
+            if candidate in self._item_words:
+                tiers.append((score, ("w", candidate),
+                              self._item_words[candidate]))
+            for restaurant_id in self._restaurant_words.get(candidate, ()):
+                tiers.append((score * RESTAURANT_WEIGHT, ("r", restaurant_id),
+                              self._restaurant_items.get(restaurant_id,
+                                                         set())))
+        tiers.sort(key=lambda tier: -tier[0])
+        return tiers
+
+    def _matches(self, word: str) -> Tuple[List[Any], Set[str]]:
+        """Return the tiers of a query word and every item they hold."""
+        key = (self._generation, word)
+        found = self._word_cache.get(key)
+        if found is None:
+            tiers = self._tiers(word)
+            found = (tiers, set().union(*(ids for _, _, ids in tiers)))
+            self._word_cache.set(key, found)
+        return found
+
+    def _walk(self, tiers: List[Tuple[float, Any, Set[str]]],
+              limit: int) -> List[str]:
+        """Return up to limit item ids of one word's tiers, best first."""
+        found: List[str] = []
+        seen: Set[str] = set()
+        for _, group in groupby(tiers, key=lambda tier: tier[0]):
+            merged = heapq.merge(*(self._ordered(key, ids)
+                                   for _, key, ids in group))
+            for _, item_id in merged:
+                if item_id not in seen:
+                    seen.add(item_id)
+                    found.append(item_id)
+                    if len(found) == limit:
+                        return found
+        return found
+
+    def _rank(self, per_word: List[List[Tuple[float, Any, Set[str]]]],
+              matched: Set[str], limit: int) -> List[str]:
+        """Return up to limit of the matched item ids, best first."""
+        # split matched by the best tier score of each word, then combine
+        # the splits into groups of equal total score with set operations
+        totals: Dict[float, Set[str]] = {0.0: matched}
+        for tiers in per_word:
+            unscored = set(matched)
+            buckets = []
+            for score, group in groupby(tiers, key=lambda tier: tier[0]):
+                hit: Set[str] = set()
+                for _, _, ids in group:
+                    hit |= unscored & ids
+                unscored -= hit
+                if hit:
+                    buckets.append((score, hit))
+            combined: Dict[float, Set[str]] = {}
+            for total, ids in totals.items():
+                for score, hit in buckets:
+                    both = ids & hit
+                    if both:
+                        combined.setdefault(total + score, set()).update(both)
+            totals = combined
+        best: List[str] = []
+        for total in sorted(totals, reverse=True):
+            best.extend(sorted(
+                totals[total],
+                key=lambda item_id: (self._meals[item_id]["name"], item_id),
+            )[:limit - len(best)])
+            if len(best) == limit:
+                break
+        return best
+
+    def search(self, query: str, restaurant: str = "All",
+               limit: int = MAX_RESULTS) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Return the best meals matching every word of query.
+
+        Each word may match a word of the item's or the restaurant's
+        name within its edit-distance tolerance; closer and item-name
+        matches score higher. Ties are ordered by name, then id.
+
+        Args:
+            query: Raw user input
+            restaurant: Restaurant name or "All"
+            limit: Maximum number of meals returned
+
+        Returns:
+            Up to limit meals as returned by /api/v1/search, and the
+            number of meals matching
+        """
+        query_words = words(query)
+        if not query_words:
+            return [], 0
+        with self._lock:
+            if not self.loaded:
+                self.load_from_storage()
+            per_word, unions = zip(*(self._matches(word)
+                                     for word in query_words))
+            # set unions and intersections run in C; only the returned
+            # page is ranked item by item
+            matched = unions[0] if len(unions) == 1 \
+                else set.intersection(*unions)
+            if restaurant != "All":
+                matched = matched & set().union(*(
+                    self._restaurant_items.get(restaurant_id, set())
+                    for restaurant_id, name in self._restaurants.items()
+                    if name == restaurant
+                ))
+            if len(per_word) == 1 and restaurant == "All":
+                best = self._walk(per_word[0], limit)
+            else:
+                best = self._rank(per_word, matched, limit)
+            return [self._meals[item_id] for item_id in best], len(matched)
+
+
+index = FuzzyIndex()
+catalog.subscribe(index.apply)
+
+
+def warm() -> None:
+    """Load the index at startup so the first typo costs no reload."""
+    if not ENABLED:
+        return
+    try:
+        index.load_from_storage()
+    except Exception as e:
+        print(f"Fuzzy index load failed: {e}")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Identity loading for Flask-Login.
+
+Authenticated requests resolve the session's user id through a bounded
+per-process cache of lightweight principals, falling back to a primary-key
+lookup through DBStorage on a miss.
+"""
+from os import getenv
+from typing import Any, Optional
+from flask_login import UserMixin
+from services.cache import LRUCache
+
+
+class ClientPrincipal(UserMixin):
+    """
+    Session-independent view of an authenticated client.
+
+    Attributes:
+        id: Client identifier
+        username: Client's username
+        email: Client's email address
+        address: Client's address
+    """
+
+    def __init__(self, id: str, username: str, email: str,
+                 address: str) -> None:
+        """Initialize a principal from plain column values."""
+        self.id = id
+        self.username = username
+        self.email = email
+        self.address = address
+
+    @classmethod
+    def from_client(cls, client: Any) -> "ClientPrincipal":
+        """
+        Build a principal from a Client instance.
+
+        Args:
+            client: Client model instance
+
+        Returns:
+            ClientPrincipal carrying the client's identity fields
+        """
+        return cls(
+            id=client.id,
+            username=client.username,
+            email=client.email,
+            address=client.address,
+        )
+
+
+class IdentityCache:
+    """Per-process LRU/TTL cache of client principals keyed by id."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of cached principals
+            ttl: Seconds before a principal is reloaded from storage
+        """
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def load(self, user_id: str) -> Optional[ClientPrincipal]:
+        """
+        Return the principal for user_id, loading it on a cache miss.
+
+        Args:
+            user_id: The unique identifier of the client
+
+        Returns:
+            ClientPrincipal if the client exists, None otherwise
+        """
+        principal = self._cache.get(user_id)
+        if principal is not None:
+            return principal
+
+        from models import storage
+        from models.client import Client
+
+        client = storage.get(Client, user_id)
+        if client is None:
+            return None
+        principal = ClientPrincipal.from_client(client)
+        self._cache.set(user_id, principal)
+        return principal
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop the cached principal for user_id."""
+        self._cache.delete(user_id)
+
+    def clear(self) -> None:
+        """Drop every cached principal."""
+        self._cache.clear()
+
+
+identity_cache = IdentityCache(
+    maxsize=int(getenv("FOODIFY_IDENTITY_CACHE_SIZE", "10000")),
+    ttl=float(getenv("FOODIFY_IDENTITY_CACHE_TTL", "300")),
+)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Cross-process invalidation of in-process caches.
+
+Caches derived from the database live in each worker, so a write made
+by another worker, or by console.py, has to be announced. Writers call
+publish() inside their transaction: it increments the channel's row in
+the cache_versions table, so the announcement commits or rolls back
+with the write. Every process polls the table before handling a
+request, at most once per FOODIFY_INVALIDATION_INTERVAL seconds, and
+calls a channel's subscribers when its version moved for a reason other
+than the process's own commits. A write made elsewhere is therefore
+seen within the interval, for the price of reading the few
+cache_versions rows once per interval and worker.
+
+FOODIFY_INVALIDATION=local swaps in LocalBus, a stand-in for a single
+process: it keeps the subscriptions but publishes and polls nothing.
+"""
+import threading
+import time
+from os import getenv
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+from models.cache_version import cache_versions
+
+INTERVAL = float(getenv("FOODIFY_INVALIDATION_INTERVAL", "1"))
+
+Listener = Callable[[], None]
+
+
+class LocalBus:
+    """Invalidation bus of a single process; nothing is announced."""
+
+    def __init__(self) -> None:
+        """Initialize a bus without subscribers."""
+        self._listeners: Dict[str, List[Listener]] = {}
+
+    def subscribe(self, channel: str, listener: Listener) -> None:
+        """Call listener when another process changes channel."""
+        self._listeners.setdefault(channel, []).append(listener)
+
+    def publish(self, conn: Connection, channel: str) -> Optional[int]:
+        """
+        Announce a change of channel in the transaction of conn.
+
+        Returns:
+            The channel version the transaction will commit, or None
+            when nothing is announced
+        """
+        return None
+
+    def committed(self, channel: str, version: Optional[int]) -> None:
+        """Record that a transaction which published channel committed."""
+
+    def poll(self, force: bool = False) -> List[str]:
+        """
+        Notify the subscribers of channels changed elsewhere.
+
+        Returns:
+            The channels whose subscribers were called
+        """
+        return []
+
+    def _notify(self, channels: List[str]) -> None:
+        """Call the subscribers of every channel in channels."""
+        for channel in channels:
+            for listener in list(self._listeners.get(channel, ())):
+                try:
+                    listener()
+                except Exception as e:
+                    print(f"Invalidation listener error: {e}")
+
+
+class TableBus(LocalBus):
+    """
+    Invalidation bus backed by the cache_versions table.
+
+    Attributes:
+        interval: Minimum seconds between two polls of the table
+    """
+
+    def __init__(self, interval: float = INTERVAL) -> None:
+        """
+        Initialize a bus that has not polled yet.
+
+        Args:
+            interval: Minimum seconds between polls
+        """
+        super().__init__()
+        self.interval = interval
+        # versions this process has accounted for; None until the first
+        # poll, after which a channel without a row is at version 0
+        self._seen: Optional[Dict[str, int]] = None
+        self._state = threading.Lock()
+        self._polling = threading.Lock()
+        self._polled = float("-inf")
+
+    def publish(self, conn: Connection, channel: str) -> Optional[int]:
+        """Increment the channel's version in the transaction of conn."""
+        from models.engine.db_storage import upsert_statement
+
+        conn.execute(upsert_statement(
+            conn.dialect.name, cache_versions, ["name"],
+            increment_columns=["version"],
+        ), {"name": channel, "version": 1})
+        return conn.execute(
+            select(cache_versions.c.version)
+            .where(cache_versions.c.name == channel)
+        ).scalar()
+
+    def committed(self, channel: str, version: Optional[int]) -> None:
+        """
+        Account for a committed publish of this process.
+
+        Subscribers are called only if versions were skipped, i.e.
+        another process committed a change since the last poll.
+        """
+        if version is None:
+            return
+        with self._state:
+            if self._seen is None:
+                return
+            seen = self._seen.get(channel, 0)
+            if version <= seen:
+                return
+            self._seen[channel] = version
+        if version > seen + 1:
+            self._notify([channel])
+
+    def poll(self, force: bool = False) -> List[str]:
+        """Read every channel version if interval has passed."""
+        if not force and time.monotonic() - self._polled < self.interval:
+            return []
+        # a poll already running in another thread answers for this one
+        if not self._polling.acquire(blocking=False):
+            return []
+        try:
+            self._polled = time.monotonic()
+            from models import storage
+
+            with storage.session_scope() as session:
+                rows = session.execute(
+                    select(cache_versions.c.name, cache_versions.c.version)
+                ).all()
+        except Exception as e:
+            print(f"Invalidation poll error: {e}")
+            return []
+        finally:
+            self._polling.release()
+
+        changed = []
+        with self._state:
+            first = self._seen is None
+            if first:
+                self._seen = {}
+            for name, version in rows:
+                # rows read before one of our commits may lag behind it
+                if version > self._seen.get(name, 0):
+                    self._seen[name] = version
+                    if not first:
+                        changed.append(name)
+        self._notify(changed)
+        return changed
+
+
+def _bus_from_env() -> LocalBus:
+    """Return the bus selected by FOODIFY_INVALIDATION."""
+    if getenv("FOODIFY_INVALIDATION", "table") == "local":
+        return LocalBus()
+    return TableBus()
+
+
+bus = _bus_from_env()
+
+
+def init_app(app: Any) -> None:
+    """Poll the bus before every request of a Flask app."""
+    @app.before_request
+    def poll_invalidations() -> None:
+        bus.poll()
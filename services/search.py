@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Menu search with keyset pagination.
+
+Results are ordered by (name, id) by default, or by (price, id) or
+(popularity desc, id); each order is unique and covered by an index on
+menu_items. The opaque cursor returned with a page encodes the last
+row's key, so the next page is a range scan starting right after it
+instead of an OFFSET that re-reads every earlier row. Plain page
+numbers are still accepted for clients that jump around. Price range
+and availability filters narrow any of these orders.
+
+With FOODIFY_SEARCH_MODE=fulltext, the query is matched against menu
+item and restaurant names through the database's full-text index (see
+models.engine.fulltext) and results are ranked by relevance.
+
+On request, a page also carries facet counts: matches per restaurant,
+available or not, and per price bucket. They come from one GROUP BY over
+(restaurant, availability, price bucket) for the query, so the filter
+menu can show every restaurant's count without a request per option.
+
+Whole pages are kept in a TTL/LRU response cache, and the total of a
+search and the facet groups of a query in a longer-lived count cache.
+Both are keyed on the catalog version, so menu writes invalidate them,
+including writes of other processes once services.invalidation notices
+them. On a miss, identical concurrent searches share one database
+query through a SingleFlight.
+"""
+import base64
+import binascii
+import json
+from bisect import bisect_right
+from decimal import Decimal, InvalidOperation
+from os import getenv
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.orm import contains_eager
+from models.engine import fulltext
+from models.engine.db_storage import FULLTEXT_SEARCH
+from models.menu_item import MenuItem
+from models.restaurant import Restaurant
+from services import catalog, fuzzy
+from services.cache import LRUCache
+from services.singleflight import SingleFlight
+
+PER_PAGE = 8
+SORTS = ("name", "price", "popularity")
+# upper bounds of the facet price buckets; the last bucket is open-ended
+PRICE_BUCKETS = (10, 20, 30)
+PRICE_LABELS = [f"{low}-{high}" for low, high in
+                zip((0,) + PRICE_BUCKETS, PRICE_BUCKETS)] + \
+    [f"{PRICE_BUCKETS[-1]}+"]
+
+count_cache = LRUCache(
+    maxsize=int(getenv("FOODIFY_SEARCH_COUNT_CACHE_SIZE", "1024"))
+)
+page_cache = LRUCache(
+    maxsize=int(getenv("FOODIFY_SEARCH_CACHE_SIZE", "512")),
+    ttl=float(getenv("FOODIFY_SEARCH_CACHE_TTL", "60")),
+)
+flight = SingleFlight()
+
+
+class SearchError(Exception):
+    """A search request that cannot be answered."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        """
+        Initialize the error.
+
+        Args:
+            message: Description returned to the client
+            status: HTTP status code for the response
+        """
+        super().__init__(message)
+        self.status = status
+
+
+class Filters(NamedTuple):
+    """
+    Narrowing applied on top of the query and restaurant.
+
+    Attributes:
+        min_price: Lowest price included, or None
+        max_price: Highest price included, or None
+        available_only: Leave out meals marked unavailable
+    """
+
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    available_only: bool = False
+
+    def apply(self, stmt: Any) -> Any:
+        """Return stmt restricted to matching menu items."""
+        if self.min_price is not None:
+            stmt = stmt.where(MenuItem.price >= self.min_price)
+        if self.max_price is not None:
+            stmt = stmt.where(MenuItem.price <= self.max_price)
+        if self.available_only:
+            # an equality, not IS TRUE, so it is a prefix of the
+            # (is_available, price, id) index; NULL counts as unavailable
+            # here, in the facets and in accepts()
+            stmt = stmt.where(MenuItem.is_available == True)  # noqa: E712
+        return stmt
+
+    def accepts(self, meal: Dict[str, Any]) -> bool:
+        """Return True if a meal dictionary passes the filters."""
+        return (self.min_price is None or meal["price"] >= self.min_price) \
+            and (self.max_price is None or meal["price"] <= self.max_price) \
+            and not (self.available_only and not meal["is_available"])
+
+
+class Facets(NamedTuple):
+    """
+    Match counts of a search, by dimension.
+
+    The restaurant counts ignore the restaurant filter, so they tell how
+    many meals each choice would return; the others respect it.
+
+    Attributes:
+        restaurants: Matches per restaurant name
+        availability: Matches per "available" and "unavailable"
+        prices: Matches per price bucket label, see price_bucket
+    """
+
+    restaurants: Dict[str, int]
+    availability: Dict[str, int]
+    prices: Dict[str, int]
+
+
+class SearchPage(NamedTuple):
+    """
+    One page of search results.
+
+    Attributes:
+        meals: Meals as returned by /api/v1/search
+        total: Number of meals matching the search
+        next_cursor: Cursor of the following page, None on the last one
+        fuzzy: True when nothing matched exactly and the meals are
+            typo-tolerant matches from the in-memory index
+        facets: Match counts, when requested
+    """
+
+    meals: List[Dict[str, Any]]
+    total: int
+    next_cursor: Optional[str]
+    fuzzy: bool = False
+    facets: Optional[Facets] = None
+
+
+def encode_cursor(*key: Any) -> str:
+    """Encode the sort key of the last row on a page."""
+    raw = json.dumps(list(key), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[Any] = (str, str)) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor from a previous page
+        types: Expected type of each value of the current sort key
+
+    Raises:
+        SearchError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError, binascii.Error):
+        raise SearchError("Invalid cursor")
+    if not isinstance(key, list) or len(key) != len(types) or \
+            not all(isinstance(v, t) for v, t in zip(key, types)):
+        raise SearchError("Invalid cursor")
+    return key
+
+
+def normalize(query: str, restaurant: str) -> Tuple[str, str]:
+    """Fold case and whitespace so equivalent searches share entries."""
+    return " ".join(query.lower().split()), restaurant.strip() or "All"
+
+
+def _ranked(dialect: str, query: str) -> Any:
+    """Return the full-text (id, score) subquery, or None to use ILIKE."""
+    if query and FULLTEXT_SEARCH:
+        return fulltext.ranked_matches(dialect, query)
+    return None
+
+
+def _count(session: Any, dialect: str, query: str, restaurant: str,
+           filters: Filters) -> int:
+    """Return the number of matching meals, cached per catalog version."""
+    key = (catalog.version(), query, restaurant, filters)
+    total = count_cache.get(key)
+    if total is not None:
+        return total
+
+    ranked = _ranked(dialect, query)
+    if ranked is not None and restaurant == "All" and filters == Filters():
+        # one index row per menu item: no need to touch menu_items
+        stmt = select(func.count()).select_from(ranked)
+    else:
+        stmt = select(func.count(MenuItem.id)).join(MenuItem.restaurant)
+        if ranked is not None:
+            stmt = stmt.join(ranked, ranked.c.id == MenuItem.id)
+        elif query:
+            stmt = stmt.where(MenuItem.name.ilike(f"%{query}%"))
+        if restaurant != "All":
+            stmt = stmt.where(Restaurant.name == restaurant)
+        stmt = filters.apply(stmt)
+    total = session.execute(stmt).scalar_one()
+    count_cache.set(key, total)
+    return total
+
+
+def price_bucket(price: float) -> str:
+    """Return the facet label of the bucket holding price."""
+    return PRICE_LABELS[bisect_right(PRICE_BUCKETS, price)]
+
+
+def _tally(groups: List[Tuple[str, bool, str, int]],
+           restaurant: str) -> Facets:
+    """Sum (restaurant, available, bucket, count) groups into Facets."""
+    facets = Facets({}, {"available": 0, "unavailable": 0},
+                    dict.fromkeys(PRICE_LABELS, 0))
+    for name, available, bucket, count in groups:
+        facets.restaurants[name] = facets.restaurants.get(name, 0) + count
+        if restaurant in ("All", name):
+            facets.availability[
+                "available" if available else "unavailable"] += count
+            facets.prices[bucket] += count
+    return facets
+
+
+def _facet_groups(session: Any, dialect: str, query: str,
+                  filters: Filters) -> List[Tuple[str, bool, str, int]]:
+    """
+    Return match counts per (restaurant, availability, price bucket).
+
+    One GROUP BY for the query, cached per catalog version.
+    """
+    key = ("facets", catalog.version(), query, filters)
+    groups = count_cache.get(key)
+    if groups is not None:
+        return groups
+
+    bucket = case(
+        *((MenuItem.price < high, label)
+          for high, label in zip(PRICE_BUCKETS, PRICE_LABELS)),
+        else_=PRICE_LABELS[-1],
+    ).label("bucket")
+    available = MenuItem.is_available.label("available")
+    stmt = (
+        select(Restaurant.name, available, bucket, func.count(MenuItem.id))
+        .join(MenuItem.restaurant)
+        .group_by(Restaurant.name, available, bucket)
+    )
+    ranked = _ranked(dialect, query)
+    if ranked is not None:
+        stmt = stmt.join(ranked, ranked.c.id == MenuItem.id)
+    elif query:
+        stmt = stmt.where(MenuItem.name.ilike(f"%{query}%"))
+    groups = [(name, bool(avail), label, count)
+              for name, avail, label, count
+              in session.execute(filters.apply(stmt))]
+    count_cache.set(key, groups)
+    return groups
+
+
+def _keyset(first: Any, second: Any, key: List[Any],
+            descending: bool = False) -> Any:
+    """Return the condition for rows sorting after key."""
+    beyond = first < key[0] if descending else first > key[0]
+    return or_(beyond, and_(first == key[0], second > key[1]))
+
+
+def _decode_price(value: str) -> Decimal:
+    """Parse the price of a price-sorted cursor."""
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise SearchError("Invalid cursor")
+
+
+def search(
+    query: str = "",
+    restaurant: str = "All",
+    cursor: Optional[str] = None,
+    page: int = 1,
+    per_page: int = PER_PAGE,
+    with_facets: bool = False,
+    filters: Filters = Filters(),
+    sort: Optional[str] = None,
+) -> SearchPage:
+    """
+    Return one page of meals matching a search.
+
+    With FOODIFY_SEARCH_MODE=fulltext, results matching query are
+    ordered by relevance, then id, and the cursor carries the score,
+    unless another sort is asked for. When nothing matches,
+    typo-tolerant matches from services.fuzzy are returned instead,
+    paginated by page number only.
+    Without a restaurant filter or other filters, the relevance-ordered
+    page is cut inside the full-text query, so only the returned rows
+    are joined to menu_items.
+
+    Args:
+        query: Lower-cased search term, may be empty
+        restaurant: Restaurant name or "All"
+        cursor: next_cursor of the previous page; takes precedence over page
+        page: 1-based page number, used when no cursor is given
+        per_page: Meals per page
+        with_facets: Also count matches per restaurant, availability
+            and price bucket
+        filters: Price range and availability filters
+        sort: One of SORTS, or None for relevance (full-text mode with a
+            query) or name
+
+    Returns:
+        The SearchPage
+
+    Raises:
+        SearchError: If the cursor, page or sort is invalid
+    """
+    from models import storage
+
+    if page < 1:
+        raise SearchError("page must be at least 1")
+    if sort is not None and sort not in SORTS:
+        raise SearchError(f"sort must be one of {', '.join(SORTS)}")
+    ranked = _ranked(storage.dialect, query)
+    if sort is None:
+        sort = "name" if ranked is None else "relevance"
+    offset = 0 if cursor or page == 1 else (page - 1) * per_page
+
+    stmt = select(MenuItem).join(MenuItem.restaurant)
+    if ranked is None and query:
+        stmt = stmt.where(MenuItem.name.ilike(f"%{query}%"))
+    elif ranked is not None:
+        if sort == "relevance" and restaurant == "All" and \
+                filters == Filters():
+            key = decode_cursor(cursor, ((int, float), str)) \
+                if cursor else None
+            top = select(ranked.c.id, ranked.c.score)
+            if key:
+                top = top.where(_keyset(ranked.c.score, ranked.c.id, key,
+                                        descending=True))
+            ranked = (
+                top.order_by(ranked.c.score.desc(), ranked.c.id)
+                .limit(per_page + 1).offset(offset)
+                .subquery("top")
+            )
+            offset = 0
+            cursor = None
+        stmt = (
+            select(MenuItem, ranked.c.score)
+            .join(ranked, ranked.c.id == MenuItem.id)
+            .join(MenuItem.restaurant)
+        )
+
+    # (first sort column, cursor type, descending) per sort; id breaks ties
+    if sort == "relevance":
+        first, kind, descending = ranked.c.score, (int, float), True
+    elif sort == "price":
+        # prices travel as strings so the cursor keeps their exact value
+        first, kind, descending = MenuItem.price, str, False
+    elif sort == "popularity":
+        first, kind, descending = MenuItem.popularity, int, True
+    else:
+        first, kind, descending = MenuItem.name, str, False
+    if cursor:
+        key = decode_cursor(cursor, (kind, str))
+        if sort == "price":
+            key[0] = _decode_price(key[0])
+        stmt = stmt.where(_keyset(first, MenuItem.id, key, descending))
+    if restaurant != "All":
+        stmt = stmt.where(Restaurant.name == restaurant)
+    stmt = (
+        filters.apply(stmt)
+        .options(contains_eager(MenuItem.restaurant))
+        .order_by(first.desc() if descending else first, MenuItem.id)
+        .limit(per_page + 1)
+        .offset(offset)
+    )
+
+    with storage.session_scope() as session:
+        rows = session.execute(stmt).all()
+        meals = [
+            {
+                "id": str(meal.id),
+                "name": meal.name,
+                "price": float(meal.price),
+                "is_available": meal.is_available,
+                "restaurant_name": meal.restaurant.name,
+                "image_name": meal.image_url,
+            }
+            for meal, *_ in rows[:per_page]
+        ]
+        total = _count(session, storage.dialect, query, restaurant, filters)
+        facets = _tally(
+            _facet_groups(session, storage.dialect, query, filters),
+            restaurant,
+        ) if with_facets else None
+        next_cursor = None
+        if len(rows) > per_page:
+            last, *score = rows[per_page - 1]
+            value = {
+                "relevance": score and score[0],
+                "price": str(last.price),
+                "popularity": last.popularity,
+            }.get(sort, last.name)
+            next_cursor = encode_cursor(value, last.id)
+
+    if total == 0 and query and fuzzy.ENABLED:
+        # total counts the meals that can be paged to, not every match
+        similar, _ = fuzzy.index.search(query, restaurant)
+        similar = [meal for meal in similar if filters.accepts(meal)]
+        start = (page - 1) * per_page
+        if with_facets:
+            everywhere, _ = fuzzy.index.search(query)
+            facets = _tally([(meal["restaurant_name"],
+                              bool(meal["is_available"]),
+                              price_bucket(meal["price"]), 1)
+                             for meal in everywhere
+                             if filters.accepts(meal)], restaurant)
+        return SearchPage(similar[start:start + per_page], len(similar),
+                          None, fuzzy=True, facets=facets)
+    return SearchPage(meals, total, next_cursor, facets=facets)
+
+
+def cached_search(
+    query: str = "",
+    restaurant: str = "All",
+    cursor: Optional[str] = None,
+    page: int = 1,
+    per_page: int = PER_PAGE,
+    with_facets: bool = False,
+    filters: Filters = Filters(),
+    sort: Optional[str] = None,
+) -> Tuple[SearchPage, bool]:
+    """
+    Return a page of search results through the response cache.
+
+    Takes the same arguments as search.
+
+    Returns:
+        The SearchPage and whether it came from the cache or from a
+        concurrent identical request
+
+    Raises:
+        SearchError: If the cursor or page is invalid
+    """
+    query, restaurant = normalize(query, restaurant)
+    position = ("cursor", cursor) if cursor else ("page", page)
+    # read the version first: a page built while a write commits is
+    # stored under the old version and never served after the bump
+    key = (catalog.version(), query, restaurant, position, per_page,
+           with_facets, filters, sort)
+    result = page_cache.get(key)
+    if result is not None:
+        return result, True
+
+    def load() -> SearchPage:
+        page_result = search(query, restaurant, cursor, page, per_page,
+                             with_facets, filters, sort)
+        page_cache.set(key, page_result)
+        return page_result
+
+    result, shared = flight.do(key, load)
+    return result, shared
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Return hit, miss and coalescing counters of the search caches."""
+    return {"pages": page_cache.stats(), "counts": count_cache.stats(),
+            "coalesced": flight.stats()}
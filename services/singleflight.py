@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Request coalescing for identical concurrent reads.
+
+When many threads ask for the same key at once, the first caller runs
+the load and the others block until it finishes and receive the same
+result (or exception). Nothing is remembered once the call returns;
+pair it with a cache so later requests do not reload either.
+
+Waiters give up on a load after FOODIFY_SINGLEFLIGHT_WAIT seconds and
+run it themselves, so a hung query holds up only its own caller rather
+than everyone who joined it.
+"""
+import threading
+from os import getenv
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+# keep below the server's worker timeout (30 s in gunicorn.conf.py)
+WAIT_TIMEOUT = float(getenv("FOODIFY_SINGLEFLIGHT_WAIT", "10"))
+
+
+class _Call:
+    """A load in progress and its outcome."""
+
+    def __init__(self) -> None:
+        """Initialize a call that has not finished yet."""
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Run at most one load per key at a time and share its result.
+
+    Results are shared between threads, so loads should return plain
+    values rather than ORM instances bound to the loading thread's
+    session.
+
+    Attributes:
+        wait_timeout: Seconds a caller waits for another caller's load
+            before running its own
+        calls: Number of loads actually run
+        shared: Number of callers served by another caller's load
+        timeouts: Number of callers that stopped waiting and loaded
+    """
+
+    def __init__(self, wait_timeout: float = WAIT_TIMEOUT) -> None:
+        """
+        Initialize with no load in flight.
+
+        Args:
+            wait_timeout: Seconds to wait for a shared load
+        """
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.shared = 0
+        self.timeouts = 0
+
+    def do(self, key: Hashable, load: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Return load()'s result, joining a load already running for key.
+
+        Args:
+            key: Identity of the read; equal keys share one load
+            load: Function performing the read
+
+        A caller whose wait for another caller's load exceeds
+        wait_timeout runs load itself, without joining or replacing the
+        load in flight.
+
+        Returns:
+            The result and whether it came from another caller's load
+
+        Raises:
+            Whatever load raised, in every caller waiting on it
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            if not call.done.wait(self.wait_timeout):
+                with self._lock:
+                    self.shared -= 1
+                    self.timeouts += 1
+                    self.calls += 1
+                return load(), False
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = load()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report coalescing counters.
+
+        Returns:
+            Dictionary with loads run, callers that shared a load,
+            callers that timed out waiting and loads currently in flight
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "shared": self.shared,
+                "timeouts": self.timeouts,
+                "in_flight": len(self._calls),
+            }
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Search-bar suggestions served from memory.
+
+SuggestIndex holds the distinct menu item and restaurant names, each
+weighted by popularity: units ordered through confirmed orders, summed
+over the items sharing a name, and over its menu for a restaurant. A
+name is suggested for a prefix of any of its words, so "marg" finds
+"Pizza Margherita".
+
+The prefix trie is stored flattened: every (key, name) pair sits in one
+sorted list, so the keys below a trie node are the contiguous slice
+bisection finds for its prefix. Nodes covering more than SCAN_LIMIT
+keys keep their top suggestions precomputed and updated as names and
+weights change; smaller slices are ranked when asked. Answering never
+queries the database: the index loads in the background and follows
+the catalog and confirmed orders in process.
+"""
+import heapq
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from services import catalog
+from services.fuzzy import words
+
+# suggestions kept per precomputed prefix, the most a request can get
+TOP_K = 10
+# slices up to this many keys are ranked per request
+SCAN_LIMIT = 64
+# keys and prefixes are cut here; longer prefixes rarely narrow further
+KEY_LENGTH = 40
+
+Suggestion = Tuple[str, str]  # (kind, normalized name)
+
+
+def normalize(text: str) -> str:
+    """Lower-case text and join its words with single spaces."""
+    return " ".join(words(text))
+
+
+def name_keys(name: str) -> Set[str]:
+    """Return the keys a normalized name is found under, one per word."""
+    parts = name.split(" ")
+    return {" ".join(parts[i:])[:KEY_LENGTH] for i in range(len(parts))}
+
+
+def _successor(prefix: str) -> str:
+    """Return the smallest string sorting after every prefix match."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class SuggestIndex:
+    """In-memory prefix index of menu item and restaurant names."""
+
+    # attributes a load swaps in at once
+    _CONTENTS = ("_keys", "_texts", "_items", "_restaurants",
+                 "_restaurant_popularity", "_weights", "_members", "_top")
+
+    def __init__(self) -> None:
+        """Initialize an empty, unloaded index."""
+        self._lock = threading.RLock()
+        self._loader: Optional[threading.Thread] = None
+        self._stale = False
+        self._replace([], {}, {}, {}, {})
+        self.loaded = False
+
+    def _replace(self, keys: List[Tuple[str, Suggestion]],
+                 texts: Dict[Suggestion, str],
+                 items: Dict[str, Tuple[Suggestion, str, int]],
+                 restaurants: Dict[str, Suggestion],
+                 restaurant_popularity: Dict[str, int]) -> None:
+        """Install new contents and precompute the busy prefixes."""
+        self._keys = keys
+        self._texts = texts
+        self._items = items
+        self._restaurants = restaurants
+        self._restaurant_popularity = restaurant_popularity
+        self._weights: Dict[Suggestion, int] = dict.fromkeys(texts, 0)
+        self._members: Dict[Suggestion, int] = dict.fromkeys(texts, 0)
+        for suggestion, _, popularity in items.values():
+            self._weights[suggestion] += popularity
+            self._members[suggestion] += 1
+        for restaurant_id, suggestion in restaurants.items():
+            self._weights[suggestion] += \
+                restaurant_popularity.get(restaurant_id, 0)
+            self._members[suggestion] += 1
+        self._top: Dict[str, List[Suggestion]] = {}
+        self._compute("", 0, len(keys), build=True)
+
+    def _rank(self, suggestion: Suggestion) -> Tuple[int, str, str]:
+        """Sort key: most popular first, then by name."""
+        return -self._weights[suggestion], suggestion[1], suggestion[0]
+
+    def _best(self, suggestions: Iterable[Suggestion]) -> List[Suggestion]:
+        """Return the TOP_K best distinct suggestions."""
+        return heapq.nsmallest(TOP_K, set(suggestions), key=self._rank)
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        """Return the slice of keys starting with prefix."""
+        if not prefix:
+            return 0, len(self._keys)
+        return (bisect_left(self._keys, (prefix,)),
+                bisect_left(self._keys, (_successor(prefix),)))
+
+    def _compute(self, prefix: str, lo: int, hi: int,
+                 build: bool = False) -> List[Suggestion]:
+        """
+        Return the top suggestions of keys[lo:hi], all starting with prefix.
+
+        Slices longer than SCAN_LIMIT merge the tops of their children,
+        one per next character, and store the result. With build the
+        children are computed too; otherwise their stored tops are used.
+        """
+        keys = self._keys
+        if hi - lo <= SCAN_LIMIT:
+            return self._best(suggestion for _, suggestion in keys[lo:hi])
+        depth = len(prefix)
+        candidates: List[Suggestion] = []
+        position = lo
+        while position < hi:
+            key, suggestion = keys[position]
+            if len(key) == depth:
+                candidates.append(suggestion)
+                position += 1
+                continue
+            child = key[:depth + 1]
+            end = bisect_left(keys, (_successor(child),), position, hi)
+            if build or (end - position > SCAN_LIMIT
+                         and child not in self._top):
+                candidates.extend(self._compute(child, position, end, build))
+            elif end - position > SCAN_LIMIT:
+                candidates.extend(self._top[child])
+            else:
+                candidates.extend(s for _, s in keys[position:end])
+            position = end
+        top = self._top[prefix] = self._best(candidates)
+        return top
+
+    def _refresh(self, suggestion: Suggestion, change: str) -> None:
+        """
+        Update the stored tops of the prefixes of a changed name.
+
+        Args:
+            suggestion: Name that changed
+            change: "moved" if its keys were added or removed, which may
+                make prefixes cross SCAN_LIMIT, "raised" or "lowered" if
+                only its weight changed
+        """
+        prefixes = {key[:length] for key in name_keys(suggestion[1])
+                    for length in range(1, len(key) + 1)}
+        if change != "moved":
+            prefixes &= self._top.keys()
+        # deepest first, so parents merge up-to-date children
+        for prefix in sorted(prefixes, key=len, reverse=True):
+            top = self._top.get(prefix)
+            if change == "raised":
+                # nothing else moved, so a rise only reorders this top
+                if suggestion in top or len(top) < TOP_K or \
+                        self._rank(suggestion) < self._rank(top[-1]):
+                    top = set(top)
+                    top.add(suggestion)
+                    self._top[prefix] = self._best(top)
+            elif change == "moved" or suggestion in top:
+                lo, hi = self._range(prefix)
+                if hi - lo <= SCAN_LIMIT:
+                    self._top.pop(prefix, None)
+                else:
+                    self._compute(prefix, lo, hi)
+
+    def _link(self, suggestion: Suggestion, text: str, weight: int) -> None:
+        """Count one more item or restaurant under a name."""
+        if suggestion in self._members:
+            self._members[suggestion] += 1
+            self._reweigh(suggestion, weight)
+            return
+        self._members[suggestion] = 1
+        self._weights[suggestion] = weight
+        self._texts[suggestion] = text
+        for key in name_keys(suggestion[1]):
+            insort(self._keys, (key, suggestion))
+        self._refresh(suggestion, "moved")
+
+    def _unlink(self, suggestion: Suggestion, weight: int) -> None:
+        """Count one item or restaurant less under a name."""
+        self._members[suggestion] -= 1
+        if self._members[suggestion]:
+            self._reweigh(suggestion, -weight)
+            return
+        del self._members[suggestion]
+        del self._weights[suggestion]
+        del self._texts[suggestion]
+        for key in name_keys(suggestion[1]):
+            del self._keys[bisect_left(self._keys, (key, suggestion))]
+        self._refresh(suggestion, "moved")
+
+    def _reweigh(self, suggestion: Suggestion, delta: int) -> None:
+        """Change the popularity of a name."""
+        if delta:
+            self._weights[suggestion] += delta
+            self._refresh(suggestion,
+                          "raised" if delta > 0 else "lowered")
+
+    def put_restaurant(self, restaurant_id: str, name: str) -> None:
+        """Add or rename a restaurant."""
+        suggestion = ("restaurant", normalize(name))
+        with self._lock:
+            old = self._restaurants.get(restaurant_id)
+            if old == suggestion or not suggestion[1]:
+                return
+            popularity = self._restaurant_popularity.get(restaurant_id, 0)
+            if old is not None:
+                self._unlink(old, popularity)
+            self._restaurants[restaurant_id] = suggestion
+            self._link(suggestion, name, popularity)
+
+    def remove_restaurant(self, restaurant_id: str) -> None:
+        """Remove a restaurant and its items."""
+        with self._lock:
+            for item_id, (_, owner, _) in list(self._items.items()):
+                if owner == restaurant_id:
+                    self.remove_item(item_id)
+            suggestion = self._restaurants.pop(restaurant_id, None)
+            if suggestion is not None:
+                self._unlink(suggestion, 0)
+            self._restaurant_popularity.pop(restaurant_id, None)
+
+    def _add_popularity(self, restaurant_id: str, delta: int) -> None:
+        """Carry an item's popularity change to its restaurant."""
+        self._restaurant_popularity[restaurant_id] = \
+            self._restaurant_popularity.get(restaurant_id, 0) + delta
+        if restaurant_id in self._restaurants:
+            self._reweigh(self._restaurants[restaurant_id], delta)
+
+    def put_item(self, item: Dict[str, Any]) -> None:
+        """
+        Add or update a menu item.
+
+        Args:
+            item: menu_items column values
+        """
+        suggestion = ("meal", normalize(item["name"]))
+        popularity = item.get("popularity") or 0
+        with self._lock:
+            if self._items.get(item["id"]) == (
+                suggestion, item["restaurant_id"], popularity
+            ):
+                return
+            self.remove_item(item["id"])
+            if not suggestion[1]:
+                return
+            self._items[item["id"]] = (suggestion, item["restaurant_id"],
+                                       popularity)
+            self._link(suggestion, item["name"], popularity)
+            self._add_popularity(item["restaurant_id"], popularity)
+
+    def remove_item(self, item_id: str) -> None:
+        """Remove a menu item if indexed."""
+        with self._lock:
+            entry = self._items.pop(item_id, None)
+            if entry is None:
+                return
+            suggestion, restaurant_id, popularity = entry
+            self._unlink(suggestion, popularity)
+            self._add_popularity(restaurant_id, -popularity)
+
+    def record_orders(self, quantities: Dict[str, int]) -> None:
+        """
+        Add confirmed order quantities to the items' popularity.
+
+        Args:
+            quantities: Units ordered per menu item id
+        """
+        with self._lock:
+            for item_id, quantity in quantities.items():
+                if item_id not in self._items or not quantity:
+                    continue
+                suggestion, restaurant_id, popularity = self._items[item_id]
+                self._items[item_id] = (suggestion, restaurant_id,
+                                        popularity + quantity)
+                self._reweigh(suggestion, quantity)
+                self._add_popularity(restaurant_id, quantity)
+
+    def load(self, restaurants: Iterable[Tuple[str, str]],
+             items: Iterable[Dict[str, Any]]) -> None:
+        """
+        Replace the contents of the index.
+
+        The new contents are built before the lock is taken, so readers
+        keep getting the previous suggestions meanwhile.
+
+        Args:
+            restaurants: (id, name) pairs
+            items: menu_items column values
+        """
+        texts: Dict[Suggestion, str] = {}
+        restaurant_ids: Dict[str, Suggestion] = {}
+        entries: Dict[str, Tuple[Suggestion, str, int]] = {}
+        popularity: Dict[str, int] = {}
+        for restaurant_id, name in restaurants:
+            suggestion = ("restaurant", normalize(name))
+            if suggestion[1]:
+                texts.setdefault(suggestion, name)
+                restaurant_ids[restaurant_id] = suggestion
+        for item in items:
+            suggestion = ("meal", normalize(item["name"]))
+            if not suggestion[1]:
+                continue
+            texts.setdefault(suggestion, item["name"])
+            ordered = item.get("popularity") or 0
+            entries[item["id"]] = (suggestion, item["restaurant_id"],
+                                   ordered)
+            popularity[item["restaurant_id"]] = \
+                popularity.get(item["restaurant_id"], 0) + ordered
+        keys = sorted((key, suggestion) for suggestion in texts
+                      for key in name_keys(suggestion[1]))
+        fresh = SuggestIndex()
+        fresh._replace(keys, texts, entries, restaurant_ids, popularity)
+        with self._lock:
+            for name in self._CONTENTS:
+                setattr(self, name, getattr(fresh, name))
+            self.loaded = True
+
+    def load_from_storage(self) -> None:
+        """Load every restaurant and menu item from DBStorage."""
+        from sqlalchemy import select
+        from models import storage
+        from models.menu_item import MenuItem
+        from models.restaurant import Restaurant
+
+        with storage.session_scope() as session:
+            restaurants = session.execute(
+                select(Restaurant.id, Restaurant.name)
+            ).all()
+            items = session.execute(
+                select(MenuItem.id, MenuItem.name, MenuItem.restaurant_id,
+                       MenuItem.popularity)
+            ).mappings().all()
+        self.load(restaurants, items)
+
+    def _reload(self) -> None:
+        """Reload until no bulk write happened during the last load."""
+        from models import storage
+
+        try:
+            while True:
+                self._stale = False
+                try:
+                    self.load_from_storage()
+                except Exception as e:
+                    print(f"Suggestion index load failed: {e}")
+                    break
+                if not self._stale:
+                    break
+        finally:
+            # outside an app context the session belongs to this thread,
+            # and nothing else would release it
+            storage.close()
+            with self._lock:
+                self._loader = None
+
+    def reload_in_background(self) -> threading.Thread:
+        """Start a reload unless one is running; return its thread."""
+        with self._lock:
+            self._stale = True
+            if self._loader is None:
+                self._loader = threading.Thread(target=self._reload,
+                                                daemon=True)
+                self._loader.start()
+            return self._loader
+
+    def apply(self, changes: catalog.CatalogChanges) -> None:
+        """Follow committed catalog writes; subscribed to services.catalog."""
+        with self._lock:
+            if changes.bulk:
+                if self.loaded or self._loader is not None:
+                    self.reload_in_background()
+                return
+            if not self.loaded:
+                return
+            # restaurants first so their popularity follows new items
+            ordered = sorted(changes.rows.items(),
+                             key=lambda kv: kv[0][0] != "restaurants")
+            for (table, row_id), values in ordered:
+                if table == "restaurants":
+                    if values is None:
+                        self.remove_restaurant(row_id)
+                    else:
+                        self.put_restaurant(row_id, values["name"])
+                elif values is None:
+                    self.remove_item(row_id)
+                else:
+                    self.put_item(values)
+
+    def suggest(self, prefix: str, limit: int = TOP_K) -> List[Dict[str, str]]:
+        """
+        Return the most popular names with a word starting with prefix.
+
+        An index that is not loaded yet starts loading in the background
+        and answers with no suggestions meanwhile.
+
+        Args:
+            prefix: Raw search-bar input
+            limit: Maximum number of suggestions, at most TOP_K
+
+        Returns:
+            Dictionaries with the suggestion text and its type,
+            "meal" or "restaurant"
+        """
+        key = normalize(prefix)
+        if key and prefix[-1:].isspace():
+            key += " "
+        key = key[:KEY_LENGTH]
+        if not key:
+            return []
+        with self._lock:
+            if not self.loaded:
+                self.reload_in_background()
+                return []
+            lo, hi = self._range(key)
+            if hi - lo <= SCAN_LIMIT:
+                top = self._best(s for _, s in self._keys[lo:hi])
+            else:
+                top = self._top.get(key) or self._compute(key, lo, hi)
+            return [{"text": self._texts[s], "type": s[0]}
+                    for s in top[:limit]]
+
+
+index = SuggestIndex()
+catalog.subscribe(index.apply)
+
+
+def warm() -> None:
+    """Load the index at startup so suggestions are ready at once."""
+    try:
+        index.load_from_storage()
+    except Exception as e:
+        print(f"Suggestion index load failed: {e}")
@@ -88,28 +88,65 @@ document.addEventListener("DOMContentLoaded", () => {
     couponMessage.className = `coupon-message ${type}`;
   }
 
+  /** @type {number|null} Cart version of the totals on screen */
+  let cartVersion = null;
+  /** @type {{subtotal: string, total: string}|null} */
+  let lastTotals = null;
+
+  function renderTotals(data) {
+    let subtotal = parseFloat(data.subtotal);
+    let total = parseFloat(data.total);
+
+    if (appliedCoupon) {
+      const discount = total * (appliedCoupon / 100);
+      total -= discount;
+    }
+
+    document.getElementById("subtotal").textContent = `$${subtotal.toFixed(
+      2
+    )}`;
+    document.getElementById("total").textContent = `$${total.toFixed(2)}`;
+  }
+
   function updateTotals() {
-    fetch("/api/v1/payment/totals")
-      .then((response) => response.json())
-      .then((data) => {
-        let subtotal = parseFloat(data.subtotal);
-        let total = parseFloat(data.total);
-
-        if (appliedCoupon) {
-          const discount = total * (appliedCoupon / 100);
-          total -= discount;
-        }
+    if (lastTotals) renderTotals(lastTotals);
+  }
 
-        document.getElementById("subtotal").textContent = `$${subtotal.toFixed(
-          2
-        )}`;
-        document.getElementById("total").textContent = `$${total.toFixed(2)}`;
-      })
-      .catch((error) => console.error("Error:", error));
+  const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+  /**
+   * Long-polls the totals endpoint: the server answers as soon as the
+   * cart version changes, or with 304 after its wait times out. A 304
+   * carrying Retry-After was answered without waiting, so the next
+   * poll is delayed by that many seconds.
+   * @returns {Promise<void>}
+   */
+  async function watchTotals() {
+    while (true) {
+      try {
+        const query =
+          cartVersion === null ? "" : `?version=${cartVersion}&wait=25`;
+        const response = await fetch(`/api/v1/payment/totals${query}`, {
+          cache: "no-store",
+        });
+        if (response.status === 200) {
+          lastTotals = await response.json();
+          cartVersion = lastTotals.version;
+          renderTotals(lastTotals);
+        } else if (response.status === 304) {
+          const retryAfter = Number(response.headers.get("Retry-After"));
+          if (retryAfter > 0) await sleep(retryAfter * 1000);
+        } else {
+          throw new Error(`Totals request failed: ${response.status}`);
+        }
+      } catch (error) {
+        console.error("Error:", error);
+        await sleep(5000);
+      }
+    }
   }
 
-  // Update totals periodically
-  setInterval(updateTotals, 5000);
+  watchTotals();
 
   paymentOptions.forEach((option) => {
     option.addEventListener("change", () => {
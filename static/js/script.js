@@ -5,32 +5,86 @@
 /** @type {Array<{id: string, name: string, price: number, quantity: number}>} */
 let cartItems = [];
 
+/** Milliseconds to wait for further clicks before sending a cart batch */
+const CART_BATCH_DELAY = 300;
+
+/** @type {Map<string, number>} Pending quantity change per meal */
+let pendingCartDeltas = new Map();
+
+/** @type {number|null} */
+let cartBatchTimer = null;
+
+/** @type {number} Sequence number of the last batch sent */
+let cartBatchSeq = 0;
+
 /**
- * Updates cart with new item or quantity
- * @param {string} mealId - Meal identifier
- * @param {string} mealName - Meal name
- * @param {number} mealPrice - Meal price
- * @param {'increase'|'decrease'} action - Action to perform
+ * Sends every pending quantity change in one request.
+ * Dispatches "cart:updated" with the cart snapshot on success and
+ * "cart:error" with the error otherwise. The snapshot of a batch is
+ * dropped when a later batch has been sent meanwhile, since it may
+ * arrive after that batch's snapshot and roll the cart back.
+ * @param {{keepalive?: boolean}} [options] - keepalive lets the request
+ *   outlive the page, e.g. when sent from pagehide
  * @returns {Promise<void>}
  */
-const updateCart = async (mealId, mealName, mealPrice, action) => {
+const flushCartUpdates = async ({ keepalive = false } = {}) => {
+  const operations = [...pendingCartDeltas]
+    .filter(([, delta]) => delta !== 0)
+    .map(([menu_item_id, delta]) => ({ menu_item_id, delta }));
+  pendingCartDeltas = new Map();
+  cartBatchTimer = null;
+  if (operations.length === 0) return;
+  const seq = ++cartBatchSeq;
+
   try {
-    const response = await fetch("/api/v1/cart/update", {
+    const response = await fetch("/api/v1/cart/batch", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ menu_item_id: mealId, action }),
+      body: JSON.stringify({ operations }),
+      keepalive,
     });
-
-    if (!response.ok) throw new Error("Failed to update cart");
-
     const data = await response.json();
-    updateLocalCart(data);
-    updateCartDisplay();
-    showToast("Cart updated successfully", "success");
+    if (!response.ok) throw new Error(data.error || "Failed to update cart");
+    if (seq !== cartBatchSeq) return;
+    document.dispatchEvent(new CustomEvent("cart:updated", { detail: data }));
   } catch (error) {
     console.error("Error updating cart:", error);
-    showToast("Failed to update cart", "error");
+    document.dispatchEvent(new CustomEvent("cart:error", { detail: error }));
+  }
+};
+
+/**
+ * Queues a quantity change; clicks arriving within CART_BATCH_DELAY of
+ * each other are coalesced and sent as a single batch
+ * @param {string} mealId - Meal identifier
+ * @param {number} delta - Quantity change, e.g. 1 or -1
+ * @returns {void}
+ */
+const queueCartUpdate = (mealId, delta) => {
+  pendingCartDeltas.set(mealId, (pendingCartDeltas.get(mealId) || 0) + delta);
+  clearTimeout(cartBatchTimer);
+  cartBatchTimer = setTimeout(flushCartUpdates, CART_BATCH_DELAY);
+};
+
+// Send queued clicks before the page goes away; a plain fetch would be
+// aborted with the page, a keepalive one is delivered
+window.addEventListener("pagehide", () => {
+  if (cartBatchTimer !== null) {
+    clearTimeout(cartBatchTimer);
+    flushCartUpdates({ keepalive: true });
   }
+});
+
+/**
+ * Updates cart with new item or quantity
+ * @param {string} mealId - Meal identifier
+ * @param {string} mealName - Meal name
+ * @param {number} mealPrice - Meal price
+ * @param {'increase'|'decrease'} action - Action to perform
+ * @returns {void}
+ */
+const updateCart = (mealId, mealName, mealPrice, action) => {
+  queueCartUpdate(mealId, action === "increase" ? 1 : -1);
 };
 
 // Meal elements event handling
@@ -50,7 +104,7 @@ mealElements.forEach((mealElement) => {
   const decreaseButton = mealElement.querySelector(".decrease");
   const increaseButton = mealElement.querySelector(".increase");
 
-  async function updateQuantity(action) {
+  function updateQuantity(action) {
     // Check if user is logged in
     const isLoggedIn = document.body.classList.contains("user-logged-in");
     if (!isLoggedIn) {
@@ -61,7 +115,7 @@ mealElements.forEach((mealElement) => {
       window.location.href = "/login";
       return;
     }
-    await updateCart(mealId, mealName, mealPrice, action);
+    updateCart(mealId, mealName, mealPrice, action);
   }
 
   increaseButton.addEventListener("click", () => updateQuantity("increase"));
@@ -84,23 +138,23 @@ const updateCartDisplay = () => {
   cartCount.classList.toggle("cart-count-active", totalQuantity > 0);
 };
 
+/**
+ * Replaces the local cart with a snapshot returned by the batch endpoint
+ * @param {{items: Array<{menu_item_id: string, quantity: number}>}} data
+ * @returns {void}
+ */
 function updateLocalCart(data) {
-  if (data.order) {
-    const itemIndex = cartItems.findIndex((item) => item.id === data.item.id);
-    if (itemIndex !== -1) {
-      if (data.item.quantity > 0) {
-        cartItems[itemIndex].quantity = data.item.quantity;
-      } else {
-        cartItems.splice(itemIndex, 1);
-      }
-    } else if (data.item.quantity > 0) {
-      cartItems.push(data.item);
-    }
-  } else {
-    cartItems = [];
-  }
+  cartItems = data.items.map((item) => ({
+    id: item.menu_item_id,
+    quantity: item.quantity,
+  }));
 }
 
+document.addEventListener("cart:updated", (event) => {
+  updateLocalCart(event.detail);
+  updateCartDisplay();
+});
+
 // Toast notification function
 function showToast(message, type) {
   const toast = document.createElement("div");
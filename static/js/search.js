@@ -4,6 +4,9 @@ let isInitialized = false;
 let currentPage = 1;
 let totalPages = 1;
 const ITEMS_PER_PAGE = 8;
+// Cursor that fetches each page already reached from page 1, so
+// stepping through results never needs an OFFSET on the server
+let pageCursors = {};
 
 // Cart management functions
 async function initializeCartState() {
@@ -70,20 +73,32 @@ function createToastElement() {
 
 // Search and display functions
 async function performSearch(resetPage = false) {
-  if (resetPage) currentPage = 1;
+  if (resetPage) {
+    currentPage = 1;
+    pageCursors = {};
+  }
 
   const searchBar = document.getElementById("search_bar");
   const filterSelect = document.getElementById("filter");
   const query = searchBar.value;
   const restaurant = filterSelect.value;
+  const page = currentPage;
+  const cursor = pageCursors[page];
+  const position = cursor
+    ? `cursor=${encodeURIComponent(cursor)}`
+    : `page=${page}`;
+  // facet counts only change with the search, not with the page
+  const facets = resetPage ? "&facets=1" : "";
 
   try {
     const response = await fetch(
       `/api/v1/search?query=${encodeURIComponent(
         query
-      )}&restaurant=${encodeURIComponent(restaurant)}&page=${currentPage}`
+      )}&restaurant=${encodeURIComponent(restaurant)}&${position}${facets}`
     );
     const data = await response.json();
+    if (data.next_cursor) pageCursors[page + 1] = data.next_cursor;
+    if (data.facets) updateFilterCounts(data.facets.restaurants);
     updateMealsSection(data.meals);
     updatePagination(data.total);
   } catch (error) {
@@ -91,6 +106,49 @@ async function performSearch(resetPage = false) {
   }
 }
 
+// Show how many meals each restaurant in the filter would return
+function updateFilterCounts(counts) {
+  const filterSelect = document.getElementById("filter");
+  let total = 0;
+  Object.values(counts).forEach((count) => (total += count));
+  Array.from(filterSelect.options).forEach((option) => {
+    if (!option.dataset.name) option.dataset.name = option.textContent;
+    const count = option.value === "All" ? total : counts[option.value] || 0;
+    option.textContent = `${option.dataset.name} (${count})`;
+    option.disabled = count === 0 && !option.selected;
+  });
+}
+
+// Autocomplete: fill the search bar's datalist as the user types.
+// Responses can arrive out of order, so only the latest one is shown.
+let suggestTimer = null;
+let suggestSeq = 0;
+
+async function updateSuggestions(prefix) {
+  const seq = ++suggestSeq;
+  const datalist = document.getElementById("search_suggestions");
+  if (!prefix.trim()) {
+    datalist.innerHTML = "";
+    return;
+  }
+  try {
+    const response = await fetch(
+      `/api/v1/search/suggest?prefix=${encodeURIComponent(prefix)}`
+    );
+    const data = await response.json();
+    if (seq !== suggestSeq) return;
+    datalist.innerHTML = "";
+    (data.suggestions || []).forEach((suggestion) => {
+      const option = document.createElement("option");
+      option.value = suggestion.text;
+      option.label = suggestion.type;
+      datalist.appendChild(option);
+    });
+  } catch (error) {
+    console.error("Suggestions failed:", error);
+  }
+}
+
 // Initialization and event listeners
 document.addEventListener("DOMContentLoaded", async function () {
   cartState = await initializeCartState();
@@ -104,6 +162,18 @@ document.addEventListener("DOMContentLoaded", async function () {
   searchBar.addEventListener("keyup", (event) => {
     if (event.key === "Enter") performSearch(true);
   });
+  searchBar.addEventListener("input", (event) => {
+    clearTimeout(suggestTimer);
+    // picking a suggestion fires an input event without a keystroke
+    if (
+      !(event instanceof InputEvent) ||
+      event.inputType === "insertReplacementText"
+    ) {
+      performSearch(true);
+      return;
+    }
+    suggestTimer = setTimeout(() => updateSuggestions(searchBar.value), 100);
+  });
   filterSelect.addEventListener("change", () => performSearch(true));
 
   // Pagination events
@@ -113,6 +183,26 @@ document.addEventListener("DOMContentLoaded", async function () {
   performSearch(true);
 });
 
+// Apply the snapshot returned for each cart batch
+document.addEventListener("cart:updated", (event) => {
+  const data = event.detail;
+  cartState = data.items.reduce((acc, item) => {
+    acc[item.menu_item_id] = item.quantity;
+    return acc;
+  }, {});
+  updateAllQuantities();
+  updateCartBadge(data.order?.total_price || 0);
+  localStorage.setItem("cartState", JSON.stringify(cartState));
+  showToast(data.order?.id ? "Cart updated successfully" : "Cart emptied");
+});
+
+// Roll the optimistic quantities back to the server's state
+document.addEventListener("cart:error", async (event) => {
+  showToast(event.detail.message, "error");
+  isInitialized = false;
+  await initializeCartState();
+});
+
 // Visibility change handler
 document.addEventListener("visibilitychange", async () => {
   if (document.visibilityState === "visible") {
@@ -194,80 +284,32 @@ function attachQuantityListeners() {
     const quantitySpan = meal.querySelector(".quantity-value");
     const mealId = meal.dataset.mealId;
 
-    async function handleQuantityUpdate(action) {
-      try {
-        // 1. Pre-checks
-        const isAuthenticated =
-          document.body.classList.contains("user-logged-in");
-        if (!isAuthenticated) {
-          localStorage.setItem(
-            "pendingCartAction",
-            JSON.stringify({
-              mealId,
-              action,
-              returnUrl: window.location.pathname,
-            })
-          );
-          window.location.href = "/login";
-          return;
-        }
-
-        const response = await fetch("/api/v1/cart/update", {
-          method: "POST",
-          headers: {
-            "Content-Type": "application/json",
-          },
-          body: JSON.stringify({
-            menu_item_id: mealId,
-            action: action,
-          }),
-        });
-
-        if (!response.ok) {
-          const error = await response.json();
-          throw new Error(error.error || "Failed to update cart");
-        }
-
-        const data = await response.json();
-
-        // Update UI immediately based on action and response
-        let newQuantity;
-        if (action === "decrease") {
-          const currentQuantity = parseInt(
-            quantitySpan.getAttribute("data-quantity")
-          );
-          newQuantity = currentQuantity > 1 ? currentQuantity - 1 : 0;
-        } else {
-          newQuantity = data.item.quantity;
-        }
-
-        // Always update the UI with the new quantity
-        updateQuantityDisplay(mealId, newQuantity);
-        updateCartBadge(data.order ? data.order.total_price : 0);
-
-        // Update cartState
-        if (newQuantity === 0) {
-          delete cartState[mealId];
-        } else {
-          cartState[mealId] = newQuantity;
-        }
-
-        // Show appropriate message
-        if (
-          (data.order && data.order.status === "cancelled") ||
-          newQuantity === 0
-        ) {
-          showToast("Item removed from cart");
-        } else {
-          showToast(`Cart ${action}d successfully`);
-        }
-
-        // Update localStorage
-        localStorage.setItem("cartState", JSON.stringify(cartState));
-      } catch (error) {
-        console.error("Error:", error);
-        showToast(error.message, "error");
+    function handleQuantityUpdate(action) {
+      const isAuthenticated =
+        document.body.classList.contains("user-logged-in");
+      if (!isAuthenticated) {
+        localStorage.setItem(
+          "pendingCartAction",
+          JSON.stringify({
+            mealId,
+            action,
+            returnUrl: window.location.pathname,
+          })
+        );
+        window.location.href = "/login";
+        return;
       }
+
+      const currentQuantity = parseInt(
+        quantitySpan.getAttribute("data-quantity")
+      );
+      if (action === "decrease" && currentQuantity <= 0) return;
+
+      // Show the new quantity right away; clicks are sent in batches and
+      // the server's snapshot settles the final state
+      const delta = action === "increase" ? 1 : -1;
+      updateQuantityDisplay(mealId, currentQuantity + delta);
+      queueCartUpdate(mealId, delta);
     }
 
     decreaseBtn.addEventListener("click", () =>
@@ -0,0 +1,38 @@
+#!/usr/bin/python3
+"""Shared base class for tests that run against a real database"""
+import os
+import unittest
+from unittest.mock import patch
+from models.engine.db_storage import DBStorage
+
+
+class InMemoryStorageTestCase(unittest.TestCase):
+    """
+    Test case owning a private in-memory SQLite storage.
+
+    setUp creates self.storage, calls seed() to add the rows every test
+    starts with, then installs the storage under each name listed in
+    storage_targets. Cleanups restore those names and close the storage,
+    after the subclass's own tearDown.
+
+    Attributes:
+        storage_targets: Names patched to self.storage, e.g.
+            "console.storage"; empty to leave models.storage alone
+    """
+
+    storage_targets = ("models.storage",)
+
+    def setUp(self):
+        """Open the storage, seed it and install it"""
+        with patch.dict(os.environ, {"FOODIFY_STORAGE": ":memory:"}):
+            self.storage = DBStorage()
+        self.storage.reload()
+        self.addCleanup(self.storage.close)
+        self.seed()
+        for target in self.storage_targets:
+            storage_patch = patch(target, self.storage)
+            storage_patch.start()
+            self.addCleanup(storage_patch.stop)
+
+    def seed(self):
+        """Add the rows shared by the tests of the case"""
@@ -12,10 +12,10 @@ class TestAllCommand(unittest.TestCase):
 
     @patch('sys.stdout', new_callable=StringIO)
     def test_all_no_class_name(self, mock_stdout):
-        with patch('models.storage.all', return_value={
-            'BaseModel.1234': BaseModel(id='1234'),
-            'BaseModel.5678': BaseModel(id='5678')
-        }):
+        with patch('models.storage.iter', return_value=[
+            BaseModel(id='1234'),
+            BaseModel(id='5678')
+        ]):
             self.console.onecmd("all")
             output = mock_stdout.getvalue().strip()
             self.assertIn('BaseModel.1234', output)
@@ -30,10 +30,9 @@ class TestAllCommand(unittest.TestCase):
 
     @patch('sys.stdout', new_callable=StringIO)
     def test_all_valid_class_name(self, mock_stdout):
-        with patch('models.storage.all', return_value={
-            'BaseModel.1234': BaseModel(id='1234'),
-            'User.5678': BaseModel(id='5678')
-        }):
+        with patch('models.storage.iter', return_value=[
+            BaseModel(id='1234')
+        ]):
             self.console.onecmd("all BaseModel")
             output = mock_stdout.getvalue().strip()
             self.assertIn('BaseModel.1234', output)
@@ -1,5 +1,7 @@
 #!/usr/bin/python3
 """Unit tests for console.py"""
+import os
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 from io import StringIO
@@ -64,11 +66,12 @@ class TestFoodifyConsole(unittest.TestCase):
     @patch("console.storage")
     def test_do_all(self, mock_storage):
         """Test all command"""
-        test_instances = {"Client.1": Client(), "Restaurant.1": Restaurant()}
-        mock_storage.all.return_value = test_instances
+        test_instances = [Client(), Restaurant()]
+        mock_storage.iter.return_value = iter(test_instances)
 
         self.console.do_all("")
-        mock_storage.all.assert_called_once()
+        mock_storage.iter.assert_called_once()
+        mock_storage.all.assert_not_called()
 
     @patch("console.storage")
     def test_do_destroy(self, mock_storage):
@@ -97,11 +100,10 @@ class TestFoodifyConsole(unittest.TestCase):
             email="old@test.com",
             password="oldpass",
         )
-        mock_console_storage.all.return_value = {
-            "Client.test_id": test_instance
-        }
+        mock_console_storage.get.return_value = test_instance
 
         self.console.do_update("Client test_id email new@test.com")
+        mock_console_storage.get.assert_called_with(Client, "test_id")
         self.assertEqual(test_instance.email, "new@test.com")
 
     def test_invalid_class(self):
@@ -124,5 +126,25 @@ class TestFoodifyConsole(unittest.TestCase):
         self.assertEqual(self._last_write(0), "5")
 
 
+    @patch("console.storage")
+    def test_do_import_invalid_timestamp(self, mock_console_storage):
+        """Test a malformed timestamp is reported, not raised"""
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".json", delete=False
+        ) as f:
+            f.write('[{"id": "r1", "name": "A", "city": "Rabat", '
+                    '"created_at": "yesterday"}]')
+        try:
+            self.console.onecmd(f"import Restaurant {f.name}")
+        finally:
+            os.remove(f.name)
+
+        self.assertEqual(
+            self._last_write(0),
+            "** row 1: invalid created_at 'yesterday' **",
+        )
+        mock_console_storage.bulk_upsert.assert_not_called()
+
+
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -1,8 +1,16 @@
 import unittest
+from decimal import Decimal
 from console import FoodifyConsole
 from unittest.mock import patch
 from io import StringIO
+from sqlalchemy import select
 from models.base_model import BaseModel
+from models.cache_version import cache_versions
+from models.menu_item import MenuItem
+from models.restaurant import Restaurant
+from services import catalog
+from services.invalidation import TableBus
+from ..storage_case import InMemoryStorageTestCase
 
 
 class TestUpdateCommand(unittest.TestCase):
@@ -40,8 +48,8 @@ class TestUpdateCommand(unittest.TestCase):
 
     @patch('sys.stdout', new_callable=StringIO)
     def test_update_no_attribute_name(self, mock_stdout):
-        with patch('models.storage.all',
-                   return_value={'BaseModel.1234': BaseModel(id='1234')}):
+        with patch('models.storage.get',
+                   return_value=BaseModel(id='1234')):
             self.console.onecmd("update BaseModel 1234")
             self.assertEqual(
                 mock_stdout.getvalue().strip(), "** attribute name missing **"
@@ -49,8 +57,8 @@ class TestUpdateCommand(unittest.TestCase):
 
     @patch('sys.stdout', new_callable=StringIO)
     def test_update_no_value(self, mock_stdout):
-        with patch('models.storage.all',
-                   return_value={'BaseModel.1234': BaseModel(id='1234')}):
+        with patch('models.storage.get',
+                   return_value=BaseModel(id='1234')):
             self.console.onecmd("update BaseModel 1234 attr")
             self.assertEqual(
                 mock_stdout.getvalue().strip(), "** value missing **"
@@ -58,12 +66,52 @@ class TestUpdateCommand(unittest.TestCase):
 
     @patch('sys.stdout', new_callable=StringIO)
     def test_update_existing_instance(self, mock_stdout):
-        with patch('models.storage.all',
-                   return_value={'BaseModel.1234': BaseModel(id='1234')}):
+        with patch('models.storage.get',
+                   return_value=BaseModel(id='1234')):
             self.console.onecmd("update BaseModel 1234 name test_name")
-            instance = storage.all()['BaseModel.1234']
+            instance = storage.get(BaseModel, '1234')
             self.assertEqual(instance.name, 'test_name')
 
 
+class TestUpdatePublishes(InMemoryStorageTestCase):
+    """Test console updates reach the catalog caches"""
+
+    storage_targets = ("models.storage", "console.storage")
+
+    def seed(self):
+        """Add one menu item"""
+        self.storage.new(Restaurant(id="rest_1", name="Napoli",
+                                    city="Rabat"))
+        self.storage.new(MenuItem(id="pizza", restaurant_id="rest_1",
+                                  name="Pizza", price=Decimal("10.50")))
+        self.storage.save()
+
+    def setUp(self):
+        """Install a bus that always polls"""
+        super().setUp()
+        bus_patch = patch.object(catalog, "bus", TableBus(interval=0))
+        bus_patch.start()
+        self.addCleanup(bus_patch.stop)
+
+    def stored_version(self):
+        """Return the catalog channel version in the database"""
+        with self.storage.engine.connect() as conn:
+            return conn.execute(
+                select(cache_versions.c.version)
+                .where(cache_versions.c.name == catalog.CHANNEL)
+            ).scalar() or 0
+
+    def test_price_update_publishes(self):
+        """Test a console price edit is saved, bumped and published"""
+        version, stored = catalog.version(), self.stored_version()
+        with patch('sys.stdout', new_callable=StringIO):
+            FoodifyConsole().onecmd("update MenuItem pizza price 12.5")
+        self.assertEqual(catalog.version(), version + 1)
+        self.assertEqual(self.stored_version(), stored + 1)
+        self.storage.close()
+        self.assertEqual(self.storage.get(MenuItem, "pizza").price,
+                         Decimal("12.50"))
+
+
 if __name__ == '__main__':
     unittest.main()
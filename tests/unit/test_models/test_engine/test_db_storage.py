@@ -0,0 +1,189 @@
+#!/usr/bin/python3
+"""Unit tests for DBStorage running on the embedded SQLite engine"""
+import os
+import threading
+import unittest
+from unittest.mock import patch
+from flask import Flask
+from models.engine.db_storage import DBStorage
+from models.client import Client
+from models.menu_item import MenuItem
+from models.restaurant import Restaurant
+from ...storage_case import InMemoryStorageTestCase
+
+
+class TestDBStorage(InMemoryStorageTestCase):
+    """Test cases for DBStorage"""
+
+    storage_targets = ()
+
+    def seed(self):
+        """Add three clients and a restaurant"""
+        for i in range(3):
+            self.storage.new(
+                Client(
+                    id=f"client_{i}",
+                    username=f"user_{i}",
+                    address="123 Test St",
+                    email=f"user_{i}@example.com",
+                    password="hash",
+                )
+            )
+        self.storage.new(Restaurant(id="rest_1", name="Test", city="Rabat"))
+        self.storage.save()
+
+    def test_database_url_selection(self):
+        """Test FOODIFY_STORAGE selects the engine"""
+        with patch.dict(os.environ, {"FOODIFY_STORAGE": ":memory:"}):
+            self.assertEqual(DBStorage.database_url().drivername, "sqlite")
+        with patch.dict(
+            os.environ, {"FOODIFY_STORAGE": "sqlite:///foodify.db"}
+        ):
+            url = DBStorage.database_url()
+            self.assertEqual(url.database, "foodify.db")
+        self.assertEqual(self.storage.dialect, "sqlite")
+
+    def test_database_url_missing_credentials(self):
+        """Test the MySQL engine still requires its credentials"""
+        with patch.dict(os.environ, {"FOODIFY_STORAGE": "mysql"}):
+            for key in ("FOOD_MYSQL_USER", "FOOD_MYSQL_PWD"):
+                os.environ.pop(key, None)
+            with self.assertRaises(ValueError):
+                DBStorage.database_url()
+
+    def test_get(self):
+        """Test primary-key lookup"""
+        client = self.storage.get(Client, "client_1")
+        self.assertEqual(client.username, "user_1")
+        self.assertIsNone(self.storage.get(Client, "missing"))
+
+    def test_find(self):
+        """Test equality filters and limit"""
+        found = self.storage.find(Client, email="user_2@example.com")
+        self.assertEqual([c.id for c in found], ["client_2"])
+        self.assertEqual(len(self.storage.find(Client, limit=2)), 2)
+        self.assertEqual(self.storage.find(Client, username="nobody"), [])
+
+    def test_iter(self):
+        """Test chunked iteration over one class and all classes"""
+        ids = sorted(c.id for c in self.storage.iter(Client, chunk_size=2))
+        self.assertEqual(ids, ["client_0", "client_1", "client_2"])
+        self.assertEqual(len(list(self.storage.iter())), 4)
+
+    def test_bulk_new(self):
+        """Test batched inserts fill defaults and commit every row"""
+        items = [
+            MenuItem(restaurant_id="rest_1", name=f"item_{i}", price=5)
+            for i in range(5)
+        ]
+        self.assertEqual(self.storage.bulk_new(items, batch_size=2), 5)
+        self.assertEqual(self.storage.count(MenuItem), 5)
+        self.assertTrue(self.storage.get(MenuItem, items[0].id).is_available)
+
+    def test_bulk_upsert(self):
+        """Test rows with a known id are updated and others inserted"""
+        rows = [
+            {"id": "client_0", "username": "renamed", "address": "1 New St",
+             "email": "user_0@example.com", "password": "hash"},
+            {"username": "new", "address": "2 New St",
+             "email": "new@example.com", "password": "hash"},
+        ]
+        self.assertEqual(self.storage.bulk_upsert(Client, rows), 2)
+        self.assertEqual(self.storage.count(Client), 4)
+        self.assertEqual(
+            self.storage.get(Client, "client_0").username, "renamed"
+        )
+
+    def test_bulk_upsert_partial_row(self):
+        """Test an upsert leaves the columns a row omits unchanged"""
+        self.storage.new(MenuItem(
+            id="item_1", restaurant_id="rest_1", name="Pizza", price=5,
+            is_available=False, image_url="pizza.png", popularity=42,
+        ))
+        client = self.storage.get(Client, "client_1")
+        client.cart_version = 7
+        self.storage.save()
+
+        self.storage.bulk_upsert(MenuItem, [
+            {"id": "item_1", "restaurant_id": "rest_1", "name": "Pizza XL",
+             "price": 9},
+            {"id": "item_2", "restaurant_id": "rest_1", "name": "Soda",
+             "price": 2},
+        ], batch_size=1)
+        self.storage.bulk_upsert(Client, [
+            {"id": "client_1", "username": "user_1",
+             "address": "9 Moved St", "email": "user_1@example.com",
+             "password": "hash"},
+        ])
+
+        item = self.storage.get(MenuItem, "item_1")
+        self.assertEqual((item.name, float(item.price)), ("Pizza XL", 9.0))
+        self.assertFalse(item.is_available)
+        self.assertEqual(item.image_url, "pizza.png")
+        self.assertEqual(item.popularity, 42)
+        self.assertTrue(self.storage.get(MenuItem, "item_2").is_available)
+        client = self.storage.get(Client, "client_1")
+        self.assertEqual(client.address, "9 Moved St")
+        self.assertEqual(client.cart_version, 7)
+
+    def test_engine_is_created_lazily(self):
+        """Test constructing a storage opens no engine or connection"""
+        with patch.dict(
+            os.environ, {"FOODIFY_STORAGE": "mysql+mysqldb://u:p@nohost/db"}
+        ):
+            DBStorage()
+
+    def test_reset_after_fork(self):
+        """Test a forked child gets a fresh pool and no inherited session"""
+        pool = self.storage.engine.pool
+        sessions = []
+
+        def open_session():
+            with self.storage.session_scope() as session:
+                sessions.append(session)
+
+        with self.storage.session_scope() as session:
+            sessions.append(session)
+        worker = threading.Thread(target=open_session)
+        worker.start()
+        worker.join()
+        self.storage.reset_after_fork()
+        self.assertIsNot(self.storage.engine.pool, pool)
+        with self.storage.session_scope() as session:
+            self.assertNotIn(session, sessions)
+            self.assertIs(session.get_bind(), self.storage.engine)
+
+    def test_nested_session_scope_uses_savepoint(self):
+        """Test a failing inner scope only undoes its own work"""
+        with self.storage.session_scope() as session:
+            session.get(Client, "client_0").address = "1 Outer St"
+            with self.assertRaises(ValueError):
+                with self.storage.session_scope() as inner:
+                    self.assertIs(inner, session)
+                    inner.get(Client, "client_1").address = "1 Inner St"
+                    raise ValueError("inner failure")
+        self.storage.close()
+        self.assertEqual(
+            self.storage.get(Client, "client_0").address, "1 Outer St"
+        )
+        self.assertEqual(
+            self.storage.get(Client, "client_1").address, "123 Test St"
+        )
+
+    def test_session_per_app_context(self):
+        """Test each app context gets its own session from one factory"""
+        app = Flask(__name__)
+        self.storage.reload()
+        with app.app_context():
+            with self.storage.session_scope() as first:
+                with app.app_context():
+                    with self.storage.session_scope() as second:
+                        pass
+                    self.storage.close()
+            self.storage.close()
+        self.assertIsNot(first, second)
+        self.assertIs(first.bind, second.bind)
+
+
+if __name__ == "__main__":
+    unittest.main()
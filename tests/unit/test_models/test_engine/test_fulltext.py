@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""Unit tests for the full-text index on the embedded SQLite engine"""
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+from sqlalchemy import select
+from models.engine import db_storage, fulltext
+from models.menu_item import MenuItem
+from models.restaurant import Restaurant
+from ...storage_case import InMemoryStorageTestCase
+
+
+class TestFullText(InMemoryStorageTestCase):
+    """Test cases for models.engine.fulltext"""
+
+    storage_targets = ()
+
+    def seed(self):
+        """Add a small menu"""
+        self.storage.new(Restaurant(id="napoli", name="Napoli Pizza",
+                                    city="Rabat"))
+        self.storage.new(Restaurant(id="grill", name="Grill House",
+                                    city="Rabat"))
+        self.storage.save()
+        self.storage.bulk_new([
+            MenuItem(id="margherita", name="Pizza Margherita",
+                     restaurant_id="napoli", price=Decimal("9")),
+            MenuItem(id="tiramisu", name="Tiramisu",
+                     restaurant_id="napoli", price=Decimal("5")),
+            MenuItem(id="burger", name="Cheese Burger",
+                     restaurant_id="grill", price=Decimal("8")),
+        ])
+
+    def matches(self, query):
+        """Return matching item ids, most relevant first"""
+        ranked = fulltext.ranked_matches("sqlite", query)
+        with self.storage.engine.connect() as conn:
+            rows = conn.execute(
+                select(ranked.c.id).order_by(ranked.c.score.desc())
+            )
+            return [row.id for row in rows]
+
+    def test_terms(self):
+        """Test operators are stripped from user input"""
+        self.assertEqual(fulltext.terms('Pizza* "NAPOLI" -x'),
+                         ["pizza", "napoli", "x"])
+        self.assertIsNone(fulltext.ranked_matches("sqlite", " * "))
+
+    def test_ranking_covers_restaurant_names(self):
+        """Test item-name hits rank above restaurant-name hits"""
+        self.assertEqual(self.matches("pizz"), ["margherita", "tiramisu"])
+        self.assertEqual(self.matches("napoli tira"), ["tiramisu"])
+        self.assertEqual(self.matches("sushi"), [])
+
+    def test_triggers_keep_index_in_sync(self):
+        """Test item and restaurant writes update the index"""
+        item = self.storage.get(MenuItem, "burger")
+        item.name = "Veggie Wrap"
+        self.storage.get(Restaurant, "grill").name = "Wrap Corner"
+        self.storage.save()
+        self.assertEqual(self.matches("burger"), [])
+        self.assertEqual(self.matches("wrap corner"), ["burger"])
+
+        self.storage.delete(self.storage.get(MenuItem, "tiramisu"))
+        self.storage.save()
+        self.assertEqual(self.matches("tiramisu"), [])
+
+    def test_install_backfills_existing_rows(self):
+        """Test migrating a database without the index fills it"""
+        with self.storage.engine.begin() as conn:
+            conn.exec_driver_sql(f"DROP TABLE {fulltext.FTS_TABLE}")
+            self.assertTrue(fulltext.install(conn))
+            self.assertTrue(fulltext.install(conn))
+        self.assertEqual(self.matches("cheese"), ["burger"])
+
+    def test_storage_search_fulltext_mode(self):
+        """Test DBStorage.search ranks names through the index"""
+        with patch.object(db_storage, "FULLTEXT_SEARCH", True):
+            found = self.storage.search(MenuItem, {"name": "napoli"})
+        self.assertEqual({m.id for m in found}, {"margherita", "tiramisu"})
+        self.assertEqual(self.storage.search(MenuItem, {"name": "napoli"}),
+                         [])
+
+
+if __name__ == "__main__":
+    unittest.main()
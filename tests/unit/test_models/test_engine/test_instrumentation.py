@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""Unit tests for SQL instrumentation"""
+import unittest
+from unittest.mock import patch
+from flask import Flask, jsonify
+from models.engine import instrumentation
+from models.menu_item import MenuItem
+from models.restaurant import Restaurant
+from ...storage_case import InMemoryStorageTestCase
+
+
+class TestInstrumentation(InMemoryStorageTestCase):
+    """Test cases for query collectors and budgets"""
+
+    storage_targets = ()
+
+    def seed(self):
+        """Add one restaurant and two items"""
+        self.storage.new(Restaurant(id="rest_1", name="Test", city="Rabat"))
+        for i in range(2):
+            self.storage.new(
+                MenuItem(id=f"item_{i}", restaurant_id="rest_1",
+                         name=f"Item {i}", price=5)
+            )
+        self.storage.save()
+
+    def test_fingerprint(self):
+        """Test literals and IN lists normalize to one shape"""
+        self.assertEqual(
+            instrumentation.fingerprint(
+                "SELECT * FROM t WHERE id IN (?, ?, ?)  AND n = 'x'"
+            ),
+            "SELECT * FROM t WHERE id IN (?) AND n = ?",
+        )
+
+    def test_query_budget_counts_queries(self):
+        """Test the collector counts statements within the block"""
+        with instrumentation.query_budget(2) as stats:
+            self.storage.get(MenuItem, "item_0")
+            self.storage.get(MenuItem, "item_1")
+        self.assertEqual(stats.count, 2)
+        self.assertGreater(stats.duration, 0)
+
+    @patch("models.engine.instrumentation.time.perf_counter")
+    def test_failed_statement_does_not_skew_timings(self, mock_clock):
+        """Test a statement that raises leaves no start time behind"""
+        mock_clock.side_effect = [0.0, 100.0, 101.0]
+        with self.storage.engine.connect() as conn:
+            with self.assertRaises(Exception):
+                conn.exec_driver_sql("SELECT * FROM missing_table")
+            with instrumentation.collect() as stats:
+                conn.exec_driver_sql("SELECT 1")
+            self.assertNotIn("query_start", conn.info)
+        self.assertEqual(stats.count, 1)
+        self.assertEqual(stats.duration, 1.0)
+
+    def test_query_budget_exceeded(self):
+        """Test exceeding the budget fails"""
+        with self.assertRaises(AssertionError):
+            with instrumentation.query_budget(1):
+                self.storage.get(MenuItem, "item_0")
+                self.storage.get(MenuItem, "item_1")
+
+    def test_query_budget_detects_duplicates(self):
+        """Test repeated statement shapes are reported as N+1"""
+        with self.assertRaises(AssertionError) as ctx:
+            with instrumentation.query_budget(10, max_duplicates=1):
+                for item_id in ("item_0", "item_1"):
+                    self.storage.get(MenuItem, item_id)
+        self.assertIn("N+1", str(ctx.exception))
+
+    def test_server_timing_header_in_debug(self):
+        """Test a debug app reports request query stats"""
+        app = Flask(__name__)
+        app.debug = True
+        instrumentation.init_app(app)
+
+        @app.route("/items")
+        def items():
+            return jsonify(len(self.storage.find(MenuItem)))
+
+        response = app.test_client().get("/items")
+        self.assertIn('desc="1 queries"', response.headers["Server-Timing"])
+
+        app.debug = False
+        response = app.test_client().get("/items")
+        self.assertNotIn("Server-Timing", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+"""Unit tests for the schema migration runner"""
+import os
+import unittest
+from unittest.mock import patch
+from sqlalchemy import inspect
+from models.engine import migrations
+from models.engine.db_storage import DBStorage
+from models.client import Client
+from ...storage_case import InMemoryStorageTestCase
+
+
+class TestMigrations(InMemoryStorageTestCase):
+    """Test cases for forward-only migrations"""
+
+    storage_targets = ()
+
+    def seed(self):
+        """Shape the schema like an older one"""
+        with self.storage.engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX idx_orders_client_status")
+            conn.exec_driver_sql("DROP INDEX idx_clients_username")
+            conn.exec_driver_sql("DROP INDEX idx_menu_items_popularity_id")
+            conn.exec_driver_sql("DROP INDEX uq_order_items_order_menu_item")
+            conn.exec_driver_sql(
+                "CREATE INDEX idx_orders_client ON orders (client_id)"
+            )
+
+    def index_names(self, table):
+        """Return the index names of a table"""
+        return {
+            ix["name"]
+            for ix in inspect(self.storage.engine).get_indexes(table)
+        }
+
+    def test_migrate_adds_indexes(self):
+        """Test pending migrations create the declared indexes"""
+        applied = self.storage.migrate()
+        self.assertEqual(
+            [m.version for m in applied],
+            [m.version for m in migrations.MIGRATIONS],
+        )
+        self.assertIn("idx_orders_client_status", self.index_names("orders"))
+        self.assertNotIn("idx_orders_client", self.index_names("orders"))
+        self.assertIn("idx_clients_username", self.index_names("clients"))
+        self.assertIn("idx_menu_items_popularity_id",
+                      self.index_names("menu_items"))
+
+    def test_migrate_is_forward_only(self):
+        """Test applied migrations are recorded and not re-run"""
+        self.storage.migrate()
+        self.assertEqual(self.storage.pending_migrations(), [])
+        self.assertEqual(self.storage.migrate(), [])
+        self.assertEqual(
+            migrations.applied_versions(self.storage.engine),
+            [m.version for m in migrations.MIGRATIONS],
+        )
+
+    def test_migrate_merges_duplicate_cart_rows(self):
+        """Test duplicate order items are merged before the unique index"""
+        with self.storage.engine.begin() as conn:
+            conn.exec_driver_sql("PRAGMA foreign_keys = OFF")
+            for i, quantity in enumerate((1, 2)):
+                conn.exec_driver_sql(
+                    "INSERT INTO order_items (id, order_id, menu_item_id, "
+                    "quantity, created_at, updated_at) VALUES "
+                    f"('row_{i}', 'o', 'm', {quantity}, "
+                    f"'2024-01-0{i + 1}', '2024-01-01')"
+                )
+            conn.exec_driver_sql("PRAGMA foreign_keys = ON")
+        self.storage.migrate()
+        with self.storage.engine.connect() as conn:
+            rows = conn.exec_driver_sql(
+                "SELECT id, quantity FROM order_items"
+            ).all()
+        self.assertEqual([tuple(r) for r in rows], [("row_0", 3)])
+        self.assertIn("uq_order_items_order_menu_item",
+                      self.index_names("order_items"))
+
+    def test_migrate_adds_popularity(self):
+        """Test the popularity counter is added with a zero default"""
+        with self.storage.engine.begin() as conn:
+            conn.exec_driver_sql("ALTER TABLE menu_items DROP COLUMN "
+                                 "popularity")
+        self.storage.migrate()
+        columns = {
+            c["name"]: c
+            for c in inspect(self.storage.engine).get_columns("menu_items")
+        }
+        self.assertIn("popularity", columns)
+        self.assertFalse(columns["popularity"]["nullable"])
+
+    def test_add_cache_versions(self):
+        """Test the invalidation table is created once"""
+        with self.storage.engine.begin() as conn:
+            conn.exec_driver_sql("DROP TABLE cache_versions")
+            migrations.add_cache_versions(conn)
+            migrations.add_cache_versions(conn)
+        self.assertIn("cache_versions",
+                      inspect(self.storage.engine).get_table_names())
+
+    def test_fast_start_requires_migrated_schema(self):
+        """Test fast start checks the stored version on first query"""
+        with patch.dict(os.environ, {"FOODIFY_STORAGE": ":memory:"}), \
+                patch("models.engine.db_storage.FAST_START", True):
+            storage = DBStorage()
+            storage.reload()
+        with self.assertRaises(RuntimeError):
+            storage.count(Client)
+        storage.close()
+        storage.migrate()
+        self.assertEqual(storage.count(Client), 0)
+        storage.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,248 @@
+#!/usr/bin/python3
+"""Unit tests for the LRU cache"""
+import fnmatch
+import socketserver
+import threading
+import unittest
+from unittest.mock import patch
+from services.cache import LRUCache, RedisCache, cache_from_url
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    """Serve the handful of Redis commands RedisCache issues"""
+
+    def read_command(self):
+        """Read one RESP array of bulk strings"""
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def bulk(self, value):
+        """Encode a bulk string reply"""
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def handle(self):
+        """Answer commands until the client disconnects"""
+        watched = {}
+        queued = None
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            name = args[0].upper()
+            if queued is not None and name != b"EXEC":
+                queued.append(args)
+                self.wfile.write(b"+QUEUED\r\n")
+            elif name == b"WATCH":
+                watched.update(
+                    (k, self.server.writes.get(k, 0)) for k in args[1:]
+                )
+                self.wfile.write(b"+OK\r\n")
+            elif name == b"UNWATCH":
+                watched.clear()
+                self.wfile.write(b"+OK\r\n")
+            elif name == b"MULTI":
+                queued = []
+                self.wfile.write(b"+OK\r\n")
+            elif name == b"EXEC":
+                with self.server.lock:
+                    if any(self.server.writes.get(k, 0) != count
+                           for k, count in watched.items()):
+                        reply = b"*-1\r\n"
+                    else:
+                        reply = b"*%d\r\n" % len(queued) + b"".join(
+                            self.run(command) for command in queued
+                        )
+                watched.clear()
+                queued = None
+                self.wfile.write(reply)
+            else:
+                with self.server.lock:
+                    self.wfile.write(self.run(args))
+
+    def run(self, args):
+        """Apply one command to the stored data and return its reply"""
+        data = self.server.data
+        name = args[0].upper()
+        if name in (b"SET", b"DEL"):
+            for key in args[1:2] if name == b"SET" else args[1:]:
+                self.server.writes[key] = self.server.writes.get(key, 0) + 1
+        if name == b"GET":
+            return self.bulk(data.get(args[1]))
+        if name == b"SET":
+            data[args[1]] = args[2]
+            return b"+OK\r\n"
+        if name == b"DEL":
+            removed = sum(data.pop(k, None) is not None for k in args[1:])
+            return b":%d\r\n" % removed
+        if name == b"SCAN":
+            pattern = args[3].decode()
+            keys = [k for k in data if fnmatch.fnmatch(k.decode(), pattern)]
+            return b"*2\r\n" + self.bulk(b"0") + b"*%d\r\n" % len(
+                keys
+            ) + b"".join(self.bulk(k) for k in keys)
+        if name == b"DBSIZE":
+            return b":%d\r\n" % len(data)
+        return b"-ERR unknown command\r\n"
+
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """Local stand-in for a Redis server"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RespHandler)
+        self.data = {}
+        # write count per key, compared by EXEC against WATCH
+        self.writes = {}
+        self.lock = threading.Lock()
+        threading.Thread(
+            target=self.serve_forever, args=(0.01,), daemon=True
+        ).start()
+
+    @property
+    def url(self):
+        """Return the redis:// URL of the stand-in"""
+        return "redis://127.0.0.1:%d/0" % self.server_address[1]
+
+
+class TestLRUCache(unittest.TestCase):
+    """Test cases for LRUCache"""
+
+    def test_get_and_set(self):
+        """Test storing and retrieving a value"""
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("missing"))
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted first"""
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    @patch("services.cache.time.monotonic")
+    def test_ttl_expiry(self, mock_monotonic):
+        """Test entries expire after their time-to-live"""
+        mock_monotonic.return_value = 100.0
+        cache = LRUCache(maxsize=2, ttl=10)
+        cache.set("a", 1)
+        mock_monotonic.return_value = 111.0
+        self.assertIsNone(cache.get("a"))
+
+    def test_delete_and_stats(self):
+        """Test delete and hit/miss counters"""
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.delete("a")
+        cache.get("a")
+        self.assertEqual(
+            cache.stats(), {"hits": 1, "misses": 1, "size": 0}
+        )
+
+    @patch("services.cache.time.monotonic")
+    def test_set_newer(self, mock_monotonic):
+        """Test set_newer keeps the entry with the highest version"""
+        mock_monotonic.return_value = 100.0
+        cache = LRUCache(maxsize=2, ttl=10)
+        self.assertTrue(cache.set_newer("a", {"version": 2}))
+        self.assertFalse(cache.set_newer("a", {"version": 1}))
+        self.assertFalse(cache.set_newer("a", {"version": 2, "x": 1}))
+        self.assertEqual(cache.get("a"), {"version": 2})
+        mock_monotonic.return_value = 111.0
+        self.assertTrue(cache.set_newer("a", {"version": 1}))
+
+
+class TestRedisCache(unittest.TestCase):
+    """Test cases for RedisCache against a local stand-in"""
+
+    def setUp(self):
+        """Start a stand-in server"""
+        self.server = RespStandIn()
+        self.cache = cache_from_url(self.server.url, prefix="test:")
+
+    def tearDown(self):
+        """Stop the stand-in server"""
+        self.cache.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_backend_selection(self):
+        """Test the URL scheme selects the backend"""
+        self.assertIsInstance(self.cache, RedisCache)
+        self.assertIsInstance(cache_from_url(""), LRUCache)
+        with self.assertRaises(ValueError):
+            cache_from_url("memcached://localhost")
+
+    def test_round_trip(self):
+        """Test JSON values round-trip under the key prefix"""
+        self.cache.set("a", {"items": {"x": 2}, "version": 3})
+        self.assertEqual(
+            self.cache.get("a"), {"items": {"x": 2}, "version": 3}
+        )
+        self.assertIn(b"test:a", self.server.data)
+        self.cache.delete("a")
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_set_newer(self):
+        """Test set_newer never replaces a newer entry"""
+        self.assertTrue(self.cache.set_newer("a", {"version": 2}))
+        self.assertFalse(self.cache.set_newer("a", {"version": 1}))
+        self.assertTrue(self.cache.set_newer("a", {"version": 3}))
+        self.assertEqual(self.cache.get("a"), {"version": 3})
+
+    def test_set_newer_retries_after_concurrent_write(self):
+        """Test a write between WATCH and EXEC makes set_newer re-check"""
+        self.cache.set("a", {"version": 1})
+        execute = self.cache._execute
+        racer = cache_from_url(self.server.url, prefix="test:")
+
+        def interleave(*args):
+            # another client stores version 5 right after our GET
+            reply = execute(*args)
+            if args[0] == "GET":
+                self.cache._execute = execute
+                racer.set("a", {"version": 5})
+            return reply
+
+        self.cache._execute = interleave
+        self.assertFalse(self.cache.set_newer("a", {"version": 2}))
+        self.assertEqual(self.cache.get("a"), {"version": 5})
+        racer.close()
+
+    def test_clear_only_touches_prefix(self):
+        """Test clear removes this cache's keys and nothing else"""
+        self.server.data[b"other:key"] = b"1"
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.clear()
+        self.assertEqual(list(self.server.data), [b"other:key"])
+
+    def test_unreachable_server_is_a_miss(self):
+        """Test a down server degrades to misses instead of errors"""
+        self.server.shutdown()
+        self.server.server_close()
+        cache = RedisCache("redis://127.0.0.1:1/0", timeout=0.2)
+        self.assertEqual(cache.get("a", "default"), "default")
+        cache.set("a", 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
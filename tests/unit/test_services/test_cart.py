@@ -0,0 +1,209 @@
+#!/usr/bin/python3
+"""Unit tests for atomic cart updates"""
+import threading
+import time
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+from models.client import Client
+from models.engine import instrumentation
+from models.menu_item import MenuItem
+from models.order import Order
+from models.order_item import OrderItem
+from models.restaurant import Restaurant
+from services import cart, catalog_cache
+from ..storage_case import InMemoryStorageTestCase
+
+
+class TestCart(InMemoryStorageTestCase):
+    """Test cases for services.cart"""
+
+    def seed(self):
+        """Add a client and two items"""
+        self.storage.new(Client(id="client_1", username="user",
+                                address="1 Test St", email="u@example.com",
+                                password="hash"))
+        self.storage.new(Restaurant(id="rest_1", name="Test", city="Rabat"))
+        self.storage.new(MenuItem(id="pizza", restaurant_id="rest_1",
+                                  name="Pizza", price=Decimal("10.50")))
+        self.storage.new(MenuItem(id="soda", restaurant_id="rest_1",
+                                  name="Soda", price=Decimal("2.25")))
+        self.storage.save()
+
+    def setUp(self):
+        """Start every test with empty caches"""
+        super().setUp()
+        # the tests run in one process
+        cache_patch = patch("services.cart.CACHE_CARTS", True)
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+        cart.snapshot_cache.clear()
+        catalog_cache.cache.clear()
+
+    def test_increase_creates_order_and_upserts(self):
+        """Test repeated increases share one order and one row"""
+        cart.update_item("client_1", "pizza", "increase")
+        cart.update_item("client_1", "pizza", "increase")
+        result = cart.update_item("client_1", "soda", "increase")
+
+        self.assertEqual(result.total_price, 23.25)
+        self.assertEqual(result.quantity, 1)
+        self.assertEqual(self.storage.count(Order), 1)
+        self.assertEqual(self.storage.count(OrderItem), 2)
+        item = self.storage.find(OrderItem, menu_item_id="pizza")[0]
+        self.assertEqual(item.quantity, 2)
+
+    def test_decrease_to_empty_deletes_order(self):
+        """Test removing the last unit removes the item and the order"""
+        cart.update_item("client_1", "pizza", "increase")
+        cart.update_item("client_1", "pizza", "increase")
+
+        result = cart.update_item("client_1", "pizza", "decrease")
+        self.assertEqual((result.quantity, result.total_price), (1, 10.5))
+
+        result = cart.update_item("client_1", "pizza", "decrease")
+        self.assertIsNone(result.order_id)
+        self.assertEqual(self.storage.count(Order), 0)
+        self.assertEqual(self.storage.count(OrderItem), 0)
+
+    def test_errors(self):
+        """Test invalid updates raise CartError with a status"""
+        with self.assertRaises(cart.CartError) as ctx:
+            cart.update_item("client_1", "missing", "increase")
+        self.assertEqual(ctx.exception.status, 404)
+
+        with self.assertRaises(cart.CartError) as ctx:
+            cart.update_item("client_1", "pizza", "decrease")
+        self.assertEqual(ctx.exception.status, 400)
+
+        cart.update_item("client_1", "pizza", "increase")
+        with self.assertRaises(cart.CartError):
+            cart.update_item("client_1", "soda", "decrease")
+        with self.assertRaises(cart.CartError):
+            cart.update_item("client_1", "pizza", "remove")
+
+    def test_apply_batch(self):
+        """Test a batch coalesces deltas and returns the whole cart"""
+        snapshot = cart.apply_batch("client_1", [
+            ("pizza", 1), ("pizza", 1), ("soda", 3), ("pizza", 1),
+        ])
+        self.assertEqual(snapshot.items, {"pizza": 3, "soda": 3})
+        self.assertEqual(snapshot.total_price, 38.25)
+
+        snapshot = cart.apply_batch("client_1", [("soda", -5), ("pizza", -1)])
+        self.assertEqual(snapshot.items, {"pizza": 2})
+        self.assertEqual(snapshot.total_price, 21.0)
+        self.assertEqual(self.storage.count(Order), 1)
+
+        snapshot = cart.apply_batch("client_1", [("pizza", -2)])
+        self.assertIsNone(snapshot.order_id)
+        self.assertEqual(self.storage.count(Order), 0)
+
+    def test_apply_batch_errors(self):
+        """Test unknown items and oversized batches are rejected whole"""
+        with self.assertRaises(cart.CartError) as ctx:
+            cart.apply_batch("client_1", [("pizza", 1), ("missing", 1)])
+        self.assertEqual(ctx.exception.status, 404)
+        self.assertEqual(self.storage.count(OrderItem), 0)
+
+        with self.assertRaises(cart.CartError) as ctx:
+            cart.apply_batch(
+                "client_1", [("pizza", 1)] * (cart.MAX_BATCH_SIZE + 1)
+            )
+        self.assertEqual(ctx.exception.status, 413)
+        with self.assertRaises(cart.CartError):
+            cart.apply_batch("client_1", [])
+
+    def test_apply_batch_validates_operations(self):
+        """Test malformed ids and out-of-range deltas are a 400"""
+        for operation in ((["pizza"], 1), ("", 1), ("pizza", "1"),
+                          ("pizza", 1.5), ("pizza", True),
+                          ("pizza", cart.MAX_QUANTITY + 1),
+                          ("pizza", -10 ** 30)):
+            with self.assertRaises(cart.CartError) as ctx:
+                cart.apply_batch("client_1", [("soda", 1), operation])
+            self.assertEqual(ctx.exception.status, 400)
+            self.assertIn("Operation 2", str(ctx.exception))
+        self.assertEqual(self.storage.count(OrderItem), 0)
+        snapshot = cart.apply_batch("client_1",
+                                    [("pizza", cart.MAX_QUANTITY)])
+        self.assertEqual(snapshot.items, {"pizza": cart.MAX_QUANTITY})
+
+    def test_snapshot_write_through(self):
+        """Test updates write the cart through and reads skip the database"""
+        self.assertEqual(cart.get_snapshot("client_1").items, {})
+
+        cart.update_item("client_1", "pizza", "increase")
+        snapshot = cart.apply_batch("client_1", [("soda", 2)])
+        self.assertEqual(snapshot.version, 2)
+
+        with instrumentation.query_budget(0):
+            cached = cart.get_snapshot("client_1")
+        self.assertEqual(cached, snapshot)
+        self.assertEqual(cached.items, {"pizza": 1, "soda": 2})
+
+        emptied = cart.apply_batch("client_1", [("pizza", -1), ("soda", -2)])
+        self.assertEqual(emptied.version, 3)
+        self.assertEqual(cart.get_snapshot("client_1").items, {})
+
+    def test_late_write_keeps_newer_snapshot(self):
+        """Test a writer reaching the cache late cannot undo a newer cart"""
+        first = cart.apply_batch("client_1", [("pizza", 1)])
+        second = cart.apply_batch("client_1", [("soda", 1)])
+        self.assertEqual(second.version, first.version + 1)
+        self.assertEqual(
+            self.storage.get(Client, "client_1").cart_version,
+            second.version,
+        )
+
+        cart._store("client_1", first)
+        self.assertEqual(cart.get_snapshot("client_1"), second)
+
+    def test_miss_reads_current_version(self):
+        """Test a rebuilt snapshot keeps the committed version"""
+        version = cart.apply_batch("client_1", [("pizza", 1)]).version
+        cart.snapshot_cache.clear()
+        self.assertEqual(cart.get_snapshot("client_1").version, version)
+
+    @patch("services.cart.CACHE_CARTS", False)
+    def test_uncached_carts_read_the_database(self):
+        """Test carts bypass a per-process cache shared by no worker"""
+        cart.apply_batch("client_1", [("pizza", 1)])
+        self.assertEqual(len(cart.snapshot_cache), 0)
+        item = self.storage.find(OrderItem, menu_item_id="pizza")[0]
+        item.quantity = 5
+        self.storage.save()
+        self.assertEqual(cart.get_snapshot("client_1").items["pizza"], 5)
+        self.assertEqual(len(cart.snapshot_cache), 0)
+
+    def test_refresh_reloads_from_database(self):
+        """Test refresh picks up changes made outside the cart service"""
+        cart.apply_batch("client_1", [("pizza", 1)])
+        item = self.storage.find(OrderItem, menu_item_id="pizza")[0]
+        item.quantity = 5
+        self.storage.save()
+        self.assertEqual(cart.get_snapshot("client_1").items["pizza"], 1)
+        self.assertEqual(cart.refresh("client_1").items["pizza"], 5)
+        self.assertEqual(cart.get_snapshot("client_1").items["pizza"], 5)
+
+    def test_wait_for_change(self):
+        """Test waiters wake on a cart write and time out without one"""
+        version = cart.apply_batch("client_1", [("pizza", 1)]).version
+        self.assertIsNone(cart.wait_for_change("client_1", version, 0.05))
+        self.assertEqual(
+            cart.wait_for_change("client_1", version - 1, 5).version, version
+        )
+
+        writer = threading.Timer(0.1, cart.apply_batch,
+                                 ["client_1", [("pizza", -1)]])
+        writer.start()
+        start = time.monotonic()
+        changed = cart.wait_for_change("client_1", version, 5, interval=5)
+        writer.join()
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(changed.version, version + 1)
+        self.assertEqual(changed.items, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
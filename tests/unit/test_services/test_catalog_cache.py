@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""Unit tests for the catalog reference-data cache"""
+import unittest
+from decimal import Decimal
+from models.engine import instrumentation
+from models.menu_item import MenuItem
+from models.restaurant import Restaurant
+from services import catalog_cache
+from services.catalog_cache import MenuItemRef, RestaurantRef
+from ..storage_case import InMemoryStorageTestCase
+
+
+class TestCatalogCache(InMemoryStorageTestCase):
+    """Test cases for services.catalog_cache"""
+
+    def seed(self):
+        """Add a restaurant and two items"""
+        self.storage.new(Restaurant(id="rest_1", name="Napoli",
+                                    city="Rabat"))
+        self.storage.new(MenuItem(id="pizza", restaurant_id="rest_1",
+                                  name="Pizza", price=Decimal("10.50")))
+        self.storage.new(MenuItem(id="soda", restaurant_id="rest_1",
+                                  name="Soda", price=Decimal("2.25"),
+                                  is_available=False))
+        self.storage.save()
+
+    def setUp(self):
+        """Start every test with an empty cache"""
+        super().setUp()
+        catalog_cache.cache.clear()
+
+    def test_menu_items_read_through(self):
+        """Test misses load in one query and hits make none"""
+        with instrumentation.query_budget(1):
+            found = catalog_cache.menu_items(["pizza", "soda", "pizza",
+                                              "missing"])
+        self.assertEqual(found, {
+            "pizza": MenuItemRef("pizza", "rest_1", "Pizza", 10.5, True,
+                                 None),
+            "soda": MenuItemRef("soda", "rest_1", "Soda", 2.25, False, None),
+        })
+        with instrumentation.query_budget(0):
+            self.assertIs(catalog_cache.menu_item("pizza"), found["pizza"])
+        self.assertIsNone(catalog_cache.menu_item("missing"))
+
+    def test_menu_write_invalidates(self):
+        """Test a committed menu write is seen by the next lookup"""
+        self.assertEqual(catalog_cache.menu_item("pizza").price, 10.5)
+        self.storage.get(MenuItem, "pizza").price = Decimal("12.00")
+        self.storage.save()
+        self.assertEqual(catalog_cache.menu_item("pizza").price, 12.0)
+
+        self.storage.delete(self.storage.get(MenuItem, "soda"))
+        self.storage.save()
+        self.assertIsNone(catalog_cache.menu_item("soda"))
+
+    def test_popularity_keeps_entries(self):
+        """Test counter-only writes leave cached entries valid"""
+        catalog_cache.menu_item("pizza")
+        self.storage.get(MenuItem, "pizza").popularity = 3
+        self.storage.save()
+        with instrumentation.query_budget(0):
+            catalog_cache.menu_item("pizza")
+
+    def test_restaurants(self):
+        """Test restaurants are cached until a restaurant write"""
+        self.assertEqual(catalog_cache.restaurants(),
+                         (RestaurantRef("rest_1", "Napoli", "Rabat", None),))
+        with instrumentation.query_budget(0):
+            catalog_cache.restaurants()
+        self.storage.get(Restaurant, "rest_1").name = "Napoli Pizzeria"
+        self.storage.save()
+        self.assertEqual(catalog_cache.restaurants()[0].name,
+                         "Napoli Pizzeria")
+
+
+if __name__ == "__main__":
+    unittest.main()
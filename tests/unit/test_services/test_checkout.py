@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+"""Unit tests for the checkout summary"""
+import unittest
+from decimal import Decimal
+from flask import Flask
+from models.client import Client
+from models.engine import instrumentation
+from models.menu_item import MenuItem
+from models.restaurant import Restaurant
+from services import cart, catalog_cache, checkout
+from ..storage_case import InMemoryStorageTestCase
+
+
+class TestCheckout(InMemoryStorageTestCase):
+    """Test cases for services.checkout"""
+
+    def seed(self):
+        """Add a client and two items"""
+        self.storage.new(Client(id="client_1", username="user",
+                                address="1 Test St", email="u@example.com",
+                                password="hash"))
+        self.storage.new(Restaurant(id="rest_1", name="Test", city="Rabat"))
+        self.storage.new(MenuItem(id="pizza", restaurant_id="rest_1",
+                                  name="Pizza", price=Decimal("10.50")))
+        self.storage.new(MenuItem(id="soda", restaurant_id="rest_1",
+                                  name="Soda", price=Decimal("2.25")))
+        self.storage.save()
+
+    def setUp(self):
+        """Start every test with empty caches"""
+        super().setUp()
+        cart.snapshot_cache.clear()
+        catalog_cache.cache.clear()
+        self.app = Flask(__name__)
+
+    def test_empty_cart(self):
+        """Test a client without an active order pays the delivery fee"""
+        summary = checkout.get_checkout("client_1")
+        self.assertIsNone(summary.order_id)
+        self.assertEqual(summary.items, ())
+        self.assertEqual(summary.total, checkout.DELIVERY_FEE)
+
+    def test_single_query_memoized_per_request(self):
+        """Test the summary is one query, reused for the whole request"""
+        cart.apply_batch("client_1", [("pizza", 2), ("soda", 1)])
+        with self.app.test_request_context():
+            with instrumentation.query_budget(1):
+                summary = checkout.get_checkout("client_1")
+            with instrumentation.query_budget(0):
+                self.assertIs(checkout.get_checkout("client_1"), summary)
+            self.storage.close()
+        self.assertEqual(summary.subtotal, 23.25)
+        self.assertEqual(summary.total, 28.25)
+        self.assertEqual(
+            [(line.name, line.quantity) for line in summary.items],
+            [("Pizza", 2), ("Soda", 1)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+#!/usr/bin/python3
+"""Unit tests for the typo-tolerant search index"""
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+from models.menu_item import MenuItem
+from models.restaurant import Restaurant
+from services import catalog, fuzzy, search
+from services.fuzzy import FuzzyIndex, deletes, edit_distance
+from ..storage_case import InMemoryStorageTestCase
+
+
+class TestEditDistance(unittest.TestCase):
+    """Test cases for the string helpers"""
+
+    def test_deletes(self):
+        """Test deletions up to the given distance"""
+        self.assertEqual(deletes("abc", 1), {"abc", "bc", "ac", "ab"})
+        self.assertIn("a", deletes("abc", 2))
+        self.assertEqual(deletes("abc", 0), {"abc"})
+
+    def test_edit_distance(self):
+        """Test insertions, deletions, substitutions and transpositions"""
+        self.assertEqual(edit_distance("piza", "pizza", 2), 1)
+        self.assertEqual(edit_distance("buger", "burger", 2), 1)
+        self.assertEqual(edit_distance("crsipy", "crispy", 2), 1)
+        self.assertEqual(edit_distance("pizza", "pizza", 2), 0)
+        self.assertEqual(edit_distance("sushi", "pizza", 2), 3)
+
+
+class TestFuzzyIndex(InMemoryStorageTestCase):
+    """Test cases for services.fuzzy.FuzzyIndex"""
+
+    def seed(self):
+        """Add two restaurants and four items"""
+        self.storage.new(Restaurant(id="rest_1", name="Napoli Pizzeria",
+                                    city="Rabat"))
+        self.storage.new(Restaurant(id="rest_2", name="Burger Grill",
+                                    city="Rabat"))
+        for item_id, name, restaurant_id in (
+            ("item_1", "Pizza Margherita", "rest_1"),
+            ("item_2", "Pizza Pepperoni", "rest_1"),
+            ("item_3", "Cheese Burger", "rest_2"),
+            ("item_4", "Chicken Wings", "rest_2"),
+        ):
+            self.storage.new(MenuItem(id=item_id, name=name,
+                                      restaurant_id=restaurant_id,
+                                      price=Decimal("9.50")))
+        self.storage.save()
+
+    def setUp(self):
+        """Load a fresh index that follows catalog writes"""
+        super().setUp()
+        self.index = FuzzyIndex()
+        listeners_patch = patch.object(catalog, "_listeners",
+                                       [self.index.apply])
+        listeners_patch.start()
+        self.addCleanup(listeners_patch.stop)
+        self.index.load_from_storage()
+
+    def ids(self, query, restaurant="All"):
+        """Return the ids of the meals found for query"""
+        meals, _ = self.index.search(query, restaurant)
+        return [meal["id"] for meal in meals]
+
+    def test_typos(self):
+        """Test misspelt words find the intended meals"""
+        self.assertEqual(self.ids("piza"), ["item_1", "item_2"])
+        self.assertEqual(self.ids("buger")[0], "item_3")
+        self.assertEqual(self.ids("chiken wngs"), ["item_4"])
+        self.assertEqual(self.ids("margehrita"), ["item_1"])
+        self.assertEqual(self.ids("xyzzy"), [])
+
+    def test_meal_fields(self):
+        """Test meals carry the /api/v1/search fields"""
+        meals, total = self.index.search("pepperoni")
+        self.assertEqual(total, 1)
+        self.assertEqual(meals[0], {
+            "id": "item_2", "name": "Pizza Pepperoni", "price": 9.5,
+            "is_available": True, "restaurant_name": "Napoli Pizzeria",
+            "image_name": None,
+        })
+
+    def test_restaurant_names(self):
+        """Test restaurant-name matches rank below item-name matches"""
+        self.assertEqual(self.ids("napol"), ["item_1", "item_2"])
+        # "Cheese Burger" matches by name, "Chicken Wings" by restaurant
+        self.assertEqual(self.ids("burger"), ["item_3", "item_4"])
+        self.assertEqual(self.ids("piza", "Burger Grill"), [])
+        self.assertEqual(self.ids("chiken", "Burger Grill"), ["item_4"])
+
+    def test_follows_commits(self):
+        """Test committed inserts, updates and deletes are applied"""
+        self.storage.new(MenuItem(id="item_5", name="Falafel Wrap",
+                                  restaurant_id="rest_2",
+                                  price=Decimal("7.00")))
+        self.storage.save()
+        self.assertEqual(self.ids("falafl"), ["item_5"])
+
+        item = self.storage.get(MenuItem, "item_5")
+        item.name = "Shawarma Wrap"
+        self.storage.save()
+        self.assertEqual(self.ids("falafl"), [])
+        self.assertEqual(self.ids("shwarma"), ["item_5"])
+
+        restaurant = self.storage.get(Restaurant, "rest_2")
+        restaurant.name = "Kebab Corner"
+        self.storage.save()
+        meals, _ = self.index.search("shwarma")
+        self.assertEqual(meals[0]["restaurant_name"], "Kebab Corner")
+        self.assertEqual(len(self.ids("kebap")), 3)
+        self.assertEqual(self.ids("grill"), [])
+
+        self.storage.delete(item)
+        self.storage.save()
+        self.assertEqual(self.ids("shwarma"), [])
+
+    def test_rollback_not_applied(self):
+        """Test writes that never commit leave the index alone"""
+        self.storage.new(MenuItem(id="item_5", name="Falafel Wrap",
+                                  restaurant_id="rest_2",
+                                  price=Decimal("7.00")))
+        self.storage.rollback()
+        self.assertEqual(self.ids("falafl"), [])
+
+    def test_bulk_write_reloads(self):
+        """Test bulk statements make the next search reload"""
+        self.storage.bulk_new([MenuItem(id="item_5", name="Falafel Wrap",
+                                        restaurant_id="rest_2",
+                                        price=Decimal("7.00"))])
+        self.assertFalse(self.index.loaded)
+        self.assertEqual(self.ids("falafl"), ["item_5"])
+        self.assertTrue(self.index.loaded)
+
+    def test_limit(self):
+        """Test results are cut at limit while total counts every match"""
+        meals, total = self.index.search("pizza", limit=1)
+        self.assertEqual([meal["id"] for meal in meals], ["item_1"])
+        self.assertEqual(total, 2)
+
+    def test_search_fallback(self):
+        """Test search.search falls back to the index when nothing matches"""
+        search.count_cache.clear()
+        search.page_cache.clear()
+        with patch.object(fuzzy, "index", self.index), \
+                patch.object(fuzzy, "ENABLED", True):
+            result = search.search(query="piza", per_page=1)
+            self.assertTrue(result.fuzzy)
+            self.assertEqual(result.total, 2)
+            self.assertEqual([m["id"] for m in result.meals], ["item_1"])
+            self.assertIsNone(result.next_cursor)
+            second = search.search(query="piza", page=2, per_page=1)
+            self.assertEqual([m["id"] for m in second.meals], ["item_2"])
+            faceted = search.search(query="piza", restaurant="Burger Grill",
+                                    with_facets=True)
+            self.assertEqual(faceted.total, 0)
+            self.assertEqual(faceted.facets.restaurants,
+                             {"Napoli Pizzeria": 2})
+            exact = search.search(query="pizza")
+            self.assertFalse(exact.fuzzy)
+        with patch.object(fuzzy, "ENABLED", False):
+            self.assertEqual(search.search(query="piza").total, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
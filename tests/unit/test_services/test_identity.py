@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""Unit tests for the identity cache"""
+import unittest
+from unittest.mock import patch
+from models.client import Client
+from services.identity import ClientPrincipal, IdentityCache
+
+
+class TestIdentityCache(unittest.TestCase):
+    """Test cases for IdentityCache"""
+
+    def setUp(self):
+        """Set up test cases"""
+        self.cache = IdentityCache(maxsize=10, ttl=60)
+        self.client = Client(
+            id="client_id",
+            username="testuser",
+            email="test@example.com",
+            password="hash",
+            address="123 Test St",
+        )
+
+    @patch("models.storage")
+    def test_load_uses_primary_key_lookup(self, mock_storage):
+        """Test a miss resolves the client through storage.get"""
+        mock_storage.get.return_value = self.client
+
+        principal = self.cache.load("client_id")
+
+        mock_storage.get.assert_called_once_with(Client, "client_id")
+        mock_storage.all.assert_not_called()
+        self.assertIsInstance(principal, ClientPrincipal)
+        self.assertEqual(principal.get_id(), "client_id")
+        self.assertEqual(principal.email, "test@example.com")
+
+    @patch("models.storage")
+    def test_load_hits_cache(self, mock_storage):
+        """Test repeated loads are served from the cache"""
+        mock_storage.get.return_value = self.client
+
+        self.cache.load("client_id")
+        self.cache.load("client_id")
+
+        mock_storage.get.assert_called_once()
+
+    @patch("models.storage")
+    def test_invalidate(self, mock_storage):
+        """Test invalidation forces a reload"""
+        mock_storage.get.return_value = self.client
+
+        self.cache.load("client_id")
+        self.cache.invalidate("client_id")
+        self.cache.load("client_id")
+
+        self.assertEqual(mock_storage.get.call_count, 2)
+
+    @patch("models.storage")
+    def test_load_unknown_client(self, mock_storage):
+        """Test an unknown id returns None and is not cached"""
+        mock_storage.get.return_value = None
+
+        self.assertIsNone(self.cache.load("missing"))
+        self.assertIsNone(self.cache.load("missing"))
+        self.assertEqual(mock_storage.get.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+"""Unit tests for the cross-process invalidation bus"""
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+from sqlalchemy import select, update
+from models.cache_version import cache_versions
+from models.engine import instrumentation
+from models.menu_item import MenuItem
+from models.restaurant import Restaurant
+from services import catalog, catalog_cache
+from services.invalidation import LocalBus, TableBus
+from ..storage_case import InMemoryStorageTestCase
+
+
+class TestTableBus(InMemoryStorageTestCase):
+    """Test cases for services.invalidation.TableBus"""
+
+    def setUp(self):
+        """Install a bus that always polls, then add a menu item"""
+        super().setUp()
+        self.bus = TableBus(interval=0)
+        self.listener = MagicMock()
+        self.bus.subscribe(catalog.CHANNEL, self.listener)
+        bus_patch = patch.object(catalog, "bus", self.bus)
+        bus_patch.start()
+        self.addCleanup(bus_patch.stop)
+        # seeded through the test bus, after it is installed
+        self.storage.new(Restaurant(id="rest_1", name="Napoli",
+                                    city="Rabat"))
+        self.storage.new(MenuItem(id="pizza", restaurant_id="rest_1",
+                                  name="Pizza", price=Decimal("10.50")))
+        self.storage.save()
+        catalog_cache.cache.clear()
+
+    def stored_version(self):
+        """Return the catalog channel version in the database"""
+        with self.storage.engine.connect() as conn:
+            return conn.execute(
+                select(cache_versions.c.version)
+                .where(cache_versions.c.name == catalog.CHANNEL)
+            ).scalar()
+
+    def write_elsewhere(self, price):
+        """Change the pizza price the way another process would"""
+        with self.storage.engine.begin() as conn:
+            conn.execute(update(MenuItem.__table__)
+                         .where(MenuItem.id == "pizza")
+                         .values(price=price))
+            self.bus.publish(conn, catalog.CHANNEL)
+
+    def test_writes_publish_in_their_transaction(self):
+        """Test committed catalog writes publish and rollbacks do not"""
+        self.assertEqual(self.stored_version(), 1)
+        self.storage.get(MenuItem, "pizza").name = "Pizza Napoli"
+        self.storage.rollback()
+        self.assertEqual(self.stored_version(), 1)
+
+        self.storage.get(MenuItem, "pizza").popularity = 4
+        self.storage.save()
+        self.assertEqual(self.stored_version(), 1)
+
+        self.storage.get(MenuItem, "pizza").name = "Pizza Napoli"
+        self.storage.save()
+        self.assertEqual(self.stored_version(), 2)
+
+    def test_published_at_commit(self):
+        """Test the version row is written at commit, not at first flush"""
+        with self.storage.session_scope() as session:
+            session.get(MenuItem, "pizza").name = "Pizza Napoli"
+            session.flush()
+            self.assertNotIn("catalog_published", session.info)
+        self.assertEqual(self.stored_version(), 2)
+
+    def test_counter_statements_not_published(self):
+        """Test bulk updates of counter columns only do not publish"""
+        with self.storage.session_scope() as session:
+            session.execute(update(MenuItem.__table__)
+                            .where(MenuItem.id == "pizza")
+                            .values(popularity=MenuItem.popularity + 1))
+        self.assertEqual(self.stored_version(), 1)
+        with self.storage.session_scope() as session:
+            session.execute(update(MenuItem.__table__)
+                            .where(MenuItem.id == "pizza")
+                            .values(popularity=0, name="Pizza Napoli"))
+        self.assertEqual(self.stored_version(), 2)
+
+    def test_own_commits_not_notified(self):
+        """Test a process is not told about its own writes"""
+        self.assertEqual(self.bus.poll(), [])
+        self.storage.get(MenuItem, "pizza").name = "Pizza Napoli"
+        self.storage.save()
+        self.assertEqual(self.bus.poll(), [])
+        self.listener.assert_not_called()
+
+    def test_remote_write_notified(self):
+        """Test writes made elsewhere reach subscribers on the next poll"""
+        self.bus.poll()
+        self.write_elsewhere(Decimal("12.00"))
+        self.assertEqual(self.bus.poll(), [catalog.CHANNEL])
+        self.listener.assert_called_once_with()
+        self.assertEqual(self.bus.poll(), [])
+
+    def test_remote_write_seen_through_own_commit(self):
+        """Test a skipped version on commit counts as a remote write"""
+        self.bus.poll()
+        self.write_elsewhere(Decimal("12.00"))
+        self.storage.get(MenuItem, "pizza").name = "Pizza Napoli"
+        self.storage.save()
+        self.listener.assert_called_once_with()
+        self.assertEqual(self.bus.poll(), [])
+
+    def test_remote_write_invalidates_catalog_caches(self):
+        """Test catalog caches drop entries written by another process"""
+        self.bus.subscribe(catalog.CHANNEL, catalog._changed_elsewhere)
+        self.bus.poll()
+        self.assertEqual(catalog_cache.menu_item("pizza").price, 10.5)
+        self.write_elsewhere(Decimal("12.00"))
+        self.assertEqual(catalog_cache.menu_item("pizza").price, 10.5)
+        version = catalog.version()
+        self.bus.poll()
+        self.assertEqual(catalog.version(), version + 1)
+        self.assertEqual(catalog_cache.menu_item("pizza").price, 12.0)
+
+    def test_interval(self):
+        """Test polls closer than the interval make no query"""
+        self.bus.interval = 60
+        self.bus.poll()
+        self.write_elsewhere(Decimal("12.00"))
+        with instrumentation.query_budget(0):
+            self.assertEqual(self.bus.poll(), [])
+        self.assertEqual(self.bus.poll(force=True), [catalog.CHANNEL])
+
+
+class TestLocalBus(unittest.TestCase):
+    """Test cases for services.invalidation.LocalBus"""
+
+    def test_nothing_announced(self):
+        """Test the stand-in publishes and polls nothing"""
+        bus = LocalBus()
+        listener = MagicMock()
+        bus.subscribe(catalog.CHANNEL, listener)
+        self.assertIsNone(bus.publish(MagicMock(), catalog.CHANNEL))
+        bus.committed(catalog.CHANNEL, None)
+        self.assertEqual(bus.poll(force=True), [])
+        listener.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,253 @@
+#!/usr/bin/python3
+"""Unit tests for menu search"""
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+from models.engine import instrumentation
+from models.menu_item import MenuItem
+from models.restaurant import Restaurant
+from services import catalog, search
+from services.cache import LRUCache
+from ..storage_case import InMemoryStorageTestCase
+
+
+class TestSearch(InMemoryStorageTestCase):
+    """Test cases for services.search"""
+
+    def seed(self):
+        """Add two restaurants and twenty items"""
+        self.storage.new(Restaurant(id="rest_1", name="Pizzeria",
+                                    city="Rabat"))
+        self.storage.new(Restaurant(id="rest_2", name="Grill", city="Rabat"))
+        self.storage.save()
+        # duplicate names check that (name, id) breaks ties
+        self.storage.bulk_new(
+            MenuItem(id=f"item_{i:02}", name=f"Pizza {i % 7}",
+                     restaurant_id="rest_1" if i % 3 else "rest_2",
+                     price=Decimal("9.50"))
+            for i in range(20)
+        )
+
+    def setUp(self):
+        """Start every test with empty caches"""
+        super().setUp()
+        search.count_cache.clear()
+        search.page_cache.clear()
+
+    def walk(self, **filters):
+        """Collect every page by following cursors"""
+        ids, cursor = [], None
+        while True:
+            result = search.search(cursor=cursor, per_page=3, **filters)
+            ids.extend(meal["id"] for meal in result.meals)
+            cursor = result.next_cursor
+            if cursor is None:
+                return ids, result.total
+
+    def test_cursor_pages_match_page_numbers(self):
+        """Test cursors visit every meal once, in the page-number order"""
+        ids, total = self.walk(query="pizza")
+        self.assertEqual(total, 20)
+        self.assertEqual(len(set(ids)), 20)
+        by_page = []
+        for page in range(1, 8):
+            by_page.extend(
+                m["id"] for m in search.search(page=page, per_page=3).meals
+            )
+        self.assertEqual(ids, by_page)
+
+        grill, total = self.walk(restaurant="Grill")
+        self.assertEqual(total, 7)
+        self.assertEqual(len(grill), 7)
+
+    def test_fulltext_mode(self):
+        """Test relevance-ranked results page through score cursors"""
+        self.storage.get(Restaurant, "rest_2").name = "Pizza Grill"
+        self.storage.save()
+        with patch.object(search, "FULLTEXT_SEARCH", True):
+            ids, total = self.walk(query="pizza")
+            by_page = []
+            for page in range(1, 8):
+                by_page.extend(m["id"] for m in search.search(
+                    query="pizza", page=page, per_page=3).meals)
+            first = search.search(query="pizza grill", per_page=3,
+                                  with_facets=True)
+            grill, grill_total = self.walk(query="pizza",
+                                           restaurant="Pizza Grill")
+            with self.assertRaises(search.SearchError):
+                search.search(query="pizza",
+                              cursor=search.encode_cursor("a", "b"))
+        self.assertEqual(total, 20)
+        self.assertEqual(sorted(ids), sorted(set(ids)))
+        self.assertEqual(ids, by_page)
+        # every word must match, so only Grill items qualify
+        self.assertEqual(first.total, 7)
+        self.assertEqual({m["restaurant_name"] for m in first.meals},
+                         {"Pizza Grill"})
+        self.assertEqual(first.facets.restaurants, {"Pizza Grill": 7})
+        self.assertEqual(grill_total, 7)
+        self.assertEqual(sorted(grill), sorted(set(grill)))
+        self.assertEqual(len(grill), 7)
+
+    def test_invalid_position(self):
+        """Test malformed cursors and pages are rejected"""
+        for kwargs in ({"cursor": "not-a-cursor"}, {"page": 0},
+                       {"cursor": search.encode_cursor("a", "b")[:-2]}):
+            with self.assertRaises(search.SearchError):
+                search.search(**kwargs)
+
+    def test_count_cached_until_menu_write(self):
+        """Test totals are reused until the catalog changes"""
+        search.search(query="pizza 1")
+        with instrumentation.query_budget(1):
+            self.assertEqual(search.search(query="pizza 1").total, 3)
+
+        before = catalog.version()
+        self.storage.new(MenuItem(name="Pizza 1 special", price=5,
+                                  restaurant_id="rest_1"))
+        self.storage.save()
+        self.assertEqual(catalog.version(), before + 1)
+        self.assertEqual(search.search(query="pizza 1").total, 4)
+
+        self.storage.bulk_upsert(MenuItem, [
+            {"id": "item_01", "name": "Calzone", "price": 7,
+             "restaurant_id": "rest_1"}
+        ])
+        self.assertEqual(catalog.version(), before + 2)
+        self.assertEqual(search.search(query="pizza 1").total, 3)
+
+    def test_facets(self):
+        """Test facet counts come from one grouped query"""
+        item = self.storage.get(MenuItem, "item_00")
+        item.price, item.is_available = Decimal("25.00"), False
+        self.storage.save()
+        # page, total and facets: one query each
+        with instrumentation.query_budget(3):
+            result = search.search(query="pizza", restaurant="Grill",
+                                   with_facets=True)
+        self.assertEqual(result.total, 7)
+        self.assertEqual(result.facets.restaurants,
+                         {"Pizzeria": 13, "Grill": 7})
+        self.assertEqual(result.facets.availability,
+                         {"available": 6, "unavailable": 1})
+        self.assertEqual(result.facets.prices,
+                         {"0-10": 6, "10-20": 0, "20-30": 1, "30+": 0})
+        self.assertIsNone(search.search(query="pizza").facets)
+
+        everywhere = search.search(query="pizza 1", with_facets=True)
+        self.assertEqual(everywhere.facets.restaurants,
+                         {"Pizzeria": 2, "Grill": 1})
+        self.assertEqual(sum(everywhere.facets.prices.values()), 3)
+        self.assertEqual(search.price_bucket(9.99), "0-10")
+        self.assertEqual(search.price_bucket(10), "10-20")
+        self.assertEqual(search.price_bucket(99), "30+")
+
+    def test_response_cache(self):
+        """Test equivalent searches hit the cache until a menu write"""
+        first, hit = search.cached_search(query="Pizza  1 ")
+        self.assertFalse(hit)
+        with instrumentation.query_budget(0):
+            again, hit = search.cached_search(query="pizza 1")
+        self.assertTrue(hit)
+        self.assertIs(again, first)
+        self.assertFalse(search.cached_search(query="pizza 1", page=2)[1])
+
+        self.storage.get(MenuItem, "item_01").delete()
+        self.storage.save()
+        result, hit = search.cached_search(query="pizza 1")
+        self.assertFalse(hit)
+        self.assertEqual(result.total, 2)
+        stats = search.cache_stats()["pages"]
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 3))
+
+    def price_and_popularity(self):
+        """Give every meal a price and popularity with repeated values"""
+        for i in range(20):
+            item = self.storage.get(MenuItem, f"item_{i:02}")
+            item.price = Decimal(5 + i % 4 * 5)
+            item.popularity = i % 6
+            item.is_available = i % 5 != 0
+        self.storage.save()
+
+    def test_sorts_page_through_cursors(self):
+        """Test price and popularity sorts keep cursor and page orders"""
+        self.price_and_popularity()
+        items = [self.storage.get(MenuItem, f"item_{i:02}")
+                 for i in range(20)]
+        expected = {
+            "price": [m.id for m in sorted(
+                items, key=lambda m: (m.price, m.id))],
+            "popularity": [m.id for m in sorted(
+                items, key=lambda m: (-m.popularity, m.id))],
+            "name": [m.id for m in sorted(
+                items, key=lambda m: (m.name, m.id))],
+        }
+        for sort, order in expected.items():
+            ids, total = self.walk(sort=sort)
+            self.assertEqual(total, 20)
+            self.assertEqual(ids, order, sort)
+            by_page = []
+            for page in range(1, 8):
+                by_page.extend(m["id"] for m in search.search(
+                    page=page, per_page=3, sort=sort).meals)
+            self.assertEqual(by_page, order, sort)
+
+    def test_filters(self):
+        """Test price range and availability narrow results and facets"""
+        self.price_and_popularity()
+        filters = search.Filters(min_price=10, max_price=15,
+                                 available_only=True)
+        ids, total = self.walk(filters=filters, sort="price")
+        expected = [f"item_{i:02}" for i in range(20)
+                    if i % 4 in (1, 2) and i % 5]
+        self.assertEqual(total, len(expected))
+        self.assertEqual(sorted(ids), expected)
+        prices = [m["price"] for m in search.search(
+            filters=filters, sort="price", per_page=20).meals]
+        self.assertEqual(prices, sorted(prices))
+        self.assertTrue(all(10 <= p <= 15 for p in prices))
+
+        faceted = search.search(filters=filters, with_facets=True)
+        self.assertEqual(faceted.facets.availability,
+                         {"available": total, "unavailable": 0})
+        self.assertEqual(search.search(
+            filters=search.Filters(min_price=100)).total, 0)
+
+    def test_unknown_availability_matches_facets(self):
+        """Test a NULL availability is unavailable to filter and facets"""
+        item = self.storage.get(MenuItem, "item_01")
+        item.is_available = None
+        self.storage.save()
+        filters = search.Filters(available_only=True)
+        result = search.search(query="pizza", with_facets=True)
+        self.assertEqual(result.facets.availability,
+                         {"available": 19, "unavailable": 1})
+        self.assertEqual(search.search(query="pizza", filters=filters).total,
+                         19)
+        self.assertFalse(filters.accepts({"price": 9.5,
+                                          "is_available": None}))
+
+    def test_invalid_sort_and_cursor(self):
+        """Test unknown sorts and malformed price cursors are rejected"""
+        with self.assertRaises(search.SearchError):
+            search.search(sort="rating")
+        with self.assertRaises(search.SearchError):
+            search.search(sort="price", cursor="not-a-cursor")
+
+    def test_cached_search_keys_on_filters(self):
+        """Test pages with different filters or sorts are cached apart"""
+        self.price_and_popularity()
+        cheap = search.Filters(max_price=5)
+        with patch.object(search, "page_cache", LRUCache(maxsize=8)):
+            first, _ = search.cached_search(filters=cheap)
+            dear, hit = search.cached_search(
+                filters=search.Filters(min_price=20))
+            self.assertFalse(hit)
+            self.assertNotEqual(first.meals, dear.meals)
+            self.assertTrue(search.cached_search(filters=cheap)[1])
+            self.assertFalse(
+                search.cached_search(filters=cheap, sort="price")[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+"""Unit tests for request coalescing"""
+import threading
+import unittest
+from services.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for SingleFlight"""
+
+    def setUp(self):
+        """Set up a flight and a load that blocks until released"""
+        self.flight = SingleFlight()
+        self.release = threading.Event()
+        self.loads = 0
+
+    def load(self):
+        """Count the call and wait for the test to release it"""
+        self.loads += 1
+        self.release.wait(5)
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+    def run_concurrently(self, key, callers=8):
+        """Start callers on key, release the load, return their results"""
+        results = []
+
+        def caller():
+            try:
+                results.append(self.flight.do(key, self.load))
+            except Exception as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=caller) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        while self.flight.stats()["shared"] < callers - 1:
+            threading.Event().wait(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_callers_share_one_load(self):
+        """Test one load runs and every caller gets its result"""
+        self.outcome = ["meal"]
+        results = self.run_concurrently("burgers")
+        self.assertEqual(self.loads, 1)
+        self.assertTrue(all(value is self.outcome for value, _ in results))
+        self.assertEqual(sorted(shared for _, shared in results),
+                         [False] + [True] * 7)
+        self.assertEqual(self.flight.stats(),
+                         {"calls": 1, "shared": 7, "timeouts": 0,
+                          "in_flight": 0})
+
+    def test_error_reaches_every_caller(self):
+        """Test a failed load raises in all waiters and is not kept"""
+        self.outcome = RuntimeError("database down")
+        results = self.run_concurrently("burgers", callers=4)
+        self.assertEqual(self.loads, 1)
+        self.assertTrue(all(r is self.outcome for r in results))
+        self.outcome = "recovered"
+        self.assertEqual(self.flight.do("burgers", self.load),
+                         ("recovered", False))
+
+    def test_waiters_load_themselves_after_timeout(self):
+        """Test a hung load only holds waiters for wait_timeout"""
+        self.flight = SingleFlight(wait_timeout=0.05)
+        self.outcome = "slow"
+        leader = threading.Thread(target=self.flight.do,
+                                  args=("burgers", self.load))
+        leader.start()
+        while self.loads == 0:
+            threading.Event().wait(0.001)
+        self.assertEqual(self.flight.do("burgers", lambda: "fresh"),
+                         ("fresh", False))
+        self.release.set()
+        leader.join()
+        self.assertEqual(self.flight.stats(),
+                         {"calls": 2, "shared": 0, "timeouts": 1,
+                          "in_flight": 0})
+
+    def test_distinct_keys_load_separately(self):
+        """Test different keys do not wait on each other"""
+        self.release.set()
+        self.outcome = "x"
+        self.flight.do("a", self.load)
+        self.flight.do("b", self.load)
+        self.assertEqual(self.loads, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+#!/usr/bin/python3
+"""Unit tests for search-bar suggestions"""
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+from models.menu_item import MenuItem
+from models.restaurant import Restaurant
+from services import catalog, suggest
+from services.suggest import SuggestIndex
+from ..storage_case import InMemoryStorageTestCase
+
+
+class TestSuggestIndex(InMemoryStorageTestCase):
+    """Test cases for services.suggest.SuggestIndex"""
+
+    def seed(self):
+        """Add two restaurants and four items"""
+        self.storage.new(Restaurant(id="rest_1", name="Napoli Pizzeria",
+                                    city="Rabat"))
+        self.storage.new(Restaurant(id="rest_2", name="Burger Grill",
+                                    city="Rabat"))
+        for item_id, name, restaurant_id, popularity in (
+            ("item_1", "Pizza Margherita", "rest_1", 5),
+            ("item_2", "Pizza Pepperoni", "rest_1", 9),
+            ("item_3", "Cheese Burger", "rest_2", 7),
+            ("item_4", "Pizza Margherita", "rest_2", 6),
+        ):
+            self.storage.new(MenuItem(id=item_id, name=name,
+                                      restaurant_id=restaurant_id,
+                                      price=Decimal("9.50"),
+                                      popularity=popularity))
+        self.storage.save()
+
+    def setUp(self):
+        """Load a fresh index that follows catalog writes"""
+        super().setUp()
+        self.index = SuggestIndex()
+        listeners_patch = patch.object(catalog, "_listeners",
+                                       [self.index.apply])
+        listeners_patch.start()
+        self.addCleanup(listeners_patch.stop)
+        self.index.load_from_storage()
+
+    def texts(self, prefix, limit=suggest.TOP_K):
+        """Return the suggested texts for prefix"""
+        return [s["text"] for s in self.index.suggest(prefix, limit)]
+
+    def test_popularity_order(self):
+        """Test names sharing a prefix are ordered by summed popularity"""
+        # the restaurant sums its menu (14); the margheritas 5 + 6 = 11
+        # beat the pepperoni's 9
+        self.assertEqual(self.texts("piz"),
+                         ["Napoli Pizzeria", "Pizza Margherita",
+                          "Pizza Pepperoni"])
+        self.assertEqual(self.index.suggest("napoli"),
+                         [{"text": "Napoli Pizzeria", "type": "restaurant"}])
+        self.assertEqual(self.texts("piz", limit=1), ["Napoli Pizzeria"])
+
+    def test_word_prefixes(self):
+        """Test any word of a name matches, case and spacing aside"""
+        self.assertEqual(self.texts("MARG"), ["Pizza Margherita"])
+        self.assertEqual(self.texts("  cheese   bur"), ["Cheese Burger"])
+        self.assertEqual(self.texts("burger"),
+                         ["Burger Grill", "Cheese Burger"])
+        self.assertEqual(self.texts("pizza "),
+                         ["Pizza Margherita", "Pizza Pepperoni"])
+        self.assertEqual(self.texts("sushi"), [])
+        self.assertEqual(self.texts(""), [])
+
+    def test_record_orders(self):
+        """Test confirmed orders reorder suggestions"""
+        self.index.record_orders({"item_2": 3, "unknown": 4})
+        self.assertEqual(self.texts("pizza "),
+                         ["Pizza Pepperoni", "Pizza Margherita"])
+        self.index.record_orders({"item_3": 10})
+        # Burger Grill now sums 17 + 6
+        self.assertEqual(self.texts("burger"),
+                         ["Burger Grill", "Cheese Burger"])
+        self.assertEqual(self.texts("gri"), ["Burger Grill"])
+
+    def test_follows_commits(self):
+        """Test committed inserts, renames and deletes are applied"""
+        self.storage.new(MenuItem(id="item_5", name="Falafel Wrap",
+                                  restaurant_id="rest_2",
+                                  price=Decimal("7.00"), popularity=1))
+        self.storage.save()
+        self.assertEqual(self.texts("fal"), ["Falafel Wrap"])
+
+        item = self.storage.get(MenuItem, "item_4")
+        item.name = "Pizza Diavola"
+        self.storage.save()
+        self.assertEqual(self.texts("pizza "),
+                         ["Pizza Pepperoni", "Pizza Diavola",
+                          "Pizza Margherita"])
+
+        restaurant = self.storage.get(Restaurant, "rest_2")
+        restaurant.name = "Kebab Corner"
+        self.storage.save()
+        self.assertEqual(self.texts("keb"), ["Kebab Corner"])
+        self.assertEqual(self.texts("grill"), [])
+
+        self.storage.delete(self.storage.get(MenuItem, "item_5"))
+        self.storage.save()
+        self.assertEqual(self.texts("fal"), [])
+
+    def test_popularity_write_is_not_a_catalog_change(self):
+        """Test a popularity-only update leaves the catalog version alone"""
+        version = catalog.version()
+        item = self.storage.get(MenuItem, "item_1")
+        item.popularity = MenuItem.popularity + 2
+        self.storage.save()
+        self.assertEqual(catalog.version(), version)
+        self.storage.refresh_session()
+        self.assertEqual(self.storage.get(MenuItem, "item_1").popularity, 7)
+
+    def test_bulk_write_reloads_in_background(self):
+        """Test bulk statements reload the index off the request path"""
+        loader = self.index.reload_in_background()
+        loader.join()
+        self.storage.bulk_new([MenuItem(id="item_5", name="Falafel Wrap",
+                                        restaurant_id="rest_2",
+                                        price=Decimal("7.00"))])
+        if self.index._loader is not None:
+            self.index._loader.join()
+        self.assertEqual(self.texts("fal"), ["Falafel Wrap"])
+
+    def test_background_reload_releases_its_session(self):
+        """Test the loader thread closes the session it opened"""
+        with patch.object(self.storage, "close",
+                          wraps=self.storage.close) as close:
+            self.index.reload_in_background().join()
+        close.assert_called_once_with()
+        self.assertIn("Pizza Margherita", self.texts("piz"))
+
+    def test_many_names(self):
+        """Test precomputed prefixes stay exact through updates"""
+        index = SuggestIndex()
+        items = [{"id": f"m{i}", "name": f"Dish {i}", "restaurant_id": "r",
+                  "popularity": i % 50} for i in range(500)]
+        index.load([("r", "Diner")], items)
+
+        def expected(prefix):
+            matching = [item for item in items
+                        if any(key.startswith(prefix) for key in
+                               suggest.name_keys(item["name"].lower()))]
+            matching.sort(key=lambda item: (-item["popularity"],
+                                            item["name"].lower()))
+            return [item["name"] for item in matching[:suggest.TOP_K]]
+
+        for prefix in ("dish", "dish 1", "1", "4"):
+            self.assertEqual([s["text"] for s in index.suggest(prefix)],
+                             expected(prefix))
+        index.record_orders({"m1": 100})
+        items[1]["popularity"] += 100
+        index.remove_item("m49")
+        del items[49]
+        for prefix in ("dish", "dish 1", "4"):
+            self.assertEqual([s["text"] for s in index.suggest(prefix)],
+                             expected(prefix))
+
+
+if __name__ == "__main__":
+    unittest.main()
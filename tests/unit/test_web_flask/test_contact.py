@@ -5,7 +5,7 @@ from unittest.mock import patch, PropertyMock
 from flask import Flask
 from flask_login import LoginManager, UserMixin, login_user
 from routes.contact import contact_routes
-from models.restaurant import Restaurant
+from services.catalog_cache import RestaurantRef
 from functools import wraps
 
 
@@ -72,24 +72,22 @@ class TestContactRoutes(unittest.TestCase):
         self.render_patch.stop()
 
     @patch("routes.contact.current_user", new_callable=PropertyMock)
-    @patch("routes.contact.storage")
-    def test_contact_page_render(self, mock_storage, mock_current_user):
+    @patch("routes.contact.catalog_cache.restaurants")
+    def test_contact_page_render(self, mock_restaurants, mock_current_user):
         """Test contact page rendering"""
         mock_current_user.return_value = self.mock_user
-        mock_restaurants = [
-            Restaurant(
-                name="Test Restaurant",
-                city="Test City",
-                id="test_restaurant_id",
-            )
-        ]
-        mock_storage.all.return_value = {
-            f"Restaurant.{r.id}": r for r in mock_restaurants
-        }
+        mock_restaurants.return_value = (
+            RestaurantRef("test_restaurant_id", "Test Restaurant",
+                          "Test City", None),
+        )
 
         response = self.client.get("/contact")
         self.assertEqual(response.status_code, 200)
-        mock_storage.all.assert_called_once_with(Restaurant)
+        mock_restaurants.assert_called_once_with()
+        self.assertEqual(
+            self.mock_render.call_args[1]["restaurants"],
+            [{"id": "test_restaurant_id", "name": "Test Restaurant"}],
+        )
 
     @patch("routes.contact.current_user", new_callable=PropertyMock)
     @patch("routes.contact.storage")
@@ -6,8 +6,8 @@ from flask import Flask
 from flask_login import LoginManager, UserMixin, login_user
 from routes.login import login_routes, logout_routes, order_routes
 from models.client import Client
-from models.menu_item import MenuItem
-from decimal import Decimal
+from services.cart import CartSnapshot
+from services.catalog_cache import MenuItemRef
 
 
 class MockUser(UserMixin):
@@ -149,18 +149,20 @@ class TestLoginRoutes(unittest.TestCase):
             response = self.client.get("/logout", follow_redirects=True)
             self.assertEqual(response.status_code, 200)
 
-    @patch("routes.login.storage")
+    @patch("routes.login.cart.apply_batch")
+    @patch("routes.login.catalog_cache.menu_item")
     @patch("routes.login.current_user")
-    def test_add_menu_item_success(self, mock_current_user, mock_storage):
+    def test_add_menu_item_success(
+        self, mock_current_user, mock_menu_item, mock_batch
+    ):
         """Test successful addition of menu item to order"""
         mock_current_user.id = self.mock_user.id
-        mock_menu_item = MenuItem(
-            id="test_item_id",
-            name="Test Item",
-            price=Decimal("10.99"),
-            is_available=True,
+        mock_menu_item.return_value = MenuItemRef(
+            "test_item_id", "rest_id", "Test Item", 10.99, True, None
+        )
+        mock_batch.return_value = CartSnapshot(
+            "order_id", 10.99, "active", {"test_item_id": 1}
         )
-        mock_storage.get.return_value = mock_menu_item
 
         test_data = {"menu_item_id": "test_item_id", "quantity_change": 1}
 
@@ -171,21 +173,23 @@ class TestLoginRoutes(unittest.TestCase):
         self.assertEqual(
             response.json["status"], "success"
         )  # Check exact key
+        mock_batch.assert_called_once_with(
+            self.mock_user.id, [("test_item_id", 1)]
+        )
+        self.assertEqual(response.json["item"]["quantity"], 1)
+        self.assertEqual(response.json["item"]["price"], 10.99)
+        mock_menu_item.assert_called_once_with("test_item_id")
 
-    @patch("routes.login.storage")
+    @patch("routes.login.catalog_cache.menu_item")
     @patch("routes.login.current_user")
     def test_add_menu_item_unavailable(
-        self, mock_current_user, mock_storage
+        self, mock_current_user, mock_menu_item
     ):
         """Test adding unavailable menu item"""
         mock_current_user.id = self.mock_user.id
-        mock_menu_item = MenuItem(
-            id="test_item_id",
-            name="Test Item",
-            price=Decimal("10.99"),
-            is_available=False,
+        mock_menu_item.return_value = MenuItemRef(
+            "test_item_id", "rest_id", "Test Item", 10.99, False, None
         )
-        mock_storage.get.return_value = mock_menu_item
 
         test_data = {"menu_item_id": "test_item_id", "quantity_change": 1}
 
@@ -8,6 +8,7 @@ from routes.order import order_routes
 from models.order import Order
 from models.order_item import OrderItem
 from models.menu_item import MenuItem
+from services.cart import CartError, CartSnapshot, CartUpdate
 from decimal import Decimal
 
 
@@ -73,47 +74,88 @@ class TestOrderRoutes(unittest.TestCase):
         self.render_patch.stop()
 
     @patch("routes.order.current_user", new_callable=PropertyMock)
-    @patch("routes.order.storage")
-    def test_update_cart_increase(self, mock_storage, mock_current_user):
+    @patch("routes.order.cart.update_item")
+    def test_update_cart_increase(self, mock_update, mock_current_user):
         """Test increasing item quantity in cart"""
         mock_current_user.return_value = self.mock_user
+        mock_update.return_value = CartUpdate(
+            "test_order_id", 10.99, "active", 1
+        )
 
-        # Mock the menu item
-        mock_menu_item = MenuItem(
-            id="test_item_id",
-            name="Test Item",
-            price=Decimal("10.99"),
-            is_available=True,
+        test_data = {"menu_item_id": "test_item_id", "action": "increase"}
+
+        response = self.client.post(
+            "/api/v1/cart/update",
+            json=test_data,
+            headers={"Content-Type": "application/json"},
         )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["order"]["total_price"], 10.99)
+        self.assertEqual(response.json["item"]["quantity"], 1)
 
-        # Mock the session query
-        mock_session = MagicMock()
-        mock_session.query.return_value.get.return_value = mock_menu_item
+    @patch("routes.order.current_user", new_callable=PropertyMock)
+    @patch("routes.order.cart.update_item")
+    def test_update_cart_error(self, mock_update, mock_current_user):
+        """Test cart errors map to their status code"""
+        mock_current_user.return_value = self.mock_user
+        mock_update.side_effect = CartError("Item not found", 404)
 
-        # Mock active order
-        mock_order = Order(
-            id="test_order_id",
-            client_id=self.mock_user.id,
-            status="active",
-            total_price=Decimal("0"),
+        response = self.client.post(
+            "/api/v1/cart/update",
+            json={"menu_item_id": "missing", "action": "increase"},
         )
-        mock_order.order_items = []
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json["error"], "Item not found")
 
-        mock_session.query.return_value.filter_by.return_value.options.return_value.first.return_value = (
-            mock_order
+    @patch("routes.order.current_user", new_callable=PropertyMock)
+    @patch("routes.order.cart.apply_batch")
+    def test_batch_update_cart(self, mock_batch, mock_current_user):
+        """Test a batch of operations is applied in one call"""
+        mock_current_user.return_value = self.mock_user
+        mock_batch.return_value = CartSnapshot(
+            "test_order_id", 21.98, "active", {"test_item_id": 2}
         )
-        mock_storage.session_scope.return_value.__enter__.return_value = (
-            mock_session
+
+        response = self.client.post(
+            "/api/v1/cart/batch",
+            json={"operations": [
+                {"menu_item_id": "test_item_id", "delta": 1},
+                {"menu_item_id": "test_item_id", "delta": 1},
+            ]},
+        )
+        self.assertEqual(response.status_code, 200)
+        mock_batch.assert_called_once()
+        self.assertEqual(
+            mock_batch.call_args[0][1],
+            [("test_item_id", 1), ("test_item_id", 1)],
+        )
+        self.assertEqual(
+            response.json["items"],
+            [{"menu_item_id": "test_item_id", "quantity": 2}],
         )
 
-        test_data = {"menu_item_id": "test_item_id", "action": "increase"}
+        response = self.client.post(
+            "/api/v1/cart/batch", json={"operations": [{"delta": 1}]}
+        )
+        self.assertEqual(response.status_code, 400)
 
+    @patch("routes.order.current_user", new_callable=PropertyMock)
+    def test_batch_update_cart_invalid_operations(self, mock_current_user):
+        """Test malformed operations are rejected before any query"""
+        mock_current_user.return_value = self.mock_user
+        for operation in ({"menu_item_id": 5, "delta": 1},
+                          {"menu_item_id": ["a"], "delta": 1},
+                          {"menu_item_id": "item", "delta": 10 ** 20},
+                          {"menu_item_id": "item", "delta": "1"}):
+            response = self.client.post(
+                "/api/v1/cart/batch", json={"operations": [operation]}
+            )
+            self.assertEqual(response.status_code, 400, operation)
+            self.assertIn("Operation 1", response.json["error"])
         response = self.client.post(
-            "/api/v1/cart/update",
-            json=test_data,
-            headers={"Content-Type": "application/json"},
+            "/api/v1/cart/batch", json={"operations": ["item"]}
         )
-        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.status_code, 400)
 
     @patch("routes.order.current_user", new_callable=PropertyMock)
     @patch("routes.order.storage")
@@ -166,41 +208,38 @@ class TestOrderRoutes(unittest.TestCase):
             self.assertEqual(response.status_code, 200)
 
     @patch("routes.order.current_user", new_callable=PropertyMock)
-    @patch("routes.order.storage")
-    def test_get_cart_state(self, mock_storage, mock_current_user):
-        """Test getting cart state"""
+    @patch("routes.order.cart.get_snapshot")
+    def test_get_cart_state(self, mock_snapshot, mock_current_user):
+        """Test getting cart state from the snapshot cache"""
         mock_current_user.return_value = self.mock_user
-
-        # Mock active order with items
-        mock_order = Order(
-            id="test_order_id",
-            client_id=self.mock_user.id,
-            status="active",
-            total_price=Decimal("21.98"),
+        mock_snapshot.return_value = CartSnapshot(
+            "test_order_id", 21.98, "active", {"item1": 2, "item2": 1}, 4
         )
-        mock_order_items = [
-            OrderItem(menu_item_id="item1", quantity=2),
-            OrderItem(menu_item_id="item2", quantity=1),
-        ]
-        mock_order.order_items = mock_order_items
-
-        mock_storage.all.return_value = {"Order.test_order": mock_order}
 
         response = self.client.get("/api/v1/cart/state")
         self.assertEqual(response.status_code, 200)
         self.assertIn("items", response.json)
         self.assertIn("order", response.json)
+        self.assertEqual(len(response.json["items"]), 2)
+        self.assertEqual(response.json["version"], 4)
 
+    @patch("routes.order.cart.refresh")
+    @patch("routes.order.suggest.index")
     @patch("routes.order.current_user", new_callable=PropertyMock)
     @patch("routes.order.storage")
-    def test_confirm_order(self, mock_storage, mock_current_user):
-        """Test order confirmation"""
+    def test_confirm_order(self, mock_storage, mock_current_user,
+                           mock_suggest, mock_refresh):
+        """Test order confirmation counts ordered units as popularity"""
         mock_current_user.return_value = self.mock_user
         mock_session = MagicMock()
 
         # Mock active order
         mock_order = MagicMock()
         mock_order.total_price = Decimal("21.98")
+        mock_order.order_items = [
+            OrderItem(menu_item_id="item1", quantity=2,
+                      menu_item=MenuItem(id="item1", popularity=5)),
+        ]
         mock_session.query.return_value.filter_by.return_value.options.return_value.first.return_value = (
             mock_order
         )
@@ -209,9 +248,17 @@ class TestOrderRoutes(unittest.TestCase):
             mock_session
         )
 
+        scope = mock_storage.session_scope.return_value
+        # the cart is reloaded only after the transaction committed
+        mock_refresh.side_effect = lambda client_id: self.assertTrue(
+            scope.__exit__.called
+        )
+
         response = self.client.post("/confirm_order")
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response.json["success"])
+        mock_suggest.record_orders.assert_called_once_with({"item1": 2})
+        mock_refresh.assert_called_once()
 
     @patch("routes.order.current_user", new_callable=PropertyMock)
     @patch("routes.order.storage")
@@ -1,14 +1,15 @@
 #!/usr/bin/python3
 """Unit tests for payment routes"""
+import threading
 import unittest
-from unittest.mock import patch, PropertyMock, MagicMock
+from unittest.mock import patch, PropertyMock
 from flask import Flask
 from flask_login import LoginManager, UserMixin, login_user
-from routes.payment import payment_routes
-from models.order import Order
-from models.order_item import OrderItem
-from models.menu_item import MenuItem
-from decimal import Decimal
+from routes.payment import (
+    payment_routes, LONG_POLL_TIMEOUT, SHORT_POLL_INTERVAL
+)
+from services.cart import CartSnapshot
+from services.checkout import Checkout, CheckoutLine
 
 
 class MockUser(UserMixin):
@@ -67,11 +68,11 @@ class TestPaymentRoutes(unittest.TestCase):
         self.render_patch.stop()
 
     @patch("routes.payment.current_user", new_callable=PropertyMock)
-    @patch("routes.payment.storage")
-    def test_payment_page_no_order(self, mock_storage, mock_current_user):
+    @patch("routes.payment.checkout.get_checkout")
+    def test_payment_page_no_order(self, mock_checkout, mock_current_user):
         """Test payment page rendering with no active order"""
         mock_current_user.return_value = self.mock_user
-        mock_storage.all.return_value = {}
+        mock_checkout.return_value = Checkout(None, 0.0, 5.0, 5.0, ())
 
         response = self.client.get("/payment")
         self.assertEqual(response.status_code, 200)
@@ -80,49 +81,32 @@ class TestPaymentRoutes(unittest.TestCase):
         )
 
     @patch("routes.payment.current_user", new_callable=PropertyMock)
-    @patch("routes.payment.storage")
-    def test_payment_page_with_order(self, mock_storage, mock_current_user):
+    @patch("routes.payment.checkout.get_checkout")
+    def test_payment_page_with_order(self, mock_checkout, mock_current_user):
         """Test payment page rendering with active order"""
         mock_current_user.return_value = self.mock_user
-
-        # Mock active order
-        mock_order = Order(
-            id="test_order_id",
-            client_id=self.mock_user.id,
-            status="active",
-            total_price=Decimal("21.98"),
-        )
-
-        # Mock order items
-        mock_menu_item = MenuItem(
-            id="test_item_id", name="Test Item", price=Decimal("10.99")
+        line = CheckoutLine("Test Item", 2, 10.99)
+        mock_checkout.return_value = Checkout(
+            "test_order_id", 21.98, 5.0, 26.98, (line,)
         )
-        mock_order_item = OrderItem(menu_item_id="test_item_id", quantity=2)
-        mock_order.order_items = [mock_order_item]
-
-        mock_storage.all.return_value = {"Order.test_order": mock_order}
-        mock_storage.get.return_value = mock_menu_item
 
         response = self.client.get("/payment")
         self.assertEqual(response.status_code, 200)
-        self.mock_render.assert_called_once()
+        self.mock_render.assert_called_once_with(
+            "payment.html", subtotal="21.98", total="26.98", items=[line]
+        )
 
     @patch("routes.payment.current_user", new_callable=PropertyMock)
-    @patch("routes.payment.storage")
-    def test_get_totals(self, mock_storage, mock_current_user):
+    @patch("routes.payment.checkout.get_checkout")
+    @patch("routes.payment.cart")
+    def test_get_totals(self, mock_cart, mock_checkout, mock_current_user):
         """Test getting order totals"""
         mock_current_user.return_value = self.mock_user
-        mock_session = MagicMock()
-
-        # Mock active order with total price
-        mock_order = MagicMock()
-        mock_order.total_price = Decimal("21.98")
-        mock_session.query.return_value.filter_by.return_value.options.return_value.first.return_value = (
-            mock_order
+        mock_checkout.return_value = Checkout(
+            "test_order_id", 21.98, 5.0, 26.98, ()
         )
-
-        mock_storage.session_scope.return_value.__enter__.return_value = (
-            mock_session
+        mock_cart.get_snapshot.return_value = CartSnapshot(
+            "test_order_id", 21.98, "active", [], version=3
         )
 
         response = self.client.get("/api/v1/payment/totals")
@@ -131,6 +115,74 @@ class TestPaymentRoutes(unittest.TestCase):
         self.assertEqual(response.json["subtotal"], "21.98")
         self.assertEqual(response.json["delivery_fee"], "5.00")
         self.assertEqual(response.json["total"], "26.98")
+        self.assertEqual(response.json["version"], 3)
+        mock_cart.wait_for_change.assert_not_called()
+
+    @patch("routes.payment.current_user", new_callable=PropertyMock)
+    @patch("routes.payment.checkout.get_checkout")
+    @patch("routes.payment.cart")
+    def test_get_totals_long_poll(self, mock_cart, mock_checkout,
+                                  mock_current_user):
+        """Test a version returns 304 until the cart changes"""
+        mock_current_user.return_value = self.mock_user
+        mock_checkout.return_value = Checkout(
+            "test_order_id", 10.0, 5.0, 15.0, ()
+        )
+        mock_cart.wait_for_change.return_value = None
+
+        response = self.client.get("/api/v1/payment/totals?version=3&wait=60")
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["Cache-Control"], "no-store")
+        args = mock_cart.wait_for_change.call_args[0]
+        self.assertEqual(args[1:], (3, LONG_POLL_TIMEOUT))
+
+        mock_cart.wait_for_change.return_value = CartSnapshot(
+            "test_order_id", 10.0, "active", [], version=4
+        )
+        response = self.client.get("/api/v1/payment/totals?version=3&wait=5")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["total"], "15.00")
+        self.assertEqual(response.json["version"], 4)
+
+    @patch("routes.payment._long_polls", threading.BoundedSemaphore(1))
+    @patch("routes.payment.current_user", new_callable=PropertyMock)
+    @patch("routes.payment.cart")
+    def test_get_totals_short_polls_over_cap(self, mock_cart,
+                                             mock_current_user):
+        """Test polls beyond MAX_LONG_POLLS answer without waiting"""
+        from routes import payment
+
+        mock_current_user.return_value = self.mock_user
+        mock_cart.wait_for_change.return_value = None
+        self.assertTrue(payment._long_polls.acquire(blocking=False))
+        try:
+            response = self.client.get(
+                "/api/v1/payment/totals?version=3&wait=25"
+            )
+        finally:
+            payment._long_polls.release()
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["Retry-After"],
+                         str(SHORT_POLL_INTERVAL))
+        self.assertEqual(mock_cart.wait_for_change.call_args[0][2], 0)
+
+        response = self.client.get("/api/v1/payment/totals?version=3&wait=25")
+        self.assertNotIn("Retry-After", response.headers)
+        self.assertEqual(mock_cart.wait_for_change.call_args[0][2], 25)
+
+    @patch("routes.payment.current_user", new_callable=PropertyMock)
+    @patch("routes.payment.cart")
+    def test_get_totals_short_polls_without_cart_cache(self, mock_cart,
+                                                       mock_current_user):
+        """Test polls answer at once when other workers' writes are unseen"""
+        mock_current_user.return_value = self.mock_user
+        mock_cart.CACHE_CARTS = False
+        mock_cart.wait_for_change.return_value = None
+
+        response = self.client.get("/api/v1/payment/totals?version=3&wait=25")
+        self.assertEqual(response.status_code, 304)
+        self.assertIn("Retry-After", response.headers)
+        self.assertEqual(mock_cart.wait_for_change.call_args[0][2], 0)
 
     def test_apply_valid_coupon(self):
         """Test applying a valid coupon code"""
@@ -78,6 +78,7 @@ class TestSignupRoutes(unittest.TestCase):
             mock_session
         )
         mock_bcrypt.generate_password_hash.return_value = b"hashed_password"
+        mock_storage.find.return_value = []
 
         test_data = {
             "username": "testuser",
@@ -99,7 +100,9 @@ class TestSignupRoutes(unittest.TestCase):
         existing_client = Client(
             username="testuser", email="existing@example.com"
         )
-        mock_storage.all.return_value = {"Client.1": existing_client}
+        mock_storage.find.side_effect = lambda cls, limit=None, **kw: (
+            [existing_client] if "username" in kw else []
+        )
 
         test_data = {
             "username": "testuser",  # Existing username
@@ -121,7 +124,9 @@ class TestSignupRoutes(unittest.TestCase):
         existing_client = Client(
             username="existinguser", email="test@example.com"
         )
-        mock_storage.all.return_value = {"Client.1": existing_client}
+        mock_storage.find.side_effect = lambda cls, limit=None, **kw: (
+            [existing_client] if "email" in kw else []
+        )
 
         test_data = {
             "username": "newuser",
@@ -88,7 +88,7 @@ class TestUserSettingRoutes(unittest.TestCase):
         mock_current_user.return_value = self.mock_user
         mock_current_user.return_value.email = "current@example.com"
         existing_client = Client(id="other_id", email="existing@example.com")
-        mock_storage.all.return_value = {"Client.1": existing_client}
+        mock_storage.find.return_value = [existing_client]
 
         test_data = {
             "username": "testuser",
@@ -107,7 +107,7 @@ class TestUserSettingRoutes(unittest.TestCase):
     ):
         """Test password update with incorrect current password"""
         mock_client = Client(id="test_user_id", password="old_hash")
-        mock_storage.all.return_value = {"Client.1": mock_client}
+        mock_storage.get.return_value = mock_client
         mock_bcrypt.check_password_hash.return_value = False
 
         test_data = {
@@ -125,7 +125,7 @@ class TestUserSettingRoutes(unittest.TestCase):
     @patch("routes.user_setting.storage")
     def test_user_not_found(self, mock_storage):
         """Test update when user not found in database"""
-        mock_storage.all.return_value = {}
+        mock_storage.get.return_value = None
 
         test_data = {
             "username": "testuser",
@@ -1,13 +1,11 @@
 #!/usr/bin/python3
 """Unit tests for welcome routes"""
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from flask import Flask
 from flask_login import LoginManager, UserMixin
 from routes.welcome import welcome_routes
-from models.menu_item import MenuItem
-from models.restaurant import Restaurant
-from decimal import Decimal
+from services.search import Facets, Filters, SearchPage
 
 
 class MockUser(UserMixin):
@@ -73,112 +71,138 @@ class TestWelcomeRoutes(unittest.TestCase):
             "welcome.html", title="Welcome to Foodify"
         )
 
-    @patch("routes.welcome.storage")
-    def test_search_meals_no_filters(self, mock_storage):
+    def meal(self, item_id, name, restaurant="Test Restaurant"):
+        """Build a meal as returned by the search service"""
+        return {
+            "id": item_id,
+            "name": name,
+            "price": 10.99,
+            "is_available": True,
+            "restaurant_name": restaurant,
+            "image_name": f"{item_id}.jpg",
+        }
+
+    @patch("routes.welcome.search.cached_search")
+    def test_search_meals_no_filters(self, mock_search):
         """Test meal search without filters"""
-        mock_session = MagicMock()
-        mock_restaurant = Restaurant(name="Test Restaurant")
-        mock_menu_items = [
-            MenuItem(
-                id="item1",
-                name="Test Item 1",
-                price=Decimal("10.99"),
-                is_available=True,
-                restaurant=mock_restaurant,
-                image_url="test1.jpg",
-            ),
-            MenuItem(
-                id="item2",
-                name="Test Item 2",
-                price=Decimal("12.99"),
-                is_available=True,
-                restaurant=mock_restaurant,
-                image_url="test2.jpg",
-            ),
-        ]
-        mock_query = MagicMock()
-        mock_query.options.return_value = mock_query
-        mock_query.count.return_value = 2
-        mock_query.limit.return_value.offset.return_value.all.return_value = (
-            mock_menu_items
-        )
-        mock_session.query.return_value = mock_query
-        mock_storage.session_scope.return_value.__enter__.return_value = (
-            mock_session
-        )
+        mock_search.return_value = (SearchPage(
+            [self.meal("item1", "Test Item 1"),
+             self.meal("item2", "Test Item 2")], 2, None
+        ), False)
 
         response = self.client.get("/api/v1/search")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.json["meals"]), 2)
         self.assertEqual(response.json["total"], 2)
+        self.assertIsNone(response.json["next_cursor"])
+        self.assertNotIn("facets", response.json)
+        self.assertEqual(
+            mock_search.call_args[1],
+            {"query": "", "restaurant": "All", "cursor": None, "page": 1,
+             "with_facets": False, "filters": Filters(), "sort": None},
+        )
+        self.assertEqual(response.headers["X-Cache"], "MISS")
 
-    @patch("routes.welcome.storage")
-    def test_search_meals_with_query(self, mock_storage):
+    @patch("routes.welcome.search.cached_search")
+    def test_search_meals_with_query(self, mock_search):
         """Test meal search with query parameter"""
-        mock_session = MagicMock()
-        mock_restaurant = Restaurant(name="Test Restaurant")
-        mock_menu_item = MenuItem(
-            id="item1",
-            name="Burger",
-            price=Decimal("10.99"),
-            is_available=True,
-            restaurant=mock_restaurant,
-            image_url="burger.jpg",
-        )
-        mock_query = MagicMock()
-        mock_query.options.return_value = mock_query
-        mock_query.filter.return_value = mock_query
-        mock_query.count.return_value = 1
-        mock_query.limit.return_value.offset.return_value.all.return_value = [
-            mock_menu_item
-        ]
-        mock_session.query.return_value = mock_query
-        mock_storage.session_scope.return_value.__enter__.return_value = (
-            mock_session
-        )
+        mock_search.return_value = (SearchPage(
+            [self.meal("item1", "Burger")], 9, "next"
+        ), False)
 
-        response = self.client.get("/api/v1/search?query=burger")
+        response = self.client.get("/api/v1/search?query=Burger&cursor=abc")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.json["meals"]), 1)
         self.assertEqual(response.json["meals"][0]["name"], "Burger")
+        self.assertEqual(response.json["next_cursor"], "next")
+        self.assertEqual(mock_search.call_args[1]["query"], "Burger")
+        self.assertEqual(mock_search.call_args[1]["cursor"], "abc")
+
+    @patch("routes.welcome.search.cached_search")
+    def test_search_meals_with_facets(self, mock_search):
+        """Test facet counts are returned when asked for"""
+        facets = Facets({"Burger Place": 9}, {"available": 9,
+                                              "unavailable": 0},
+                        {"0-10": 9, "10-20": 0, "20-30": 0, "30+": 0})
+        mock_search.return_value = (SearchPage(
+            [self.meal("item1", "Burger")], 9, None, facets=facets
+        ), False)
+
+        response = self.client.get("/api/v1/search?query=Burger&facets=1")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(mock_search.call_args[1]["with_facets"])
+        self.assertEqual(response.json["facets"]["restaurants"],
+                         {"Burger Place": 9})
+        self.assertEqual(response.json["facets"]["prices"]["0-10"], 9)
+
+    @patch("routes.welcome.search.cached_search")
+    def test_search_meals_with_price_filters(self, mock_search):
+        """Test price, availability and sort parameters are passed on"""
+        mock_search.return_value = (SearchPage([], 0, None), False)
+
+        response = self.client.get(
+            "/api/v1/search?min_price=5&max_price=12.5&available_only=1"
+            "&sort=price"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_search.call_args[1]["filters"],
+                         Filters(5.0, 12.5, True))
+        self.assertEqual(mock_search.call_args[1]["sort"], "price")
 
-    @patch("routes.welcome.storage")
-    def test_search_meals_with_restaurant_filter(self, mock_storage):
+        for query in ("min_price=abc", "max_price=-1", "min_price=nan"):
+            response = self.client.get(f"/api/v1/search?{query}")
+            self.assertEqual(response.status_code, 400)
+
+    @patch("routes.welcome.search.cached_search")
+    def test_search_meals_with_restaurant_filter(self, mock_search):
         """Test meal search with restaurant filter"""
-        mock_session = MagicMock()
-        mock_restaurant = Restaurant(name="Burger Place")
-        mock_menu_item = MenuItem(
-            id="item1",
-            name="Burger",
-            price=Decimal("10.99"),
-            is_available=True,
-            restaurant=mock_restaurant,
-            image_url="burger.jpg",
-        )
-        mock_query = MagicMock()
-        mock_query.options.return_value = mock_query
-        mock_query.join.return_value = mock_query
-        mock_query.filter.return_value = mock_query
-        mock_query.count.return_value = 1
-        mock_query.limit.return_value.offset.return_value.all.return_value = [
-            mock_menu_item
-        ]
-        mock_session.query.return_value = mock_query
-        mock_storage.session_scope.return_value.__enter__.return_value = (
-            mock_session
-        )
+        mock_search.return_value = (SearchPage(
+            [self.meal("item1", "Burger", "Burger Place")], 1, None
+        ), False)
 
-        response = self.client.get("/api/v1/search?restaurant=Burger+Place")
+        response = self.client.get(
+            "/api/v1/search?restaurant=Burger+Place&page=2"
+        )
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.json["meals"]), 1)
         self.assertEqual(
             response.json["meals"][0]["restaurant_name"], "Burger Place"
         )
-
-    @patch("routes.welcome.storage")
-    def test_search_meals_error_handling(self, mock_storage):
+        self.assertEqual(mock_search.call_args[1]["restaurant"],
+                         "Burger Place")
+        self.assertEqual(mock_search.call_args[1]["page"], 2)
+
+    @patch("routes.welcome.search.cache_stats")
+    def test_search_cache_stats(self, mock_stats):
+        """Test the cache counters are reported"""
+        mock_stats.return_value = {"pages": {"hits": 3, "misses": 1}}
+        response = self.client.get("/api/v1/search/stats")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["pages"]["hits"], 3)
+
+    @patch("routes.welcome.suggest.index.suggest")
+    def test_search_suggestions(self, mock_suggest):
+        """Test suggestions are served for a prefix, capped at TOP_K"""
+        mock_suggest.return_value = [{"text": "Pizza", "type": "meal"}]
+        response = self.client.get(
+            "/api/v1/search/suggest?prefix=piz&limit=50"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["suggestions"][0]["text"], "Pizza")
+        mock_suggest.assert_called_once_with("piz", 10)
+        response = self.client.get("/api/v1/search/suggest?limit=x")
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_meals_invalid_cursor(self):
+        """Test a malformed cursor is rejected"""
+        response = self.client.get("/api/v1/search?cursor=%%%")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json["error"], "Invalid cursor")
+
+    @patch("routes.welcome.search.cached_search")
+    def test_search_meals_error_handling(self, mock_search):
         """Test search error handling"""
-        mock_storage.session_scope.side_effect = Exception("Database error")
+        mock_search.side_effect = Exception("Database error")
 
         response = self.client.get("/api/v1/search")
         self.assertEqual(response.status_code, 500)